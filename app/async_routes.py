@@ -0,0 +1,212 @@
+"""
+Asyncio twins of the authorization hot path, enabled with `ASYNC_REQUEST_PATH=true`.
+
+Handlers run on the event loop against the `AsyncEngine` and `redis.asyncio`
+cache instead of blocking a threadpool thread per request.
+"""
+
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Header, HTTPException, status
+from fastapi.responses import ORJSONResponse
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app import metrics, models, schemas, utils
+from app.core.constants import IDEMPOTENCY_KEY_HEADER
+from app.database import ShardRouter, get_async_db, get_shard_router, use_shard
+from app.dependencies import (
+    get_audit_service,
+    get_idempotency_store,
+    get_lookup_cache,
+    get_scoring_service,
+    get_stats_service,
+)
+from app.services import (
+    AuditService,
+    IdempotencyStore,
+    LookupCache,
+    ScoringService,
+    StatsService,
+)
+from app.services.idempotency import fingerprint
+from app.services.lookup_cache import AUDIT, TRANSACTION
+
+router = APIRouter()
+
+
+@router.post(
+    "/payment",
+    response_model=schemas.PaymentResponse,
+    status_code=status.HTTP_201_CREATED,
+    summary="Submit a simulated payment request",
+)
+async def create_payment(
+    payload: schemas.PaymentRequest,
+    db: AsyncSession = Depends(get_async_db),
+    scoring_service: ScoringService = Depends(get_scoring_service),
+    audit_service: AuditService = Depends(get_audit_service),
+    stats_service: StatsService = Depends(get_stats_service),
+    idempotency_store: IdempotencyStore = Depends(get_idempotency_store),
+    lookup_cache: LookupCache = Depends(get_lookup_cache),
+    shard_router: ShardRouter = Depends(get_shard_router),
+    idempotency_key: Optional[str] = Header(
+        default=None, alias=IDEMPOTENCY_KEY_HEADER, min_length=1, max_length=255
+    ),
+) -> ORJSONResponse:
+    """
+    Accept a payment request, perform fraud checks, persist, and return the result.
+
+    A repeated ``Idempotency-Key`` returns the stored response of the first
+    request without scoring or writing anything again.
+    """
+    with metrics.handler():
+        request_payload = payload.model_dump()
+        shard = shard_router.shard_for_card(payload.card_number)
+        use_shard(db, shard)
+        if idempotency_key is not None:
+            request_fingerprint = fingerprint(request_payload)
+            with metrics.stage("idempotency_check"):
+                # New keys are ruled out by the Bloom filter without any I/O.
+                stored = None
+                if idempotency_store.maybe_stored(idempotency_key):
+                    stored = await idempotency_store.confirm_async(
+                        db, idempotency_key, request_fingerprint
+                    )
+            if stored is not None:
+                return utils.replay_response(stored)
+        decision = await scoring_service.evaluate_async(payload)
+        with metrics.stage("transaction_commit"):
+            transaction = models.Transaction.from_payment(
+                payload=payload,
+                status=decision.status,
+                risk_flag=decision.reason,
+                shard=shard,
+            )
+            db.add(transaction)
+            await db.run_sync(
+                lambda session: stats_service.record(
+                    session,
+                    status=decision.status,
+                    amount=payload.amount,
+                    latency_ms=decision.latency_ms,
+                )
+            )
+            transaction_id = transaction.id
+            transaction_body = schemas.TransactionResponse.payload(transaction)
+            response = schemas.PaymentResponse.payload(transaction_id, decision)
+            if idempotency_key is not None:
+                db.add(
+                    idempotency_store.row(
+                        idempotency_key, request_fingerprint, transaction_id, response
+                    )
+                )
+            try:
+                await db.commit()
+            except IntegrityError:
+                # Another request stored this key first; answer with its result.
+                await db.rollback()
+                stored = None
+                if idempotency_key is not None:
+                    stored = await idempotency_store.confirm_async(
+                        db, idempotency_key, request_fingerprint
+                    )
+                if stored is None:
+                    raise
+                return utils.replay_response(stored)
+        if idempotency_key is not None:
+            idempotency_store.remember(idempotency_key, request_fingerprint, response)
+        lookup_cache.put(TRANSACTION, transaction_id, transaction_body)
+        with metrics.stage("audit_write"):
+            audit = await audit_service.record_async(
+                db,
+                schemas.DecisionAuditCreate.model_construct(
+                    transaction_id=transaction_id,
+                    request_payload=request_payload,
+                    decision_payload=decision,
+                ),
+            )
+            # A write-behind audit is cached once `/audit/{id}` reads it back, so a
+            # dropped or failed flush never leaves a phantom audit in the cache.
+            if not audit_service.write_behind:
+                body = [schemas.DecisionAuditResponse.payload(audit)]
+                lookup_cache.put(AUDIT, transaction_id, body)
+        with metrics.stage("response_build"):
+            return ORJSONResponse(response, status_code=status.HTTP_201_CREATED)
+
+
+@router.get(
+    "/transaction/{transaction_id}",
+    response_model=schemas.TransactionResponse,
+    summary="Retrieve a transaction by id",
+)
+async def read_transaction(
+    transaction_id: str,
+    db: AsyncSession = Depends(get_async_db),
+    lookup_cache: LookupCache = Depends(get_lookup_cache),
+    shard_router: ShardRouter = Depends(get_shard_router),
+) -> ORJSONResponse:
+    # Ids are UUIDs; anything else cannot match a stored row.
+    transaction_id = models.parse_id(transaction_id)
+    body = await lookup_cache.get_async(TRANSACTION, transaction_id) if transaction_id else None
+    if body is None:
+        transaction = None
+        for shard in shard_router.shards_for_id(transaction_id) if transaction_id else ():
+            use_shard(db, shard)
+            transaction = await db.get(models.Transaction, transaction_id)
+            if transaction is not None:
+                break
+        if transaction is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Transaction not found",
+            )
+        body = schemas.TransactionResponse.payload(transaction)
+        await lookup_cache.fill_async(TRANSACTION, transaction_id, body)
+    return ORJSONResponse(body)
+
+
+@router.get(
+    "/stats",
+    response_model=schemas.StatsResponse,
+    summary="Retrieve system processing statistics",
+)
+async def read_stats(db: AsyncSession = Depends(get_async_db)) -> schemas.StatsResponse:
+    metrics = await utils.calculate_stats_async(db)
+    return schemas.StatsResponse(**metrics)
+
+
+@router.get(
+    "/audit/{transaction_id}",
+    response_model=list[schemas.DecisionAuditResponse],
+    summary="Retrieve audit logs for a transaction",
+)
+async def read_audit_logs(
+    transaction_id: str,
+    db: AsyncSession = Depends(get_async_db),
+    audit_service: AuditService = Depends(get_audit_service),
+    lookup_cache: LookupCache = Depends(get_lookup_cache),
+    shard_router: ShardRouter = Depends(get_shard_router),
+) -> ORJSONResponse:
+    transaction_id = models.parse_id(transaction_id)
+    if transaction_id is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Audit logs not found for this transaction.",
+        )
+    body = await lookup_cache.get_async(AUDIT, transaction_id)
+    if body is None:
+        audits = []
+        for shard in shard_router.shards_for_id(transaction_id):
+            use_shard(db, shard)
+            audits = await audit_service.fetch_by_transaction_async(db, transaction_id)
+            if audits:
+                break
+        if not audits:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Audit logs not found for this transaction.",
+            )
+        body = [schemas.DecisionAuditResponse.payload(audit) for audit in audits]
+        await lookup_cache.fill_async(AUDIT, transaction_id, body)
+    return ORJSONResponse(body)
@@ -15,11 +15,99 @@ class Settings(BaseSettings):
     app_name: str = "RiskOps Demo Stack"
     environment: str = "local"
     database_url: str = "sqlite:///./transactions.db"
+    # Shard transactions, audits and their `/stats` counters across several
+    # databases by card number, e.g. '["sqlite:///./shard-0.db", "sqlite:///./shard-1.db"]'.
+    # When set, these replace `database_url`; `async_database_url` only applies
+    # to a single database.
+    database_shard_urls: list[str] = []
+    async_database_url: str | None = None
+    async_request_path: bool = False
+    # Create missing tables when the API starts. Indexes added to existing tables
+    # are only built by `scripts/init_db.py`; deployments can turn this off and
+    # run that once instead.
+    create_schema_on_startup: bool = True
     redis_url: str = "redis://localhost:6379/0"
+    # Synthetic features come from an in-process table, so the Redis lookup is
+    # skipped on the hot path unless explicitly re-enabled.
+    feature_cache_enabled: bool = False
     feature_cache_ttl_seconds: int = 300
+    feature_cache_encoding: str = "json"
+    feature_cache_local_max_entries: int = 10_000
+    feature_cache_local_ttl_seconds: float | None = None
+    redis_socket_timeout_seconds: float = 0.25
+    redis_breaker_failure_threshold: int = 3
+    redis_breaker_backoff_seconds: float = 0.5
+    redis_breaker_max_backoff_seconds: float = 30.0
     high_amount_threshold: float = 500.0
     high_amount_decline_rate: float = 0.30
     random_decline_rate: float = 0.10
+    # Optional YAML/JSON rule file replacing the three heuristics above; it is
+    # re-read when it changes, checked at most every reload interval.
+    rules_path: str | None = None
+    rules_reload_interval_seconds: float = 1.0
+    # Sliding-window velocity per card/device: "memory" (per process), "redis"
+    # (shared by every process) or "off" (keep the synthetic spending_velocity).
+    velocity_backend: str = "memory"
+    velocity_buckets: int = 12
+    velocity_max_keys: int = 100_000
+    # Hourly card spend that maps to spending_velocity = 1.0.
+    velocity_spend_reference: float = 2_000.0
+    # Idempotency-Key replays: keys the Bloom filter is sized for (at the given
+    # false-positive rate), responses kept in process and in Redis, and how many
+    # recent keys are loaded into the filter at startup.
+    idempotency_bloom_capacity: int = 1_000_000
+    idempotency_bloom_error_rate: float = 0.001
+    idempotency_local_max_entries: int = 10_000
+    idempotency_ttl_seconds: int = 86_400
+    idempotency_warm_keys: int = 100_000
+    audit_write_behind: bool = False
+    audit_queue_max_size: int = 10_000
+    audit_flush_batch_size: int = 500
+    audit_flush_interval_ms: int = 200
+    # "database" keeps audits in `decision_audits`; "segments" appends them to
+    # time-partitioned files under `audit_segment_dir` instead.
+    audit_backend: str = "database"
+    audit_segment_dir: str = "./audit-segments"
+    audit_segment_partition_minutes: int = 60
+    audit_segment_compress_after_hours: float | None = 24.0
+    audit_segment_retention_hours: float | None = None
+    stats_sketch_relative_accuracy: float = 0.01
+    # Stripes the `/stats` counters and latency buckets are spread over, so
+    # concurrent payments do not serialize on the same row locks (1 disables).
+    stats_counter_stripes: int = 16
+    # Read-through cache for `/transaction/{id}` and `/audit/{id}`: an in-process
+    # LRU, plus Redis shared by every process when `lookup_cache_redis` is set.
+    lookup_cache_enabled: bool = True
+    lookup_cache_local_max_entries: int = 10_000
+    lookup_cache_local_ttl_seconds: float = 300.0
+    lookup_cache_redis: bool = False
+    lookup_cache_redis_ttl_seconds: int = 3_600
+    # How often each process checks Redis for a reset by another process and
+    # drops its in-process tier.
+    lookup_cache_generation_check_seconds: float = 1.0
+    # `/stats/stream`: seconds between stats computations (shared by every
+    # viewer) and between keep-alive comments when nothing changed.
+    stats_stream_interval_seconds: float = 1.0
+    stats_stream_heartbeat_seconds: float = 15.0
+    # Admission control for `POST /payment`, per process: payments processed at
+    # once (0 turns it off), payments allowed to wait for a slot, and the longest
+    # wait before a payment is shed with 503 and this Retry-After.
+    admission_max_concurrency: int = 32
+    admission_max_queue: int = 128
+    admission_max_wait_ms: int = 500
+    admission_retry_after_seconds: int = 1
+    # Rows fetched per server-side cursor round trip and encoded per chunk by
+    # `/export/*` and `scripts/export_data.py`; export memory scales with this.
+    export_batch_size: int = 5_000
+    # Longest `/admin/reset` may wait for table locks on Postgres before giving up.
+    reset_lock_timeout_ms: int = 2_000
+    # Background workers: processes per supervisor (None = one per CPU), queues to
+    # listen on, items per job when splitting large inputs, and items per chunk
+    # inside a batched job.
+    worker_processes: int | None = None
+    worker_queues: str = "riskops"
+    worker_job_size: int = 10_000
+    worker_chunk_size: int = 1_000
 
     model_config = SettingsConfigDict(
         env_file=".env",
@@ -4,3 +4,20 @@ Shared constants for transaction decisioning.
 
 APPROVED = "Approved"
 DECLINED = "Declined"
+
+MAX_BATCH_SIZE = 5_000
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
+IDEMPOTENCY_KEY_HEADER = "Idempotency-Key"
+# Set on responses replayed from a stored Idempotency-Key result.
+IDEMPOTENT_REPLAY_HEADER = "Idempotent-Replayed"
+# Optional client budget (milliseconds) for how long `/payment` may queue.
+REQUEST_TIMEOUT_HEADER = "X-Request-Timeout-Ms"
+
+# Transaction ids carry the shard that stores them in the top bits of their
+# random part, so point reads by id go straight to that shard.
+ID_SHARD_BITS = 10
+ID_SHARD_SHIFT = 52
+MAX_SHARDS = 1 << ID_SHARD_BITS
@@ -1,20 +1,229 @@
+import asyncio
+import hashlib
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
 from contextlib import contextmanager
-from typing import Any, Generator
+from functools import lru_cache
+from typing import Any, AsyncGenerator, Callable, Generator, Optional, Sequence, TypeVar
 
 from sqlalchemy import create_engine
-from sqlalchemy.orm import declarative_base, sessionmaker
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
+    AsyncSession,
+    async_sessionmaker,
+    create_async_engine,
+)
+from sqlalchemy.orm import Session, declarative_base, sessionmaker
 
 from app.core import config
+from app.core.constants import ID_SHARD_SHIFT, MAX_SHARDS
 
 settings = config.get_settings()
 DATABASE_URL = settings.database_url
+# One URL per shard; without `DATABASE_SHARD_URLS` the only shard is `DATABASE_URL`.
+SHARD_URLS = list(settings.database_shard_urls) or [DATABASE_URL]
 
-engine_kwargs: dict[str, Any] = {"pool_pre_ping": True}
-if DATABASE_URL.startswith("sqlite"):
-    engine_kwargs["connect_args"] = {"check_same_thread": False}
+T = TypeVar("T")
 
-engine = create_engine(DATABASE_URL, **engine_kwargs)
-SessionLocal = sessionmaker(bind=engine, autocommit=False, autoflush=False)
+
+def engine_options(url: str) -> dict[str, Any]:
+    options: dict[str, Any] = {"pool_pre_ping": True}
+    if url.startswith("sqlite"):
+        options["connect_args"] = {"check_same_thread": False}
+    return options
+
+
+class RoutedSession(Session):
+    """
+    Session whose connection comes from shard ``shard`` of ``router`` (shard 0
+    until moved with `use_shard`). An explicit ``bind`` still takes precedence.
+    """
+
+    def __init__(self, router: Optional["ShardRouter"] = None, shard: int = 0, **kwargs: Any):
+        super().__init__(**kwargs)
+        self.router = router or get_shard_router()
+        self.shard = shard
+
+    def get_bind(self, mapper: Any = None, *, bind: Any = None, **kwargs: Any) -> Any:
+        if bind is not None or self.bind is not None:
+            return super().get_bind(mapper, bind=bind, **kwargs)
+        return self.router.engine(self.shard)
+
+
+class AsyncRoutedSession(RoutedSession):
+    """
+    The sync half of a routed `AsyncSession`: binds to the shard's `AsyncEngine`.
+    """
+
+    def get_bind(self, mapper: Any = None, *, bind: Any = None, **kwargs: Any) -> Any:
+        if bind is not None or self.bind is not None:
+            return super().get_bind(mapper, bind=bind, **kwargs)
+        return self.router.async_engine(self.shard).sync_engine
+
+
+def use_shard(db: Session | AsyncSession, shard: int) -> None:
+    """
+    Send ``db``'s next statements to ``shard``. Flush or commit pending rows
+    first; they are written to whichever shard is current at flush time.
+    """
+
+    getattr(db, "sync_session", db).shard = shard
+
+
+class ShardRouter:
+    """
+    Spreads transactions over one or more databases ("shards").
+
+    A payment is stored, with its audit, idempotency key and `/stats`
+    increments, on the shard picked by a hash of its card number. Transaction
+    ids record that shard in their random bits (`app.models.new_id`), so point
+    reads by id touch a single shard; listings and `/stats` are scatter-gathered
+    over all of them. Engines are created on first use.
+    """
+
+    def __init__(self, urls: Sequence[str], async_urls: Optional[Sequence[str]] = None) -> None:
+        if not 1 <= len(urls) <= MAX_SHARDS:
+            raise ValueError(f"Expected between 1 and {MAX_SHARDS} shard URLs, got {len(urls)}.")
+        self.urls = list(urls)
+        self.async_urls = list(async_urls or (to_async_url(url) for url in self.urls))
+        self.async_sessionmaker = async_sessionmaker(
+            sync_session_class=AsyncRoutedSession,
+            router=self,
+            autoflush=False,
+            expire_on_commit=False,
+        )
+        self._engines: dict[int, Engine] = {}
+        self._async_engines: dict[int, AsyncEngine] = {}
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.urls)
+
+    def engine(self, shard: int = 0) -> Engine:
+        engine = self._engines.get(shard)
+        if engine is None:
+            with self._lock:
+                if shard not in self._engines:
+                    url = self.urls[shard]
+                    self._engines[shard] = create_engine(url, **engine_options(url))
+                engine = self._engines[shard]
+        return engine
+
+    def engines(self) -> list[Engine]:
+        return [self.engine(shard) for shard in range(len(self))]
+
+    def async_engine(self, shard: int = 0) -> AsyncEngine:
+        engine = self._async_engines.get(shard)
+        if engine is None:
+            with self._lock:
+                if shard not in self._async_engines:
+                    self._async_engines[shard] = create_async_engine(
+                        self.async_urls[shard], pool_pre_ping=True
+                    )
+                engine = self._async_engines[shard]
+        return engine
+
+    def pools(self, *, use_async: bool = False) -> dict[int, Any]:
+        """
+        Connection pools of the engines built so far, by shard (for metrics;
+        nothing is connected or created here).
+        """
+
+        if use_async:
+            return {shard: engine.sync_engine.pool for shard, engine in self._async_engines.items()}
+        return {shard: engine.pool for shard, engine in self._engines.items()}
+
+    async def dispose_async(self) -> None:
+        for engine in list(self._async_engines.values()):
+            await engine.dispose()
+
+    def shard_for_card(self, card_number: str) -> int:
+        if len(self.urls) == 1:
+            return 0
+        digest = hashlib.blake2b(card_number.encode(), digest_size=8).digest()
+        return int.from_bytes(digest, "big") % len(self.urls)
+
+    def shard_for_id(self, transaction_id: str) -> int:
+        """
+        The shard holding ``transaction_id`` (a canonical UUID string).
+        """
+
+        if len(self.urls) == 1:
+            return 0
+        return (uuid.UUID(transaction_id).int >> ID_SHARD_SHIFT) % MAX_SHARDS % len(self.urls)
+
+    def shards_for_id(self, transaction_id: str) -> list[int]:
+        """
+        Shards to read ``transaction_id`` from, in order: the one it names, then
+        shard 0. Ids minted before sharding have random bits where the shard
+        goes, and their rows stay in the original database, the first URL.
+        """
+
+        shard = self.shard_for_id(transaction_id)
+        return [shard] if shard == 0 else [shard, 0]
+
+    def session(self, shard: int = 0) -> RoutedSession:
+        return RoutedSession(router=self, shard=shard, autoflush=False)
+
+    def scatter(self, fn: Callable[[Session], T]) -> list[T]:
+        """
+        Call ``fn`` with a session on every shard, concurrently when there are
+        several, and return the results in shard order.
+        """
+
+        def run(shard: int) -> T:
+            with self.session(shard) as session:
+                return fn(session)
+
+        if len(self.urls) == 1:
+            return [run(0)]
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(
+                        max_workers=len(self.urls), thread_name_prefix="shard-scatter"
+                    )
+        return list(self._executor.map(run, range(len(self.urls))))
+
+    async def scatter_async(self, fn: Callable[[Session], T]) -> list[T]:
+        """
+        `scatter` over the asyncio engines; ``fn`` runs via ``run_sync``.
+        """
+
+        async def run(shard: int) -> T:
+            async with self.async_sessionmaker(shard=shard) as session:
+                return await session.run_sync(fn)
+
+        return list(await asyncio.gather(*(run(shard) for shard in range(len(self.urls)))))
+
+
+@lru_cache
+def get_shard_router() -> ShardRouter:
+    async_urls = None
+    if settings.async_database_url and len(SHARD_URLS) == 1:
+        async_urls = [settings.async_database_url]
+    return ShardRouter(SHARD_URLS, async_urls)
+
+
+def get_engine(shard: int = 0) -> Engine:
+    """
+    The sync engine of ``shard``, built (and its driver loaded) on first use.
+    """
+
+    return get_shard_router().engine(shard)
+
+
+def __getattr__(name: str) -> Any:
+    # `from app.database import engine` keeps working and builds it on demand.
+    if name == "engine":
+        return get_engine()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+SessionLocal = sessionmaker(class_=RoutedSession, autocommit=False, autoflush=False)
 
 Base = declarative_base()
 
@@ -38,3 +247,39 @@ def session_scope() -> Generator:
         raise
     finally:
         session.close()
+
+
+# Async drivers for each sync URL scheme; psycopg 3 serves both sides.
+ASYNC_DRIVERS = {
+    "sqlite": "sqlite+aiosqlite",
+    "postgresql": "postgresql+psycopg",
+    "postgresql+psycopg": "postgresql+psycopg",
+    "postgresql+psycopg2": "postgresql+psycopg",
+}
+
+
+def to_async_url(url: str) -> str:
+    """
+    Map a sync database URL onto the matching asyncio driver.
+    """
+
+    parsed = make_url(url)
+    driver = ASYNC_DRIVERS.get(parsed.drivername, parsed.drivername)
+    return parsed.set(drivername=driver).render_as_string(hide_password=False)
+
+
+def get_async_engine(shard: int = 0) -> AsyncEngine:
+    """
+    Build the `AsyncEngine` on first use so the sync-only path never loads an async driver.
+    """
+
+    return get_shard_router().async_engine(shard)
+
+
+def get_async_sessionmaker() -> async_sessionmaker[AsyncSession]:
+    return get_shard_router().async_sessionmaker
+
+
+async def get_async_db() -> AsyncGenerator[AsyncSession, None]:
+    async with get_async_sessionmaker()() as db:
+        yield db
@@ -3,26 +3,225 @@ FastAPI dependency providers for shared services.
 """
 
 from functools import lru_cache
+from typing import Any
 
+from redis import Redis
+
+from app import utils
 from app.core import config
-from app.services import AuditService, FeatureCache, ScoringService
+from app.database import SessionLocal
+from app.services import (
+    AdmissionController,
+    AsyncFeatureCache,
+    AuditService,
+    BloomFilter,
+    CircuitBreaker,
+    DatabaseAuditBackend,
+    FeatureCache,
+    IdempotencyStore,
+    InMemoryVelocity,
+    LookupCache,
+    QueueMetrics,
+    RedisVelocity,
+    ScoringService,
+    SegmentAuditBackend,
+    StatsBroadcaster,
+    StatsService,
+)
+
+
+def feature_cache_options(settings: config.Settings) -> dict[str, Any]:
+    """
+    Keyword arguments shared by every feature cache built from settings.
+    """
+
+    return {
+        "redis_url": settings.redis_url,
+        "ttl_seconds": settings.feature_cache_ttl_seconds,
+        "encoding": settings.feature_cache_encoding,
+        "local_max_entries": settings.feature_cache_local_max_entries,
+        "local_ttl_seconds": settings.feature_cache_local_ttl_seconds,
+        "socket_timeout_seconds": settings.redis_socket_timeout_seconds,
+        "breaker": CircuitBreaker(
+            failure_threshold=settings.redis_breaker_failure_threshold,
+            backoff_seconds=settings.redis_breaker_backoff_seconds,
+            max_backoff_seconds=settings.redis_breaker_max_backoff_seconds,
+        ),
+    }
 
 
 @lru_cache
 def get_feature_cache() -> FeatureCache:
+    return FeatureCache(**feature_cache_options(config.get_settings()))
+
+
+@lru_cache
+def get_async_feature_cache() -> AsyncFeatureCache:
+    return AsyncFeatureCache(**feature_cache_options(config.get_settings()))
+
+
+def velocity_tracker(settings: config.Settings) -> InMemoryVelocity | RedisVelocity | None:
+    """
+    Build the velocity counters selected by ``VELOCITY_BACKEND``.
+    """
+
+    if settings.velocity_backend == "off":
+        return None
+    if settings.velocity_backend == "memory":
+        return InMemoryVelocity(
+            buckets=settings.velocity_buckets, max_keys=settings.velocity_max_keys
+        )
+    if settings.velocity_backend == "redis":
+        redis = Redis.from_url(
+            settings.redis_url,
+            socket_timeout=settings.redis_socket_timeout_seconds,
+            socket_connect_timeout=settings.redis_socket_timeout_seconds,
+        )
+        return RedisVelocity(
+            redis,
+            buckets=settings.velocity_buckets,
+            breaker=CircuitBreaker(
+                failure_threshold=settings.redis_breaker_failure_threshold,
+                backoff_seconds=settings.redis_breaker_backoff_seconds,
+                max_backoff_seconds=settings.redis_breaker_max_backoff_seconds,
+            ),
+        )
+    raise ValueError(f"Unknown VELOCITY_BACKEND {settings.velocity_backend!r}")
+
+
+@lru_cache
+def get_scoring_service() -> ScoringService:
     settings = config.get_settings()
-    return FeatureCache(
-        redis_url=settings.redis_url,
-        ttl_seconds=settings.feature_cache_ttl_seconds,
+    use_cache = settings.feature_cache_enabled
+    return ScoringService(
+        settings=settings,
+        cache=get_feature_cache() if use_cache else None,
+        async_cache=(
+            get_async_feature_cache() if use_cache and settings.async_request_path else None
+        ),
+        velocity=velocity_tracker(settings),
     )
 
 
 @lru_cache
-def get_scoring_service() -> ScoringService:
+def get_idempotency_store() -> IdempotencyStore:
+    settings = config.get_settings()
+    redis = Redis.from_url(
+        settings.redis_url,
+        socket_timeout=settings.redis_socket_timeout_seconds,
+        socket_connect_timeout=settings.redis_socket_timeout_seconds,
+    )
+    return IdempotencyStore(
+        redis=redis,
+        ttl_seconds=settings.idempotency_ttl_seconds,
+        bloom=BloomFilter(
+            capacity=settings.idempotency_bloom_capacity,
+            error_rate=settings.idempotency_bloom_error_rate,
+        ),
+        local_max_entries=settings.idempotency_local_max_entries,
+        breaker=CircuitBreaker(
+            failure_threshold=settings.redis_breaker_failure_threshold,
+            backoff_seconds=settings.redis_breaker_backoff_seconds,
+            max_backoff_seconds=settings.redis_breaker_max_backoff_seconds,
+        ),
+    )
+
+
+@lru_cache
+def get_lookup_cache() -> LookupCache:
     settings = config.get_settings()
-    return ScoringService(settings=settings, cache=get_feature_cache())
+    if not settings.lookup_cache_enabled:
+        # Zero capacity and no Redis: every lookup reads the database.
+        return LookupCache(local_max_entries=0)
+    # Resets reach other processes through Redis even without the Redis tier.
+    redis = Redis.from_url(
+        settings.redis_url,
+        socket_timeout=settings.redis_socket_timeout_seconds,
+        socket_connect_timeout=settings.redis_socket_timeout_seconds,
+    )
+    return LookupCache(
+        local_max_entries=settings.lookup_cache_local_max_entries,
+        local_ttl_seconds=settings.lookup_cache_local_ttl_seconds,
+        redis=redis if settings.lookup_cache_redis else None,
+        redis_ttl_seconds=settings.lookup_cache_redis_ttl_seconds,
+        generation_redis=redis,
+        generation_check_seconds=settings.lookup_cache_generation_check_seconds,
+        breaker=CircuitBreaker(
+            failure_threshold=settings.redis_breaker_failure_threshold,
+            backoff_seconds=settings.redis_breaker_backoff_seconds,
+            max_backoff_seconds=settings.redis_breaker_max_backoff_seconds,
+        ),
+    )
+
+
+def audit_backend(settings: config.Settings) -> DatabaseAuditBackend | SegmentAuditBackend:
+    """
+    Build the audit storage backend selected by ``AUDIT_BACKEND``.
+    """
+
+    if settings.audit_backend == "database":
+        return DatabaseAuditBackend()
+    if settings.audit_backend == "segments":
+        return SegmentAuditBackend(
+            settings.audit_segment_dir,
+            partition_minutes=settings.audit_segment_partition_minutes,
+            compress_after_hours=settings.audit_segment_compress_after_hours,
+            retention_hours=settings.audit_segment_retention_hours,
+        )
+    raise ValueError(f"Unknown AUDIT_BACKEND {settings.audit_backend!r}")
 
 
 @lru_cache
 def get_audit_service() -> AuditService:
-    return AuditService()
+    settings = config.get_settings()
+    return AuditService(
+        write_behind=settings.audit_write_behind,
+        queue_max_size=settings.audit_queue_max_size,
+        flush_batch_size=settings.audit_flush_batch_size,
+        flush_interval_seconds=settings.audit_flush_interval_ms / 1_000,
+        backend=audit_backend(settings),
+    )
+
+
+@lru_cache
+def get_stats_service() -> StatsService:
+    settings = config.get_settings()
+    return StatsService(
+        relative_accuracy=settings.stats_sketch_relative_accuracy,
+        counter_stripes=settings.stats_counter_stripes,
+    )
+
+
+def _current_stats() -> dict[str, Any]:
+    with SessionLocal() as session:
+        return utils.calculate_stats(session)
+
+
+@lru_cache
+def get_stats_broadcaster() -> StatsBroadcaster:
+    settings = config.get_settings()
+    return StatsBroadcaster(
+        _current_stats, interval_seconds=settings.stats_stream_interval_seconds
+    )
+
+
+@lru_cache
+def get_queue_metrics() -> QueueMetrics:
+    settings = config.get_settings()
+    redis = Redis.from_url(
+        settings.redis_url,
+        socket_timeout=settings.redis_socket_timeout_seconds,
+        socket_connect_timeout=settings.redis_socket_timeout_seconds,
+    )
+    return QueueMetrics(redis, relative_accuracy=settings.stats_sketch_relative_accuracy)
+
+
+@lru_cache
+def get_admission_controller() -> AdmissionController:
+    settings = config.get_settings()
+    return AdmissionController(
+        max_concurrency=settings.admission_max_concurrency,
+        max_queue=settings.admission_max_queue,
+        max_wait_seconds=settings.admission_max_wait_ms / 1_000,
+        retry_after_seconds=settings.admission_retry_after_seconds,
+    )
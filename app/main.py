@@ -1,25 +1,106 @@
+from contextlib import asynccontextmanager
+from datetime import datetime
 from pathlib import Path
+from typing import Iterator, Literal, Optional
 
-from fastapi import FastAPI, Depends, HTTPException, status
-from fastapi.responses import HTMLResponse
+import orjson
+from fastapi import APIRouter, FastAPI, Depends, Header, HTTPException, Query, Request, status
+from fastapi.responses import HTMLResponse, ORJSONResponse, Response, StreamingResponse
 from fastapi.staticfiles import StaticFiles
 from fastapi.middleware.cors import CORSMiddleware
+from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
+from redis.exceptions import RedisError
+from sqlalchemy import insert
+from sqlalchemy.exc import IntegrityError, OperationalError
 from sqlalchemy.orm import Session
 
-from app import schemas, models, utils
-from app.database import Base, engine, get_db, SessionLocal
-from app.dependencies import get_audit_service, get_scoring_service
-from app.services import AuditService, ScoringService
+from app import async_routes, metrics, schemas, models, utils
+from app.core import config
+from app.core.constants import (
+    APPROVED,
+    DEFAULT_PAGE_SIZE,
+    IDEMPOTENCY_KEY_HEADER,
+    MAX_PAGE_SIZE,
+)
+from app.database import (
+    get_db,
+    get_shard_router,
+    SessionLocal,
+    ShardRouter,
+    use_shard,
+)
+from app.dependencies import (
+    get_admission_controller,
+    get_async_feature_cache,
+    get_audit_service,
+    get_feature_cache,
+    get_idempotency_store,
+    get_lookup_cache,
+    get_queue_metrics,
+    get_scoring_service,
+    get_stats_broadcaster,
+    get_stats_service,
+)
+from app.services import (
+    AdmissionController,
+    AdmissionMiddleware,
+    AuditService,
+    EXPORT_FORMATS,
+    ExportUnavailable,
+    IdempotencyConflict,
+    IdempotencyStore,
+    LookupCache,
+    QueueMetrics,
+    ScoringService,
+    StatsBroadcaster,
+    StatsService,
+    export_audits,
+    export_transactions,
+    get_feature_table,
+    reset_all,
+)
+from app.services.idempotency import fingerprint
+from app.services.lookup_cache import AUDIT, TRANSACTION
 
 
-Base.metadata.create_all(bind=engine)
+@asynccontextmanager
+async def lifespan(_: FastAPI):
+    # Nothing touches the database or Redis at import; startup work lives here.
+    settings = config.get_settings()
+    router = get_shard_router()
+    if settings.create_schema_on_startup:
+        models.create_schema(router.engines())
+    # Build the synthetic feature table before the first request needs it.
+    get_feature_table().build()
+    # Let retries of keys stored before a restart skip straight to the lookup.
+    warm_keys = -(-settings.idempotency_warm_keys // len(router))
+    router.scatter(lambda session: get_idempotency_store().warm(session, warm_keys))
+    yield
+    # Flush write-behind audits before the process exits.
+    get_audit_service().close()
+    if config.get_settings().async_request_path:
+        await get_async_feature_cache().close()
+        await router.dispose_async()
+
 
 app = FastAPI(
     title="Payment Transaction Simulator",
     description="Simulates a card-network payment authorization workflow.",
     version="0.1.0",
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse,
 )
 
+@app.exception_handler(IdempotencyConflict)
+async def idempotency_conflict_handler(_: Request, exc: IdempotencyConflict) -> ORJSONResponse:
+    return ORJSONResponse(
+        {"detail": f"{IDEMPOTENCY_KEY_HEADER} was already used for a different payment."},
+        status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+    )
+
+
+# Added before CORS so that shed (503) responses still carry CORS headers.
+app.add_middleware(AdmissionMiddleware, controller=get_admission_controller)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=[
@@ -33,6 +114,31 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+def _active_pools() -> dict:
+    return get_shard_router().pools(use_async=config.get_settings().async_request_path)
+
+
+def _active_cache_stats() -> dict:
+    if config.get_settings().async_request_path:
+        return get_async_feature_cache().stats()
+    return get_feature_cache().stats()
+
+
+metrics.REGISTRY.register(
+    metrics.RuntimeCollector(
+        pools=_active_pools,
+        cache_stats=_active_cache_stats,
+        audit_stats=lambda: get_audit_service().queue_stats(),
+        idempotency_stats=lambda: get_idempotency_store().stats(),
+        lookup_stats=lambda: get_lookup_cache().stats(),
+        admission_stats=lambda: get_admission_controller().stats(),
+    )
+)
+
+# Authorization hot path. `ASYNC_REQUEST_PATH=true` swaps these handlers for the
+# asyncio twins in `app.async_routes` so both stacks can be benchmarked.
+sync_router = APIRouter()
+
 FRONTEND_BUILD_DIR = Path(__file__).resolve().parent.parent / "frontend-app" / "dist"
 
 if FRONTEND_BUILD_DIR.exists():
@@ -82,7 +188,125 @@ def healthcheck() -> dict[str, str]:
     return {"status": "ok"}
 
 
+@app.get(
+    "/admin/audit-queue",
+    response_model=schemas.AuditQueueStats,
+    summary="Inspect the write-behind audit pipeline",
+    tags=["Monitoring"],
+)
+def read_audit_queue(
+    audit_service: AuditService = Depends(get_audit_service),
+) -> schemas.AuditQueueStats:
+    return schemas.AuditQueueStats(
+        write_behind=audit_service.write_behind,
+        **audit_service.queue_stats(),
+    )
+
+
+@app.get(
+    "/admin/cache",
+    response_model=schemas.FeatureCacheStats,
+    summary="Inspect the two-tier feature cache",
+    tags=["Monitoring"],
+)
+def read_cache_stats() -> schemas.FeatureCacheStats:
+    return schemas.FeatureCacheStats(**_active_cache_stats())
+
+
+@app.get(
+    "/admin/lookup-cache",
+    response_model=schemas.LookupCacheStats,
+    summary="Inspect the transaction and audit lookup cache",
+    tags=["Monitoring"],
+)
+def read_lookup_cache_stats(
+    lookup_cache: LookupCache = Depends(get_lookup_cache),
+) -> schemas.LookupCacheStats:
+    return schemas.LookupCacheStats(**lookup_cache.stats())
+
+
+@app.get(
+    "/admin/admission",
+    response_model=schemas.AdmissionStats,
+    summary="Inspect /payment admission control and load shedding",
+    tags=["Monitoring"],
+)
+def read_admission_stats(
+    admission: AdmissionController = Depends(get_admission_controller),
+) -> schemas.AdmissionStats:
+    return schemas.AdmissionStats(**admission.stats())
+
+
+@app.get(
+    "/admin/rules",
+    response_model=schemas.RuleSetInfo,
+    summary="Inspect the active authorization rule set",
+    tags=["Monitoring"],
+)
+def read_rules(
+    scoring_service: ScoringService = Depends(get_scoring_service),
+) -> schemas.RuleSetInfo:
+    return schemas.RuleSetInfo(**scoring_service.rules.info())
+
+
 @app.post(
+    "/admin/rules/reload",
+    response_model=schemas.RuleSetInfo,
+    summary="Re-read the rule file now",
+    tags=["Monitoring"],
+)
+def reload_rules(
+    scoring_service: ScoringService = Depends(get_scoring_service),
+) -> schemas.RuleSetInfo:
+    """
+    Force a reload instead of waiting for the next change check. A rule file
+    that fails to load is rejected with 422 and the previous rules stay active.
+    """
+    engine = scoring_service.rules
+    if engine.path is None:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="No RULES_PATH configured; the built-in heuristic is active.",
+        )
+    engine.reload(force=True)
+    if engine.last_error:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=engine.last_error,
+        )
+    return schemas.RuleSetInfo(**engine.info())
+
+
+@app.get(
+    "/admin/worker-queues",
+    response_model=list[schemas.WorkerQueueStats],
+    summary="Inspect background worker throughput and latency per queue",
+    tags=["Monitoring"],
+)
+def read_worker_queues(
+    queue_metrics: QueueMetrics = Depends(get_queue_metrics),
+) -> list[schemas.WorkerQueueStats]:
+    settings = config.get_settings()
+    configured = [name.strip() for name in settings.worker_queues.split(",") if name.strip()]
+    try:
+        names = sorted(set(configured) | set(queue_metrics.queues()))
+        return [schemas.WorkerQueueStats(**row) for row in queue_metrics.snapshot(names)]
+    except RedisError as exc:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Redis is unavailable; worker metrics cannot be read.",
+        ) from exc
+
+
+@app.get("/metrics", summary="Prometheus metrics", tags=["Monitoring"])
+def read_metrics() -> Response:
+    """
+    Per-stage hot-path histograms plus pool, cache and audit-queue gauges.
+    """
+    return Response(generate_latest(metrics.REGISTRY), media_type=CONTENT_TYPE_LATEST)
+
+
+@sync_router.post(
     "/payment",
     response_model=schemas.PaymentResponse,
     status_code=status.HTTP_201_CREATED,
@@ -93,55 +317,220 @@ def create_payment(
     db: Session = Depends(get_db),
     scoring_service: ScoringService = Depends(get_scoring_service),
     audit_service: AuditService = Depends(get_audit_service),
-) -> schemas.PaymentResponse:
+    stats_service: StatsService = Depends(get_stats_service),
+    idempotency_store: IdempotencyStore = Depends(get_idempotency_store),
+    lookup_cache: LookupCache = Depends(get_lookup_cache),
+    shard_router: ShardRouter = Depends(get_shard_router),
+    idempotency_key: Optional[str] = Header(
+        default=None, alias=IDEMPOTENCY_KEY_HEADER, min_length=1, max_length=255
+    ),
+) -> ORJSONResponse:
     """
     Accept a payment request, perform fraud checks, persist, and return the result.
+
+    A repeated ``Idempotency-Key`` returns the stored response of the first
+    request without scoring or writing anything again.
     """
-    decision = scoring_service.evaluate(payload)
-    transaction = models.Transaction.from_payment(
-        payload=payload,
-        status=decision.status,
-        risk_flag=decision.reason,
-    )
-    db.add(transaction)
-    db.commit()
-    db.refresh(transaction)
-    audit_service.record(
-        db,
-        schemas.DecisionAuditCreate(
-            transaction_id=transaction.id,
-            request_payload=payload.model_dump(),
-            decision_payload=decision,
-        ),
-    )
-    return schemas.PaymentResponse(
-        transaction_id=transaction.id,
-        status=transaction.status,
-        decision_reason=decision.reason,
-        score=decision.score,
-        latency_ms=decision.latency_ms,
-        features=decision.features,
+    with metrics.handler():
+        request_payload = payload.model_dump()
+        # Everything this payment writes lives on its card's shard.
+        shard = shard_router.shard_for_card(payload.card_number)
+        use_shard(db, shard)
+        if idempotency_key is not None:
+            request_fingerprint = fingerprint(request_payload)
+            with metrics.stage("idempotency_check"):
+                stored = idempotency_store.lookup(db, idempotency_key, request_fingerprint)
+            if stored is not None:
+                return utils.replay_response(stored)
+        decision = scoring_service.evaluate(payload)
+        with metrics.stage("transaction_commit"):
+            transaction = models.Transaction.from_payment(
+                payload=payload,
+                status=decision.status,
+                risk_flag=decision.reason,
+                shard=shard,
+            )
+            db.add(transaction)
+            stats_service.record(
+                db,
+                status=decision.status,
+                amount=payload.amount,
+                latency_ms=decision.latency_ms,
+            )
+            # The id is assigned client-side, so no refresh is needed after commit.
+            transaction_id = transaction.id
+            transaction_body = schemas.TransactionResponse.payload(transaction)
+            response = schemas.PaymentResponse.payload(transaction_id, decision)
+            if idempotency_key is not None:
+                db.add(
+                    idempotency_store.row(
+                        idempotency_key, request_fingerprint, transaction_id, response
+                    )
+                )
+            try:
+                db.commit()
+            except IntegrityError:
+                # Another request stored this key first; answer with its result.
+                db.rollback()
+                stored = None
+                if idempotency_key is not None:
+                    stored = idempotency_store.confirm(db, idempotency_key, request_fingerprint)
+                if stored is None:
+                    raise
+                return utils.replay_response(stored)
+        if idempotency_key is not None:
+            idempotency_store.remember(idempotency_key, request_fingerprint, response)
+        lookup_cache.put(TRANSACTION, transaction_id, transaction_body)
+        with metrics.stage("audit_write"):
+            audit = audit_service.record(
+                db,
+                schemas.DecisionAuditCreate.model_construct(
+                    transaction_id=transaction_id,
+                    request_payload=request_payload,
+                    decision_payload=decision,
+                ),
+            )
+            # A write-behind audit is cached once `/audit/{id}` reads it back, so a
+            # dropped or failed flush never leaves a phantom audit in the cache.
+            if not audit_service.write_behind:
+                body = [schemas.DecisionAuditResponse.payload(audit)]
+                lookup_cache.put(AUDIT, transaction_id, body)
+        with metrics.stage("response_build"):
+            return ORJSONResponse(response, status_code=status.HTTP_201_CREATED)
+
+
+@app.post(
+    "/payments/batch",
+    response_model=schemas.BatchPaymentResponse,
+    status_code=status.HTTP_201_CREATED,
+    summary="Submit a batch of simulated payment requests",
+)
+def create_payment_batch(
+    payload: schemas.BatchPaymentRequest,
+    db: Session = Depends(get_db),
+    scoring_service: ScoringService = Depends(get_scoring_service),
+    audit_service: AuditService = Depends(get_audit_service),
+    stats_service: StatsService = Depends(get_stats_service),
+    shard_router: ShardRouter = Depends(get_shard_router),
+) -> ORJSONResponse:
+    """
+    Score many payments at once and persist them with a single bulk insert and
+    commit per shard.
+    """
+    payments = payload.payments
+    decisions = scoring_service.evaluate_many(payments)
+    shards = [shard_router.shard_for_card(payment.card_number) for payment in payments]
+    rows = [
+        models.Transaction.row_from_payment(
+            payload=payment,
+            status=decision.status,
+            risk_flag=decision.reason,
+            shard=shard,
+        )
+        for payment, decision, shard in zip(payments, decisions, shards)
+    ]
+    for shard in sorted(set(shards)):
+        members = [index for index, row_shard in enumerate(shards) if row_shard == shard]
+        use_shard(db, shard)
+        db.execute(insert(models.Transaction), [rows[index] for index in members])
+        stats_service.record_many(
+            db,
+            (
+                (decisions[index].status, payments[index].amount, decisions[index].latency_ms)
+                for index in members
+            ),
+        )
+        audit_service.record_many(
+            db,
+            [
+                schemas.DecisionAuditCreate.model_construct(
+                    transaction_id=rows[index]["id"],
+                    request_payload=payments[index].model_dump(),
+                    decision_payload=decisions[index],
+                )
+                for index in members
+            ],
+        )
+    approved = sum(1 for decision in decisions if decision.status == APPROVED)
+    return ORJSONResponse(
+        {
+            "results": [
+                schemas.PaymentResponse.payload(row["id"], decision)
+                for row, decision in zip(rows, decisions)
+            ],
+            "approved": approved,
+            "declined": len(decisions) - approved,
+        },
+        status_code=status.HTTP_201_CREATED,
     )
 
 
-@app.get(
+@sync_router.get(
     "/transaction/{transaction_id}",
     response_model=schemas.TransactionResponse,
     summary="Retrieve a transaction by id",
 )
 def read_transaction(
-    transaction_id: str, db: Session = Depends(get_db)
-) -> schemas.TransactionResponse:
-    transaction = db.get(models.Transaction, transaction_id)
-    if transaction is None:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Transaction not found",
-        )
-    return schemas.TransactionResponse.from_orm(transaction)
+    transaction_id: str,
+    db: Session = Depends(get_db),
+    lookup_cache: LookupCache = Depends(get_lookup_cache),
+    shard_router: ShardRouter = Depends(get_shard_router),
+) -> ORJSONResponse:
+    # Ids are UUIDs; anything else cannot match a stored row.
+    transaction_id = models.parse_id(transaction_id)
+    body = lookup_cache.get(TRANSACTION, transaction_id) if transaction_id else None
+    if body is None:
+        transaction = None
+        for shard in shard_router.shards_for_id(transaction_id) if transaction_id else ():
+            use_shard(db, shard)
+            transaction = db.get(models.Transaction, transaction_id)
+            if transaction is not None:
+                break
+        if transaction is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Transaction not found",
+            )
+        body = schemas.TransactionResponse.payload(transaction)
+        lookup_cache.fill(TRANSACTION, transaction_id, body)
+    return ORJSONResponse(body)
 
 
 @app.get(
+    "/transactions",
+    response_model=schemas.TransactionPage,
+    summary="List transactions, newest first, with cursor pagination",
+)
+def list_transactions(
+    status_filter: Optional[str] = Query(None, alias="status", description="Approved or Declined"),
+    merchant: Optional[str] = Query(None, description="Exact merchant descriptor"),
+    card_last4: Optional[str] = Query(None, pattern=r"^\d{4}$"),
+    created_from: Optional[datetime] = Query(None, description="Inclusive lower bound"),
+    created_to: Optional[datetime] = Query(None, description="Exclusive upper bound"),
+    cursor: Optional[str] = Query(None, description="`next_cursor` from the previous page"),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    db: Session = Depends(get_db),
+) -> schemas.TransactionPage:
+    try:
+        rows, next_cursor = utils.list_transactions(
+            db,
+            limit=limit,
+            cursor=cursor,
+            status=status_filter,
+            merchant=merchant,
+            card_last4=card_last4,
+            created_from=utils.as_naive_utc(created_from),
+            created_to=utils.as_naive_utc(created_to),
+        )
+    except utils.InvalidCursor as exc:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc)) from exc
+    return schemas.TransactionPage(
+        items=[schemas.TransactionResponse.from_orm(row) for row in rows],
+        next_cursor=next_cursor,
+    )
+
+
+@sync_router.get(
     "/stats",
     response_model=schemas.StatsResponse,
     summary="Retrieve system processing statistics",
@@ -152,6 +541,36 @@ def read_stats(db: Session = Depends(get_db)) -> schemas.StatsResponse:
 
 
 @app.get(
+    "/stats/stream",
+    summary="Stream processing statistics as Server-Sent Events",
+    response_class=StreamingResponse,
+)
+async def stream_stats(
+    broadcaster: StatsBroadcaster = Depends(get_stats_broadcaster),
+) -> StreamingResponse:
+    """
+    Push `/stats` instead of polling it: a ``snapshot`` event with every field,
+    then a ``delta`` event with the fields that changed. Stats are computed once
+    per tick for all connected viewers.
+    """
+    heartbeat = config.get_settings().stats_stream_heartbeat_seconds
+
+    async def events():
+        async for event in broadcaster.subscribe(heartbeat_seconds=heartbeat):
+            if event is None:
+                yield b": keep-alive\n\n"
+            else:
+                name, data = event
+                yield b"event: %s\ndata: %s\n\n" % (name.encode(), orjson.dumps(data))
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@sync_router.get(
     "/audit/{transaction_id}",
     response_model=list[schemas.DecisionAuditResponse],
     summary="Retrieve audit logs for a transaction",
@@ -160,14 +579,103 @@ def read_audit_logs(
     transaction_id: str,
     db: Session = Depends(get_db),
     audit_service: AuditService = Depends(get_audit_service),
-) -> list[schemas.DecisionAuditResponse]:
-    audits = audit_service.fetch_by_transaction(db, transaction_id)
-    if not audits:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Audit logs not found for this transaction.",
+    lookup_cache: LookupCache = Depends(get_lookup_cache),
+    shard_router: ShardRouter = Depends(get_shard_router),
+) -> ORJSONResponse:
+    transaction_id = models.parse_id(transaction_id)
+    body = lookup_cache.get(AUDIT, transaction_id) if transaction_id else None
+    if body is None:
+        audits = []
+        for shard in shard_router.shards_for_id(transaction_id) if transaction_id else ():
+            use_shard(db, shard)
+            audits = audit_service.fetch_by_transaction(db, transaction_id)
+            if audits:
+                break
+        if not audits:
+            # Not cached: with write-behind the audit may still be on its way.
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Audit logs not found for this transaction.",
+            )
+        body = [schemas.DecisionAuditResponse.payload(audit) for audit in audits]
+        lookup_cache.fill(AUDIT, transaction_id, body)
+    return ORJSONResponse(body)
+
+
+ExportFormat = Literal["ndjson", "csv", "arrow", "parquet"]
+
+
+def _export_response(
+    kind: str, export_format: str, stream: Iterator[bytes]
+) -> StreamingResponse:
+    media_type, extension = EXPORT_FORMATS[export_format]
+    return StreamingResponse(
+        stream,
+        media_type=media_type,
+        headers={
+            "Content-Disposition": f'attachment; filename="{kind}.{extension}"',
+            "X-Accel-Buffering": "no",
+        },
+    )
+
+
+@app.get(
+    "/export/transactions",
+    summary="Stream every transaction in a time range as NDJSON, CSV, Arrow or Parquet",
+    response_class=StreamingResponse,
+)
+def export_transaction_rows(
+    export_format: ExportFormat = Query("ndjson", alias="format"),
+    created_from: Optional[datetime] = Query(None, description="Inclusive lower bound"),
+    created_to: Optional[datetime] = Query(None, description="Exclusive upper bound"),
+    shard_router: ShardRouter = Depends(get_shard_router),
+) -> StreamingResponse:
+    """
+    Oldest first, read through a server-side cursor and written a batch at a
+    time (`EXPORT_BATCH_SIZE`), so memory stays flat however many rows match.
+    Card numbers are exported as their last four digits only.
+    """
+    try:
+        stream = export_transactions(
+            shard_router,
+            export_format,
+            created_from=utils.as_naive_utc(created_from),
+            created_to=utils.as_naive_utc(created_to),
+            batch_size=config.get_settings().export_batch_size,
+        )
+    except ExportUnavailable as exc:
+        raise HTTPException(status_code=status.HTTP_501_NOT_IMPLEMENTED, detail=str(exc)) from exc
+    return _export_response("transactions", export_format, stream)
+
+
+@app.get(
+    "/export/audits",
+    summary="Stream every decision audit in a time range as NDJSON, CSV, Arrow or Parquet",
+    response_class=StreamingResponse,
+)
+def export_audit_rows(
+    export_format: ExportFormat = Query("ndjson", alias="format"),
+    created_from: Optional[datetime] = Query(None, description="Inclusive lower bound"),
+    created_to: Optional[datetime] = Query(None, description="Exclusive upper bound"),
+    shard_router: ShardRouter = Depends(get_shard_router),
+    audit_service: AuditService = Depends(get_audit_service),
+) -> StreamingResponse:
+    """
+    Audits in storage order, streamed like `/export/transactions`. Request and
+    decision payloads are nested JSON in NDJSON and JSON text in the other formats.
+    """
+    try:
+        stream = export_audits(
+            shard_router,
+            audit_service,
+            export_format,
+            created_from=utils.as_naive_utc(created_from),
+            created_to=utils.as_naive_utc(created_to),
+            batch_size=config.get_settings().export_batch_size,
         )
-    return audit_service.to_schema(audits)
+    except ExportUnavailable as exc:
+        raise HTTPException(status_code=status.HTTP_501_NOT_IMPLEMENTED, detail=str(exc)) from exc
+    return _export_response("audits", export_format, stream)
 
 
 @app.delete(
@@ -175,14 +683,40 @@ def read_audit_logs(
     response_model=schemas.StatsResponse,
     summary="Delete all transactions and reset metrics",
 )
-def reset_transactions() -> schemas.StatsResponse:
+def reset_transactions(
+    audit_service: AuditService = Depends(get_audit_service),
+    scoring_service: ScoringService = Depends(get_scoring_service),
+    idempotency_store: IdempotencyStore = Depends(get_idempotency_store),
+    lookup_cache: LookupCache = Depends(get_lookup_cache),
+    shard_router: ShardRouter = Depends(get_shard_router),
+) -> schemas.StatsResponse:
     """
     Clear all persisted transactions. Intended for demo reset or test automation.
+
+    Tables are truncated (Postgres) or dropped and recreated (SQLite) together
+    with the stats counters instead of being deleted row by row, on every
+    shard; velocity counters, idempotency keys and cached lookups are cleared too.
     """
-    with SessionLocal() as session:
-        session.query(models.DecisionAudit).delete()
-        session.query(models.Transaction).delete()
-        session.commit()
+    try:
+        reset_all(
+            shard_router.engines(),
+            audit_service,
+            lock_timeout_ms=config.get_settings().reset_lock_timeout_ms,
+        )
+    except OperationalError as exc:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Reset could not acquire table locks; retry shortly.",
+        ) from exc
+    if scoring_service.velocity is not None:
+        scoring_service.velocity.reset()
+    idempotency_store.reset()
+    lookup_cache.clear()
     with SessionLocal() as session:
         metrics = utils.calculate_stats(session)
     return schemas.StatsResponse(**metrics)
+
+
+app.include_router(
+    async_routes.router if config.get_settings().async_request_path else sync_router
+)
@@ -0,0 +1,282 @@
+"""
+Prometheus instrumentation for the authorization hot path.
+
+`stage()` times one step of `/payment` into ``payment_stage_seconds{stage=...}``;
+`RuntimeCollector` reports connection-pool, feature-cache, audit-queue,
+idempotency, lookup-cache and admission-control state at scrape time.
+Everything lives on a dedicated registry served by `/metrics`.
+"""
+
+from __future__ import annotations
+
+import time
+from typing import Any, Callable, Iterator, Mapping, Optional
+
+from prometheus_client import CollectorRegistry, Histogram
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+from prometheus_client.registry import Collector
+
+REGISTRY = CollectorRegistry(auto_describe=True)
+
+# Stages of a single authorization, in execution order.
+STAGES = (
+    "idempotency_check",
+    "cache_lookup",
+    "feature_generation",
+    "cache_write",
+    "velocity",
+    "rules",
+    "score",
+    "transaction_commit",
+    "audit_write",
+    "response_build",
+)
+
+# Sub-millisecond resolution: most stages take microseconds.
+LATENCY_BUCKETS = (
+    0.00001,
+    0.000025,
+    0.00005,
+    0.0001,
+    0.00025,
+    0.0005,
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+)
+
+STAGE_SECONDS = Histogram(
+    "payment_stage_seconds",
+    "Time spent in each stage of a /payment authorization.",
+    ["stage"],
+    buckets=LATENCY_BUCKETS,
+    registry=REGISTRY,
+)
+HANDLER_SECONDS = Histogram(
+    "payment_handler_seconds",
+    "End-to-end time of the /payment handler, from scoring to the rendered response.",
+    buckets=LATENCY_BUCKETS,
+    registry=REGISTRY,
+)
+
+ADMISSION_QUEUE_SECONDS = Histogram(
+    "payment_admission_queue_seconds",
+    "Time an admitted /payment waited for a processing slot.",
+    buckets=LATENCY_BUCKETS,
+    registry=REGISTRY,
+)
+
+_stage_histograms = {name: STAGE_SECONDS.labels(stage=name) for name in STAGES}
+
+
+class StageTimer:
+    """
+    Context manager that observes the elapsed time of its block.
+    """
+
+    __slots__ = ("_histogram", "_started")
+
+    def __init__(self, histogram: Any) -> None:
+        self._histogram = histogram
+        self._started = 0.0
+
+    def __enter__(self) -> "StageTimer":
+        self._started = time.perf_counter()
+        return self
+
+    def __exit__(self, *_: object) -> None:
+        self._histogram.observe(time.perf_counter() - self._started)
+
+
+def stage(name: str) -> StageTimer:
+    histogram = _stage_histograms.get(name)
+    if histogram is None:
+        histogram = _stage_histograms.setdefault(name, STAGE_SECONDS.labels(stage=name))
+    return StageTimer(histogram)
+
+
+def handler() -> StageTimer:
+    return StageTimer(HANDLER_SECONDS)
+
+
+class RuntimeCollector(Collector):
+    """
+    Scrape-time gauges for the DB pool, feature cache and audit queue.
+
+    Sources are callables so the collector always reads the live objects
+    (for example whichever engine the active request path uses).
+    """
+
+    POOL_METHODS = {
+        "size": "size",
+        "checked_out": "checkedout",
+        "checked_in": "checkedin",
+        "overflow": "overflow",
+    }
+    CACHE_EVENTS = ("local_hits", "redis_hits", "misses", "evictions", "expirations")
+    AUDIT_EVENTS = ("enqueued", "flushed", "dropped", "flush_errors")
+    IDEMPOTENCY_EVENTS = (
+        "bloom_negatives",
+        "local_hits",
+        "redis_hits",
+        "database_hits",
+        "conflicts",
+    )
+    LOOKUP_EVENTS = ("local_hits", "redis_hits", "misses", "evictions")
+    SHED_REASONS = ("queue_full", "deadline", "timeout")
+
+    def __init__(
+        self,
+        *,
+        pools: Callable[[], Mapping[int, Any]],
+        cache_stats: Callable[[], dict[str, Any]],
+        audit_stats: Callable[[], dict[str, Any]],
+        idempotency_stats: Optional[Callable[[], dict[str, Any]]] = None,
+        lookup_stats: Optional[Callable[[], dict[str, Any]]] = None,
+        admission_stats: Optional[Callable[[], dict[str, Any]]] = None,
+    ) -> None:
+        self.pools = pools
+        self.cache_stats = cache_stats
+        self.audit_stats = audit_stats
+        self.idempotency_stats = idempotency_stats
+        self.lookup_stats = lookup_stats
+        self.admission_stats = admission_stats
+
+    def describe(self) -> list:
+        # Metric values come from live objects; nothing to describe up front.
+        return []
+
+    def collect(self) -> Iterator[Any]:
+        yield from self._collect_pool()
+        yield from self._collect_cache()
+        yield from self._collect_audit()
+        if self.idempotency_stats is not None:
+            yield from self._collect_idempotency()
+        if self.lookup_stats is not None:
+            yield from self._collect_lookup()
+        if self.admission_stats is not None:
+            yield from self._collect_admission()
+
+    def _collect_pool(self) -> Iterator[Any]:
+        gauge = GaugeMetricFamily(
+            "db_pool_connections",
+            "Database connection pool state per shard.",
+            labels=["shard", "state"],
+        )
+        for shard, pool in sorted(self.pools().items()):
+            for state, method in self.POOL_METHODS.items():
+                reader = getattr(pool, method, None)
+                if callable(reader):
+                    gauge.add_metric([str(shard), state], reader())
+        yield gauge
+
+    def _collect_cache(self) -> Iterator[Any]:
+        stats = self.cache_stats()
+        events = CounterMetricFamily(
+            "feature_cache_events",
+            "Feature cache lookups and housekeeping events.",
+            labels=["event"],
+        )
+        for event in self.CACHE_EVENTS:
+            events.add_metric([event], stats[event])
+        yield events
+        yield GaugeMetricFamily(
+            "feature_cache_local_entries",
+            "Entries held in the in-process feature LRU.",
+            value=stats["local_entries"],
+        )
+        yield CounterMetricFamily(
+            "feature_cache_redis_failures",
+            "Redis errors seen by the circuit breaker since startup.",
+            value=stats["redis_failures"],
+        )
+        breaker = GaugeMetricFamily(
+            "feature_cache_redis_breaker_state",
+            "Redis circuit breaker state (1 for the current state).",
+            labels=["state"],
+        )
+        for state in ("closed", "open", "half_open"):
+            breaker.add_metric([state], 1 if stats["redis_state"] == state else 0)
+        yield breaker
+
+    def _collect_audit(self) -> Iterator[Any]:
+        stats = self.audit_stats()
+        yield GaugeMetricFamily(
+            "audit_queue_depth",
+            "Audits waiting in the write-behind queue.",
+            value=stats["queue_depth"],
+        )
+        events = CounterMetricFamily(
+            "audit_queue_events",
+            "Write-behind audit pipeline events.",
+            labels=["event"],
+        )
+        for event in self.AUDIT_EVENTS:
+            events.add_metric([event], stats[event])
+        yield events
+
+    def _collect_idempotency(self) -> Iterator[Any]:
+        stats = self.idempotency_stats()
+        events = CounterMetricFamily(
+            "idempotency_events",
+            "Idempotency-Key checks by the tier that answered them.",
+            labels=["event"],
+        )
+        for event in self.IDEMPOTENCY_EVENTS:
+            events.add_metric([event], stats[event])
+        yield events
+        yield GaugeMetricFamily(
+            "idempotency_bloom_keys",
+            "Keys added to the local Bloom filter.",
+            value=stats["bloom_keys"],
+        )
+
+    def _collect_lookup(self) -> Iterator[Any]:
+        stats = self.lookup_stats()
+        events = CounterMetricFamily(
+            "lookup_cache_events",
+            "Transaction and audit lookups by the tier that answered them.",
+            labels=["event"],
+        )
+        for event in self.LOOKUP_EVENTS:
+            events.add_metric([event], stats[event])
+        yield events
+        yield GaugeMetricFamily(
+            "lookup_cache_local_entries",
+            "Response bodies held in the in-process lookup LRU.",
+            value=stats["local_entries"],
+        )
+
+    def _collect_admission(self) -> Iterator[Any]:
+        stats = self.admission_stats()
+        yield CounterMetricFamily(
+            "payment_admitted",
+            "/payment requests let through admission control.",
+            value=stats["admitted"],
+        )
+        shed = CounterMetricFamily(
+            "payment_shed",
+            "/payment requests rejected with 503 by admission control.",
+            labels=["reason"],
+        )
+        for reason in self.SHED_REASONS:
+            shed.add_metric([reason], stats[f"shed_{reason}"])
+        yield shed
+        yield GaugeMetricFamily(
+            "payment_in_flight",
+            "/payment requests holding a processing slot.",
+            value=stats["in_flight"],
+        )
+        yield GaugeMetricFamily(
+            "payment_admission_queued",
+            "/payment requests waiting for a processing slot.",
+            value=stats["queued"],
+        )
@@ -1,19 +1,129 @@
+import os
+import threading
+import time
 import uuid
 from datetime import datetime
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Any, Optional, Sequence
 
-from sqlalchemy import Column, DateTime, Float, JSON, String
+from sqlalchemy import (
+    Column,
+    DateTime,
+    Float,
+    Index,
+    Integer,
+    JSON,
+    LargeBinary,
+    String,
+    TypeDecorator,
+    func,
+    inspect,
+    literal_column,
+    text,
+)
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.hybrid import hybrid_property
+from sqlalchemy.schema import CreateIndex
 
+from app.core.constants import ID_SHARD_SHIFT
 from app.database import Base
 
 if TYPE_CHECKING:  # pragma: no cover - typing helper
     from app.schemas import PaymentRequest
 
 
+_uuid7_lock = threading.Lock()
+_uuid7_last_ms = 0
+_uuid7_sequence = 0
+
+
+def uuid7(shard: int = 0) -> uuid.UUID:
+    """
+    RFC 9562 version 7 UUID: 48-bit Unix milliseconds, a 12-bit per-millisecond
+    sequence (monotonic within this process) and 62 random bits, the top
+    ``ID_SHARD_BITS`` of which hold ``shard``.
+    """
+
+    global _uuid7_last_ms, _uuid7_sequence
+    with _uuid7_lock:
+        now_ms = time.time_ns() // 1_000_000
+        if now_ms > _uuid7_last_ms:
+            _uuid7_last_ms, _uuid7_sequence = now_ms, 0
+        else:
+            _uuid7_sequence += 1
+            if _uuid7_sequence > 0xFFF:
+                # Sequence exhausted (or clock went back): borrow the next millisecond.
+                _uuid7_last_ms, _uuid7_sequence = _uuid7_last_ms + 1, 0
+        timestamp, sequence = _uuid7_last_ms, _uuid7_sequence
+    random_bits = int.from_bytes(os.urandom(8), "big") & ((1 << ID_SHARD_SHIFT) - 1)
+    value = (
+        (timestamp & ((1 << 48) - 1)) << 80
+        | 0x7 << 76
+        | sequence << 64
+        | 0b10 << 62
+        | shard << ID_SHARD_SHIFT
+        | random_bits
+    )
+    return uuid.UUID(int=value)
+
+
+def new_id(shard: int = 0) -> str:
+    """
+    Generate a primary key client-side so bulk inserts know ids up front.
+
+    Ids are time-ordered, so new rows land at the right edge of the primary-key
+    and ``(created_at, id)`` indexes instead of at random leaf pages. Transaction
+    ids also name the ``shard`` they are stored on (`ShardRouter.shard_for_id`).
+    """
+
+    return str(uuid7(shard))
+
+
+def parse_id(value: str) -> Optional[str]:
+    """
+    Canonical form of a client-supplied id, or None if it is not a UUID.
+    """
+
+    try:
+        return str(uuid.UUID(value))
+    except (AttributeError, TypeError, ValueError):
+        return None
+
+
+class CompactUUID(TypeDecorator):
+    """
+    UUID column stored natively on Postgres and as 16 raw bytes elsewhere.
+
+    Python code always sees the canonical 36-character string.
+    """
+
+    impl = LargeBinary(16)
+    cache_ok = True
+
+    def load_dialect_impl(self, dialect: Any) -> Any:
+        if dialect.name == "postgresql":
+            return dialect.type_descriptor(postgresql.UUID(as_uuid=False))
+        return dialect.type_descriptor(LargeBinary(16))
+
+    def process_bind_param(self, value: Any, dialect: Any) -> Any:
+        if value is None:
+            return None
+        if dialect.name == "postgresql":
+            return str(value)
+        return uuid.UUID(str(value)).bytes
+
+    def process_result_value(self, value: Any, dialect: Any) -> Optional[str]:
+        if value is None or isinstance(value, str):
+            return value
+        if isinstance(value, uuid.UUID):
+            return str(value)
+        return str(uuid.UUID(bytes=bytes(value)))
+
+
 class Transaction(Base):
     __tablename__ = "transactions"
 
-    id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
+    id = Column(CompactUUID, primary_key=True, default=new_id)
     card_number = Column(String, nullable=False)
     amount = Column(Float, nullable=False)
     currency = Column(String(3), nullable=False, default="GBP")
@@ -24,11 +134,27 @@ class Transaction(Base):
     risk_flag = Column(String, nullable=True)
     created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
 
+    @hybrid_property
+    def card_last4(self) -> str:
+        return self.card_number[-4:]
+
+    @card_last4.expression
+    def card_last4(cls):
+        # Portable across SQLite and Postgres; must match the expression index below,
+        # so the 3 is rendered inline rather than as a bind parameter.
+        return func.substr(cls.card_number, func.length(cls.card_number) - literal_column("3"))
+
     @classmethod
     def from_payment(
-        cls, payload: "PaymentRequest", status: str, risk_flag: str | None = None
+        cls,
+        payload: "PaymentRequest",
+        status: str,
+        risk_flag: str | None = None,
+        shard: int = 0,
     ) -> "Transaction":
+        # Set up front (like the id) so the response can be cached before commit.
         return cls(
+            id=new_id(shard),
             card_number=payload.card_number,
             amount=payload.amount,
             currency=payload.currency,
@@ -37,15 +163,235 @@ class Transaction(Base):
             device_id=payload.device_id,
             status=status,
             risk_flag=risk_flag,
+            created_at=datetime.utcnow(),
         )
 
+    @classmethod
+    def row_from_payment(
+        cls,
+        payload: "PaymentRequest",
+        status: str,
+        risk_flag: str | None = None,
+        shard: int = 0,
+    ) -> dict[str, Any]:
+        """
+        Plain-dict counterpart of `from_payment` for bulk inserts.
+        """
+
+        return {
+            "id": new_id(shard),
+            "card_number": payload.card_number,
+            "amount": payload.amount,
+            "currency": payload.currency,
+            "merchant": payload.merchant,
+            "channel": payload.channel,
+            "device_id": payload.device_id,
+            "status": status,
+            "risk_flag": risk_flag,
+        }
+
+
+# Keyset pagination for `GET /transactions` walks (created_at, id) newest first,
+# optionally inside one status, merchant or card; each filter gets its own
+# composite index so a page is an index range scan at any depth.
+Index("ix_transactions_created_at_id", Transaction.created_at, Transaction.id)
+Index(
+    "ix_transactions_status_created_at_id",
+    Transaction.status,
+    Transaction.created_at,
+    Transaction.id,
+)
+Index(
+    "ix_transactions_merchant_created_at_id",
+    Transaction.merchant,
+    Transaction.created_at,
+    Transaction.id,
+)
+Index(
+    "ix_transactions_card_last4_created_at_id",
+    Transaction.card_last4,
+    Transaction.created_at,
+    Transaction.id,
+)
+
+
+def create_schema(engine: Engine | Sequence[Engine], *, backfill_indexes: bool = False) -> None:
+    """
+    Create missing tables (with their indexes) on one engine or every shard.
+
+    App startup with ``CREATE_SCHEMA_ON_STARTUP`` stops there; ``backfill_indexes``
+    (``scripts/init_db.py``) also builds indexes added to tables that already exist.
+    """
+
+    for shard_engine in [engine] if isinstance(engine, Engine) else engine:
+        Base.metadata.create_all(bind=shard_engine)
+        if backfill_indexes:
+            ensure_indexes(shard_engine)
+
+
+def ensure_indexes(engine: Engine) -> None:
+    """
+    Create indexes missing from tables that predate them.
+
+    ``create_all`` only creates indexes alongside new tables; on a large
+    existing table the first run builds each index once. ``IF NOT EXISTS``
+    (SQLite, Postgres) also covers expression indexes, which reflection skips.
+    Postgres builds them ``CONCURRENTLY``, outside a transaction, so writes
+    carry on during the build; an invalid index left by an interrupted build is
+    dropped and built again.
+    """
+
+    if engine.dialect.name != "postgresql":
+        with engine.begin() as connection:
+            for table in Base.metadata.sorted_tables:
+                for index in table.indexes:
+                    connection.execute(CreateIndex(index, if_not_exists=True))
+        return
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as connection:
+        for table in Base.metadata.sorted_tables:
+            for index in table.indexes:
+                invalid = connection.execute(
+                    text(
+                        "SELECT 1 FROM pg_index "
+                        "JOIN pg_class ON pg_class.oid = pg_index.indexrelid "
+                        "WHERE pg_class.relname = :name AND NOT pg_index.indisvalid"
+                    ),
+                    {"name": index.name},
+                ).first()
+                if invalid:
+                    connection.exec_driver_sql(f'DROP INDEX CONCURRENTLY "{index.name}"')
+                connection.exec_driver_sql(_create_index_concurrently(index, engine.dialect))
+
+
+def _create_index_concurrently(index: Index, dialect: Any) -> str:
+    ddl = str(CreateIndex(index, if_not_exists=True).compile(dialect=dialect))
+    return ddl.replace(" INDEX IF NOT EXISTS ", " INDEX CONCURRENTLY IF NOT EXISTS ", 1)
+
+
+def migrate_legacy_ids(engine: Engine, batch_size: int = 10_000) -> int:
+    """
+    Convert id columns created as text, before `CompactUUID`, to the stored form
+    the models bind; returns how many columns needed it.
+
+    Postgres rewrites each such column to ``uuid`` (``ALTER ... USING id::uuid``,
+    which locks the table while it runs). SQLite has no column types to change,
+    so text ids are rewritten as 16-byte blobs in batches.
+    """
+
+    existing = set(inspect(engine).get_table_names())
+    columns = [
+        (table.name, column.name)
+        for table in Base.metadata.sorted_tables
+        if table.name in existing
+        for column in table.columns
+        if isinstance(column.type, CompactUUID)
+    ]
+    migrated = 0
+    with engine.begin() as connection:
+        for table, column in columns:
+            if engine.dialect.name == "postgresql":
+                data_type = connection.execute(
+                    text(
+                        "SELECT data_type FROM information_schema.columns "
+                        "WHERE table_name = :table AND column_name = :column"
+                    ),
+                    {"table": table, "column": column},
+                ).scalar_one()
+                if data_type == "uuid":
+                    continue
+                connection.exec_driver_sql(
+                    f'ALTER TABLE "{table}" ALTER COLUMN "{column}" '
+                    f'TYPE uuid USING "{column}"::uuid'
+                )
+                migrated += 1
+            elif engine.dialect.name == "sqlite":
+                select_text = (
+                    f'SELECT rowid, "{column}" FROM "{table}" '
+                    f"WHERE typeof(\"{column}\") = 'text' LIMIT {int(batch_size)}"
+                )
+                found = False
+                while rows := connection.exec_driver_sql(select_text).all():
+                    found = True
+                    connection.exec_driver_sql(
+                        f'UPDATE "{table}" SET "{column}" = ? WHERE rowid = ?',
+                        [(uuid.UUID(value).bytes, rowid) for rowid, value in rows],
+                    )
+                migrated += found
+    return migrated
+
+
+def migrate_unstriped_buckets(engine: Engine) -> bool:
+    """
+    Recreate a ``latency_buckets`` table from before stripes existed (keyed by
+    bucket alone), keeping its counts on stripe 0; returns whether it had to.
+    """
+
+    if "latency_buckets" not in inspect(engine).get_table_names():
+        return False
+    columns = {column["name"] for column in inspect(engine).get_columns("latency_buckets")}
+    if "stripe" in columns:
+        return False
+    table = LatencyBucket.__table__
+    with engine.begin() as connection:
+        rows = connection.exec_driver_sql("SELECT bucket, count FROM latency_buckets").all()
+        table.drop(connection)
+        table.create(connection)
+        if rows:
+            connection.execute(
+                table.insert(),
+                [{"stripe": 0, "bucket": bucket, "count": count} for bucket, count in rows],
+            )
+    return True
+
 
 class DecisionAudit(Base):
     __tablename__ = "decision_audits"
 
-    id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
-    transaction_id = Column(String, nullable=False, index=True)
+    id = Column(CompactUUID, primary_key=True, default=new_id)
+    transaction_id = Column(CompactUUID, nullable=False, index=True)
     request_payload = Column(JSON, nullable=False)
     decision_payload = Column(JSON, nullable=False)
     latency_ms = Column(Float, nullable=False, default=0.0)
     created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+
+class IdempotencyKey(Base):
+    """
+    Stored response for a client ``Idempotency-Key``, written with its payment.
+    """
+
+    __tablename__ = "idempotency_keys"
+
+    key = Column(String(255), primary_key=True)
+    fingerprint = Column(String(32), nullable=False)
+    transaction_id = Column(CompactUUID, nullable=False)
+    response = Column(JSON, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False, index=True)
+
+
+class StatsCounter(Base):
+    """
+    Running totals behind `/stats`, maintained on every write. Writers add to one
+    of ``STATS_COUNTER_STRIPES`` rows (ids from 1) and reads sum them.
+    """
+
+    __tablename__ = "stats_counters"
+
+    id = Column(Integer, primary_key=True)
+    total = Column(Integer, nullable=False, default=0)
+    approved = Column(Integer, nullable=False, default=0)
+    declined = Column(Integer, nullable=False, default=0)
+    amount_sum = Column(Float, nullable=False, default=0.0)
+
+
+class LatencyBucket(Base):
+    """
+    One stripe of one logarithmic bucket of the mergeable scoring-latency
+    sketch; a bucket's count is the sum over its stripes.
+    """
+
+    __tablename__ = "latency_buckets"
+
+    stripe = Column(Integer, primary_key=True, default=0)
+    bucket = Column(Integer, primary_key=True)
+    count = Column(Integer, nullable=False, default=0)
@@ -5,6 +5,8 @@ from typing import Any, Optional, TYPE_CHECKING
 
 from pydantic import BaseModel, Field, validator
 
+from app.core.constants import MAX_BATCH_SIZE
+
 
 class PaymentRequest(BaseModel):
     card_number: str = Field(
@@ -37,10 +39,33 @@ class PaymentRequest(BaseModel):
         return value
 
 
+class VelocityFeatures(BaseModel):
+    """
+    Payment counts and amount sums per card and per device over sliding windows,
+    including the payment being scored.
+    """
+
+    card_count_1m: float
+    card_amount_1m: float
+    card_count_1h: float
+    card_amount_1h: float
+    card_count_24h: float
+    card_amount_24h: float
+    device_count_1m: float = 0.0
+    device_amount_1m: float = 0.0
+    device_count_1h: float = 0.0
+    device_amount_1h: float = 0.0
+    device_count_24h: float = 0.0
+    device_amount_24h: float = 0.0
+
+
 class TransactionFeatures(BaseModel):
     spending_velocity: float = Field(..., ge=0, le=1, description="Normalized velocity score.")
     device_trust_score: float = Field(..., ge=0, le=1, description="Device reputation score.")
     ip_risk_score: float = Field(..., ge=0, le=1, description="IP risk score.")
+    velocity: Optional[VelocityFeatures] = Field(
+        default=None, description="Sliding-window velocity counters, when tracking is enabled."
+    )
 
 
 class RiskDecision(BaseModel):
@@ -77,6 +102,39 @@ class PaymentResponse(BaseModel):
         description="Feature snapshot used during scoring.",
     )
 
+    @staticmethod
+    def payload(transaction_id: str, decision: RiskDecision) -> dict[str, Any]:
+        """
+        Response body for a trusted decision, built without re-validation.
+        """
+
+        return {
+            "transaction_id": transaction_id,
+            "status": decision.status,
+            "decision_reason": decision.reason,
+            "score": decision.score,
+            "latency_ms": decision.latency_ms,
+            "features": decision.features.model_dump(),
+        }
+
+
+class BatchPaymentRequest(BaseModel):
+    payments: list[PaymentRequest] = Field(
+        ...,
+        min_length=1,
+        max_length=MAX_BATCH_SIZE,
+        description="Payment requests to authorize in a single call.",
+    )
+
+
+class BatchPaymentResponse(BaseModel):
+    results: list[PaymentResponse] = Field(
+        ...,
+        description="Authorization results in the same order as the submitted payments.",
+    )
+    approved: int
+    declined: int
+
 
 class TransactionResponse(BaseModel):
     id: str
@@ -105,6 +163,33 @@ class TransactionResponse(BaseModel):
             created_at=transaction.created_at,
         )
 
+    @staticmethod
+    def payload(transaction: "TransactionProtocol") -> dict[str, Any]:
+        """
+        Response body for a stored transaction, built without validation.
+        """
+
+        return {
+            "id": transaction.id,
+            "card_last4": transaction.card_number[-4:],
+            "amount": transaction.amount,
+            "currency": transaction.currency,
+            "merchant": transaction.merchant,
+            "channel": transaction.channel,
+            "device_id": transaction.device_id,
+            "status": transaction.status,
+            "risk_flag": transaction.risk_flag,
+            "created_at": transaction.created_at,
+        }
+
+
+class TransactionPage(BaseModel):
+    items: list[TransactionResponse]
+    next_cursor: Optional[str] = Field(
+        None,
+        description="Pass as `cursor` to fetch the next page; null on the last page.",
+    )
+
 
 class StatsResponse(BaseModel):
     total: int
@@ -118,6 +203,82 @@ class StatsResponse(BaseModel):
     )
 
 
+class AuditQueueStats(BaseModel):
+    write_behind: bool = Field(..., description="Whether audits are written off the request path.")
+    queue_depth: int = Field(..., description="Audits waiting for the background flusher.")
+    enqueued: int
+    flushed: int
+    dropped: int = Field(..., description="Audits discarded because the queue was full.")
+    flush_errors: int = Field(..., description="Batches that failed to persist.")
+
+
+class FeatureCacheStats(BaseModel):
+    local_hits: int = Field(..., description="Lookups served by the in-process LRU tier.")
+    redis_hits: int = Field(..., description="Lookups served by Redis after an LRU miss.")
+    misses: int
+    evictions: int = Field(..., description="Entries pushed out of the LRU by its size bound.")
+    expirations: int = Field(..., description="Entries dropped from the LRU after their TTL.")
+    local_entries: int
+    redis_state: str = Field(..., description="Circuit breaker state: closed, open or half_open.")
+    redis_failures: int = Field(..., description="Redis errors seen since startup (not reset).")
+
+
+class LookupCacheStats(BaseModel):
+    local_hits: int = Field(..., description="Lookups served by the in-process LRU tier.")
+    redis_hits: int = Field(..., description="Lookups served by Redis after an LRU miss.")
+    misses: int = Field(..., description="Lookups that had to read the database.")
+    hit_rate: float
+    local_entries: int
+    evictions: int = Field(..., description="Entries pushed out of the LRU by its size bound.")
+    redis_enabled: bool
+    redis_state: str = Field(..., description="Circuit breaker state: closed, open or half_open.")
+
+
+class AdmissionStats(BaseModel):
+    enabled: bool
+    max_concurrency: int
+    max_queue: int
+    in_flight: int = Field(..., description="Payments holding a processing slot.")
+    queued: int = Field(..., description="Payments waiting for a slot.")
+    admitted: int
+    shed_queue_full: int = Field(..., description="Rejected because the wait queue was full.")
+    shed_deadline: int = Field(..., description="Rejected because the expected wait was too long.")
+    shed_timeout: int = Field(..., description="Rejected after waiting out their deadline.")
+    expected_wait_ms: float = Field(..., description="Expected wait for the next queued payment.")
+
+
+class RuleSetInfo(BaseModel):
+    source: Optional[str] = Field(
+        None, description="Rule file path, or 'settings' for the built-in heuristic."
+    )
+    version: Optional[str] = None
+    rules: int
+    dispatch_fields: list[str] = Field(
+        ..., description="Text fields whose values select the compiled rule chains."
+    )
+    loaded_at: datetime
+    reloads: int = Field(..., description="Rule files swapped in since startup.")
+    last_error: Optional[str] = Field(
+        None, description="Why the latest change to the rule file was rejected."
+    )
+
+
+class WorkerQueueStats(BaseModel):
+    queue: str
+    queued: int = Field(..., description="Jobs waiting in the RQ queue.")
+    jobs: int = Field(..., description="Jobs finished since the metrics were last reset.")
+    failed: int
+    items: int = Field(..., description="Cards/transactions processed by successful jobs.")
+    items_per_second: Optional[float] = Field(
+        None, description="Items over the span between the first and last finished job."
+    )
+    mean_wait_ms: Optional[float] = Field(None, description="Average enqueue-to-start delay.")
+    mean_run_ms: Optional[float] = None
+    run_ms_p50: Optional[float] = None
+    run_ms_p95: Optional[float] = None
+    run_ms_p99: Optional[float] = None
+
+
 class DecisionAuditCreate(BaseModel):
     transaction_id: str
     request_payload: dict[str, Any]
@@ -143,6 +304,21 @@ class DecisionAuditResponse(BaseModel):
             created_at=audit.created_at,
         )
 
+    @staticmethod
+    def payload(audit: "DecisionAuditProtocol") -> dict[str, Any]:
+        """
+        Response body for a stored audit, built without validation.
+        """
+
+        return {
+            "id": audit.id,
+            "transaction_id": audit.transaction_id,
+            "request_payload": audit.request_payload,
+            "decision_payload": audit.decision_payload,
+            "latency_ms": audit.latency_ms,
+            "created_at": audit.created_at,
+        }
+
 
 if TYPE_CHECKING:  # pragma: no cover - typing helper
     from typing import Protocol
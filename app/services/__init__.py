@@ -4,11 +4,59 @@ Service layer abstractions for scoring, audit logging, and feature caching.
 
 from .scoring import RiskDecision, ScoringService  # noqa: F401
 from .audit import AuditService  # noqa: F401
-from .cache import FeatureCache  # noqa: F401
+from .audit_store import DatabaseAuditBackend, SegmentAuditBackend  # noqa: F401
+from .cache import AsyncFeatureCache, CircuitBreaker, FeatureCache, LocalLRUCache  # noqa: F401
+from .features import FeatureTable, get_feature_table  # noqa: F401
+from .stats import LatencySketch, StatsService  # noqa: F401
+from .stats_stream import StatsBroadcaster  # noqa: F401
+from .lookup_cache import LookupCache  # noqa: F401
+from .queue_metrics import QueueMetrics  # noqa: F401
+from .reset import reset_all, truncate_tables  # noqa: F401
+from .rules import Condition, Rule, RuleEngine, RuleError, RuleSet  # noqa: F401
+from .velocity import InMemoryVelocity, RedisVelocity  # noqa: F401
+from .idempotency import BloomFilter, IdempotencyConflict, IdempotencyStore  # noqa: F401
+from .admission import AdmissionController, AdmissionMiddleware, Overloaded  # noqa: F401
+from .export import (  # noqa: F401
+    EXPORT_FORMATS,
+    ExportUnavailable,
+    export_audits,
+    export_transactions,
+)
 
 __all__ = [
     "RiskDecision",
     "ScoringService",
     "AuditService",
+    "DatabaseAuditBackend",
+    "SegmentAuditBackend",
     "FeatureCache",
+    "AsyncFeatureCache",
+    "CircuitBreaker",
+    "LocalLRUCache",
+    "FeatureTable",
+    "get_feature_table",
+    "LatencySketch",
+    "StatsService",
+    "StatsBroadcaster",
+    "LookupCache",
+    "QueueMetrics",
+    "reset_all",
+    "truncate_tables",
+    "Condition",
+    "Rule",
+    "RuleEngine",
+    "RuleError",
+    "RuleSet",
+    "InMemoryVelocity",
+    "RedisVelocity",
+    "BloomFilter",
+    "IdempotencyConflict",
+    "IdempotencyStore",
+    "AdmissionController",
+    "AdmissionMiddleware",
+    "Overloaded",
+    "EXPORT_FORMATS",
+    "ExportUnavailable",
+    "export_audits",
+    "export_transactions",
 ]
@@ -0,0 +1,215 @@
+"""
+Admission control and load shedding for `POST /payment`.
+
+At most ``max_concurrency`` payments are processed at once per process and up
+to ``max_queue`` more wait for a slot in arrival order. A payment is shed with
+``503`` and ``Retry-After`` instead of queueing when the queue is full, when
+the expected wait already exceeds its deadline, or when the deadline passes
+while it waits. The limit sits in front of the threadpool and the database
+pool, so under overload admitted payments keep their latency and the rest fail
+fast, rather than every caller slowing down until all of them time out.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import time
+from collections import deque
+from typing import Any, Callable, Optional
+
+from fastapi import status
+from fastapi.responses import ORJSONResponse
+
+from app import metrics
+from app.core.constants import REQUEST_TIMEOUT_HEADER
+
+SHED_REASONS = ("queue_full", "deadline", "timeout")
+
+
+class Overloaded(Exception):
+    """
+    Raised when a request is shed; ``reason`` is one of `SHED_REASONS`.
+    """
+
+    def __init__(self, reason: str, retry_after_seconds: int) -> None:
+        super().__init__(reason)
+        self.reason = reason
+        self.retry_after_seconds = retry_after_seconds
+
+
+class AdmissionController:
+    """
+    Concurrency limit with a bounded FIFO wait queue, for one event loop.
+    """
+
+    def __init__(
+        self,
+        *,
+        max_concurrency: int = 32,
+        max_queue: int = 128,
+        max_wait_seconds: float = 0.5,
+        retry_after_seconds: int = 1,
+        smoothing: float = 0.2,
+    ) -> None:
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.max_wait_seconds = max_wait_seconds
+        self.retry_after_seconds = retry_after_seconds
+        self.smoothing = smoothing
+        self.in_flight = 0
+        self.admitted = 0
+        self.shed = dict.fromkeys(SHED_REASONS, 0)
+        self._service_seconds: Optional[float] = None
+        self._waiters: deque[asyncio.Future] = deque()
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_concurrency > 0
+
+    @property
+    def queued(self) -> int:
+        return len(self._waiters)
+
+    def expected_wait(self) -> float:
+        """
+        Seconds a newly queued request should expect to wait for a slot.
+        """
+
+        if self._service_seconds is None:
+            return 0.0
+        return (len(self._waiters) + 1) / self.max_concurrency * self._service_seconds
+
+    async def acquire(self, deadline_seconds: Optional[float] = None) -> float:
+        """
+        Take a processing slot and return the seconds spent queued for it.
+
+        ``deadline_seconds`` (the caller's remaining budget) tightens
+        ``max_wait_seconds``. Raises `Overloaded` when the request is shed.
+        """
+
+        if self.in_flight < self.max_concurrency and not self._waiters:
+            self.in_flight += 1
+            self.admitted += 1
+            return 0.0
+        budget = self.max_wait_seconds
+        if deadline_seconds is not None:
+            budget = min(budget, deadline_seconds)
+        if len(self._waiters) >= self.max_queue:
+            self._shed("queue_full")
+        if self.expected_wait() > budget:
+            self._shed("deadline")
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        started = time.perf_counter()
+        try:
+            await asyncio.wait((waiter,), timeout=budget)
+        except asyncio.CancelledError:
+            self._abandon(waiter)
+            raise
+        if not waiter.done():
+            self._abandon(waiter)
+            self._shed("timeout")
+        self.admitted += 1
+        return time.perf_counter() - started
+
+    def release(self, service_seconds: Optional[float] = None) -> None:
+        """
+        Give the slot back, handing it straight to the oldest waiter if any.
+        """
+
+        if service_seconds is not None:
+            previous = self._service_seconds
+            self._service_seconds = (
+                service_seconds
+                if previous is None
+                else previous + self.smoothing * (service_seconds - previous)
+            )
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self.in_flight -= 1
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "max_concurrency": self.max_concurrency,
+            "max_queue": self.max_queue,
+            "in_flight": self.in_flight,
+            "queued": self.queued,
+            "admitted": self.admitted,
+            **{f"shed_{reason}": count for reason, count in self.shed.items()},
+            "expected_wait_ms": round(self.expected_wait() * 1_000, 3),
+        }
+
+    def _abandon(self, waiter: asyncio.Future) -> None:
+        if waiter.done() and not waiter.cancelled():
+            # The slot was handed over just before the waiter gave up.
+            self.release()
+            return
+        waiter.cancel()
+        try:
+            self._waiters.remove(waiter)
+        except ValueError:
+            pass
+
+    def _shed(self, reason: str) -> None:
+        self.shed[reason] += 1
+        raise Overloaded(reason, self.retry_after_seconds)
+
+
+class AdmissionMiddleware:
+    """
+    ASGI middleware applying an `AdmissionController` to the given routes.
+
+    ``controller`` is a factory, so settings are read on the first request.
+    """
+
+    def __init__(
+        self,
+        app: Any,
+        *,
+        controller: Callable[[], AdmissionController],
+        routes: frozenset[tuple[str, str]] = frozenset({("POST", "/payment")}),
+    ) -> None:
+        self.app = app
+        self.controller = controller
+        self.routes = routes
+
+    async def __call__(self, scope: dict, receive: Callable, send: Callable) -> None:
+        if scope["type"] != "http" or (scope["method"], scope["path"]) not in self.routes:
+            await self.app(scope, receive, send)
+            return
+        controller = self.controller()
+        if not controller.enabled:
+            await self.app(scope, receive, send)
+            return
+        try:
+            queued = await controller.acquire(_deadline_seconds(scope))
+        except Overloaded as exc:
+            response = ORJSONResponse(
+                {"detail": "Payment service is overloaded; retry shortly."},
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                headers={"Retry-After": str(exc.retry_after_seconds)},
+            )
+            await response(scope, receive, send)
+            return
+        metrics.ADMISSION_QUEUE_SECONDS.observe(queued)
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            controller.release(time.perf_counter() - started)
+
+
+def _deadline_seconds(scope: dict) -> Optional[float]:
+    header = REQUEST_TIMEOUT_HEADER.lower().encode()
+    for name, value in scope["headers"]:
+        if name == header:
+            try:
+                return max(float(value) / 1_000, 0.0)
+            except ValueError:
+                return None
+    return None
@@ -4,46 +4,318 @@ Audit logging helpers for transaction decisions.
 
 from __future__ import annotations
 
-from typing import Iterable, List
+import atexit
+import logging
+import queue
+import threading
+import time
+from datetime import datetime
+from typing import Any, Callable, Iterable, Iterator, List, Sequence
 
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
 from app import models, schemas
+from app.database import SessionLocal, get_shard_router, use_shard
+from app.services.audit_store import DatabaseAuditBackend, SegmentAuditBackend
+
+AuditBackend = DatabaseAuditBackend | SegmentAuditBackend
+
+logger = logging.getLogger(__name__)
 
 
 class AuditService:
     """
     Persists decision audits and exposes query helpers for FastAPI endpoints.
+
+    With ``write_behind`` enabled, audits are pushed onto a bounded in-process
+    queue and bulk-inserted by a background flusher, so the authorization path
+    no longer pays for the audit commit. Audits become visible once flushed.
+
+    Where audits live is up to ``backend``: the ``decision_audits`` table by
+    default, or append-only segment files (`SegmentAuditBackend`).
     """
 
+    def __init__(
+        self,
+        *,
+        write_behind: bool = False,
+        queue_max_size: int = 10_000,
+        flush_batch_size: int = 500,
+        flush_interval_seconds: float = 0.2,
+        session_factory: Callable[[], Session] | None = None,
+        backend: AuditBackend | None = None,
+    ) -> None:
+        self.write_behind = write_behind
+        self.backend = backend or DatabaseAuditBackend()
+        self.flush_batch_size = flush_batch_size
+        self.flush_interval_seconds = flush_interval_seconds
+        self._session_factory = session_factory
+        self._queue: queue.Queue[dict[str, Any]] = queue.Queue(maxsize=queue_max_size)
+        self._flusher: threading.Thread | None = None
+        self._lock = threading.Lock()
+        self._stopping = threading.Event()
+        self._enqueued = 0
+        self._flushed = 0
+        self._dropped = 0
+        self._flush_errors = 0
+
     def record(
         self,
         db: Session,
         payload: schemas.DecisionAuditCreate,
     ) -> models.DecisionAudit:
-        audit = models.DecisionAudit(
-            transaction_id=payload.transaction_id,
-            request_payload=payload.request_payload,
-            decision_payload=payload.decision_payload.model_dump(),
-            latency_ms=payload.decision_payload.latency_ms,
-        )
-        db.add(audit)
+        row = self._build_row(payload)
+        if self.write_behind:
+            self._enqueue([row])
+        elif self.backend.stores_in_database:
+            self.backend.write_many(db, [row])
+            db.commit()
+        else:
+            self.backend.write_many(db, [row])
+        return models.DecisionAudit(**row)
+
+    def record_many(
+        self,
+        db: Session,
+        payloads: Sequence[schemas.DecisionAuditCreate],
+    ) -> None:
+        """
+        Bulk-insert audits and commit them together with any pending writes.
+        """
+
+        rows = [self._build_row(payload) for payload in payloads]
+        if rows and not self.write_behind and self.backend.stores_in_database:
+            self.backend.write_many(db, rows)
         db.commit()
-        db.refresh(audit)
-        return audit
+        if rows and not self.write_behind and not self.backend.stores_in_database:
+            self.backend.write_many(db, rows)
+        if rows and self.write_behind:
+            self._enqueue(rows)
 
     def fetch_by_transaction(
         self,
         db: Session,
         transaction_id: str,
     ) -> List[models.DecisionAudit]:
-        return (
-            db.query(models.DecisionAudit)
-            .filter(models.DecisionAudit.transaction_id == transaction_id)
-            .order_by(models.DecisionAudit.created_at.desc())
-            .all()
+        return self.backend.fetch(db, transaction_id)
+
+    async def record_async(
+        self,
+        db: AsyncSession,
+        payload: schemas.DecisionAuditCreate,
+    ) -> models.DecisionAudit:
+        """
+        Asyncio variant of `record`; write-behind mode never touches ``db``.
+        """
+
+        row = self._build_row(payload)
+        if self.write_behind:
+            self._enqueue([row])
+            return models.DecisionAudit(**row)
+        if not self.backend.stores_in_database:
+            self.backend.write_many(None, [row])
+            return models.DecisionAudit(**row)
+
+        audit = models.DecisionAudit(**row)
+        db.add(audit)
+        await db.commit()
+        return audit
+
+    async def fetch_by_transaction_async(
+        self,
+        db: AsyncSession,
+        transaction_id: str,
+    ) -> List[models.DecisionAudit]:
+        return await self.backend.fetch_async(db, transaction_id)
+
+    def latencies(self, db: Session, chunk_size: int = 10_000) -> Iterator[float]:
+        """
+        Stream every stored audit latency (used to rebuild `/stats`).
+        """
+
+        return self.backend.latencies(db, chunk_size)
+
+    def scan(
+        self,
+        db: Session,
+        *,
+        created_from: datetime | None = None,
+        created_to: datetime | None = None,
+        chunk_size: int = 10_000,
+    ) -> Iterator[Any]:
+        """
+        Stream stored audits created in ``[created_from, created_to)`` for export.
+        """
+
+        return self.backend.scan(
+            db, created_from=created_from, created_to=created_to, chunk_size=chunk_size
         )
 
+    def reset(self, db: Session) -> None:
+        """
+        Delete every stored audit; database-backed deletes commit with ``db``.
+        """
+
+        self.flush()
+        self.backend.reset(db)
+
+    def maintain(self) -> dict[str, int]:
+        """
+        Seal, compress and expire audit segments (no-op for the database backend).
+        """
+
+        return self.backend.maintain()
+
     @staticmethod
     def to_schema(audits: Iterable[models.DecisionAudit]) -> list[schemas.DecisionAuditResponse]:
         return [schemas.DecisionAuditResponse.from_orm(audit) for audit in audits]
+
+    def queue_stats(self) -> dict[str, int]:
+        """
+        Counters for the write-behind pipeline (all zero when it is disabled).
+        """
+
+        with self._lock:
+            return {
+                "queue_depth": self._queue.qsize(),
+                "enqueued": self._enqueued,
+                "flushed": self._flushed,
+                "dropped": self._dropped,
+                "flush_errors": self._flush_errors,
+            }
+
+    def flush(self) -> None:
+        """
+        Block until every queued audit has been written (or failed to write).
+        """
+
+        if self._flusher is not None and self._flusher.is_alive():
+            self._queue.join()
+
+    def discard_pending(self) -> int:
+        """
+        Drop audits still waiting in the write-behind queue and wait for any
+        batch already being written. Returns how many were discarded.
+        """
+
+        discarded = 0
+        while True:
+            try:
+                self._queue.get_nowait()
+            except queue.Empty:
+                break
+            self._queue.task_done()
+            discarded += 1
+        self.flush()
+        return discarded
+
+    def close(self) -> None:
+        """
+        Drain the queue and stop the background flusher. Safe to call twice.
+        """
+
+        flusher = self._flusher
+        if flusher is None:
+            self.backend.close()
+            return
+        self._stopping.set()
+        flusher.join()
+        self._flusher = None
+        self._stopping.clear()
+        self.backend.close()
+
+    @staticmethod
+    def _build_row(payload: schemas.DecisionAuditCreate) -> dict[str, Any]:
+        return {
+            "id": models.new_id(),
+            "transaction_id": payload.transaction_id,
+            "request_payload": payload.request_payload,
+            "decision_payload": payload.decision_payload.model_dump(),
+            "latency_ms": payload.decision_payload.latency_ms,
+            "created_at": datetime.utcnow(),
+        }
+
+    def _enqueue(self, rows: Sequence[dict[str, Any]]) -> None:
+        self._ensure_flusher()
+        accepted = 0
+        for row in rows:
+            try:
+                self._queue.put_nowait(row)
+            except queue.Full:
+                break
+            accepted += 1
+        with self._lock:
+            self._enqueued += accepted
+            self._dropped += len(rows) - accepted
+        if accepted < len(rows):
+            logger.warning("Audit queue full; dropped %d audit record(s).", len(rows) - accepted)
+
+    def _ensure_flusher(self) -> None:
+        if self._flusher is not None:
+            return
+        with self._lock:
+            if self._flusher is None:
+                self._flusher = threading.Thread(
+                    target=self._run_flusher,
+                    name="audit-write-behind",
+                    daemon=True,
+                )
+                self._flusher.start()
+                atexit.register(self.close)
+
+    def _run_flusher(self) -> None:
+        while True:
+            batch = self._collect_batch()
+            if batch:
+                self._write_batch(batch)
+            elif self._stopping.is_set():
+                return
+
+    def _collect_batch(self) -> list[dict[str, Any]]:
+        """
+        Gather up to ``flush_batch_size`` rows, waiting at most one flush
+        interval after the first row arrives.
+        """
+
+        try:
+            batch = [self._queue.get(timeout=0.1)]
+        except queue.Empty:
+            return []
+        deadline = time.monotonic() + self.flush_interval_seconds
+        while len(batch) < self.flush_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _write_batch(self, batch: list[dict[str, Any]]) -> None:
+        session_factory = self._session_factory or SessionLocal
+        try:
+            if self.backend.stores_in_database:
+                # Each audit is written to the shard holding its transaction.
+                router = get_shard_router()
+                by_shard: dict[int, list[dict[str, Any]]] = {}
+                for row in batch:
+                    by_shard.setdefault(router.shard_for_id(row["transaction_id"]), []).append(row)
+                for shard, rows in by_shard.items():
+                    with session_factory() as session:
+                        use_shard(session, shard)
+                        self.backend.write_many(session, rows)
+                        session.commit()
+            else:
+                self.backend.write_many(None, batch)
+        except Exception:
+            logger.exception("Failed to flush %d audit record(s).", len(batch))
+            with self._lock:
+                self._flush_errors += 1
+        else:
+            with self._lock:
+                self._flushed += len(batch)
+        finally:
+            for _ in batch:
+                self._queue.task_done()
@@ -0,0 +1,757 @@
+"""
+Storage backends for decision audits.
+
+`DatabaseAuditBackend` keeps audits in the ``decision_audits`` table.
+`SegmentAuditBackend` keeps them off the OLTP database entirely: compact binary
+records are appended to one segment file per time partition, looked up through
+a per-segment transaction index, and old partitions are compressed or dropped
+as whole files.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import logging
+import mmap
+import os
+import struct
+import threading
+import time
+import uuid
+import zlib
+from collections import defaultdict
+from contextlib import ExitStack, contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Iterator, List, Optional, Sequence
+
+import orjson
+from sqlalchemy import delete, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app import models
+
+logger = logging.getLogger(__name__)
+
+SEGMENT_MAGIC = b"RKAU\x01"
+# body length, created_at (epoch seconds), latency_ms, audit id length, transaction id length
+RECORD_HEADER = struct.Struct("<IddHH")
+# Sealed-segment index: bytes of the segment it covers, then sorted (key hash, offset) pairs.
+INDEX_HEADER = struct.Struct("<Q")
+INDEX_ENTRY = struct.Struct("<QQ")
+# Compressed segment: magic, independently zlib-compressed blocks of whole records,
+# a table of (segment offset, length, file offset, compressed length) per block,
+# then the table's file offset and block count.
+BLOCK_MAGIC = b"RKAZ\x02"
+BLOCK_ENTRY = struct.Struct("<QIQI")
+BLOCK_FOOTER = struct.Struct("<QQ")
+PARTITION_FORMAT = "%Y%m%dT%H%M"
+
+
+class DatabaseAuditBackend:
+    """
+    Audits as rows of the ``decision_audits`` table (the default).
+    """
+
+    stores_in_database = True
+
+    def write_many(self, session: Session, rows: Sequence[dict[str, Any]]) -> None:
+        session.execute(insert(models.DecisionAudit), rows)
+
+    def fetch(self, session: Session, transaction_id: str) -> List[models.DecisionAudit]:
+        return (
+            session.query(models.DecisionAudit)
+            .filter(models.DecisionAudit.transaction_id == transaction_id)
+            .order_by(models.DecisionAudit.created_at.desc())
+            .all()
+        )
+
+    async def fetch_async(
+        self, session: AsyncSession, transaction_id: str
+    ) -> List[models.DecisionAudit]:
+        result = await session.scalars(
+            select(models.DecisionAudit)
+            .where(models.DecisionAudit.transaction_id == transaction_id)
+            .order_by(models.DecisionAudit.created_at.desc())
+        )
+        return list(result)
+
+    def latencies(self, session: Session, chunk_size: int = 10_000) -> Iterator[float]:
+        rows = session.execute(
+            select(models.DecisionAudit.latency_ms).execution_options(yield_per=chunk_size)
+        )
+        for (latency_ms,) in rows:
+            if latency_ms is not None:
+                yield latency_ms
+
+    def scan(
+        self,
+        session: Session,
+        *,
+        created_from: Optional[datetime] = None,
+        created_to: Optional[datetime] = None,
+        chunk_size: int = 10_000,
+    ) -> Iterator[Any]:
+        """
+        Stream audit rows created in ``[created_from, created_to)``, in table order.
+
+        There is no ``created_at`` index on this table, so the range is a filter
+        over a full scan rather than a sort the database would have to buffer.
+        """
+
+        audit = models.DecisionAudit
+        query = select(
+            audit.id,
+            audit.transaction_id,
+            audit.request_payload,
+            audit.decision_payload,
+            audit.latency_ms,
+            audit.created_at,
+        )
+        if created_from is not None:
+            query = query.where(audit.created_at >= created_from)
+        if created_to is not None:
+            query = query.where(audit.created_at < created_to)
+        yield from session.execute(query.execution_options(yield_per=chunk_size))
+
+    def reset(self, session: Session) -> None:
+        session.execute(delete(models.DecisionAudit))
+
+    def maintain(self) -> dict[str, int]:
+        return {"sealed": 0, "compressed": 0, "dropped": 0}
+
+    def close(self) -> None:
+        return None
+
+
+def _key_hash(transaction_id: str) -> int:
+    digest = hashlib.blake2b(transaction_id.encode(), digest_size=8).digest()
+    return int.from_bytes(digest, "little")
+
+
+def _to_epoch(value: datetime) -> float:
+    return value.replace(tzinfo=timezone.utc).timestamp()
+
+
+def _from_epoch(value: float) -> datetime:
+    return datetime.fromtimestamp(value, timezone.utc).replace(tzinfo=None)
+
+
+def encode_record(row: dict[str, Any]) -> bytes:
+    audit_id = row["id"].encode()
+    transaction_id = row["transaction_id"].encode()
+    body = orjson.dumps((row["request_payload"], row["decision_payload"]))
+    header = RECORD_HEADER.pack(
+        len(body),
+        _to_epoch(row["created_at"]),
+        row["latency_ms"],
+        len(audit_id),
+        len(transaction_id),
+    )
+    return b"".join((header, audit_id, transaction_id, body))
+
+
+def _record_transaction_id(buffer: Any, offset: int) -> tuple[str, int]:
+    """
+    Transaction id of the record at ``offset`` and the offset of the next record.
+    """
+
+    body_length, _, _, id_length, txn_length = RECORD_HEADER.unpack_from(buffer, offset)
+    start = offset + RECORD_HEADER.size + id_length
+    transaction_id = bytes(buffer[start : start + txn_length]).decode()
+    return transaction_id, start + txn_length + body_length
+
+
+def _uuid7_seconds(transaction_id: str) -> Optional[float]:
+    """
+    Unix time embedded in a UUIDv7 id, or None for any other id.
+    """
+
+    try:
+        value = uuid.UUID(transaction_id)
+    except (AttributeError, TypeError, ValueError):
+        return None
+    if value.version != 7:
+        return None
+    return (value.int >> 80) / 1_000
+
+
+def decode_record(buffer: Any, offset: int) -> dict[str, Any]:
+    body_length, created_at, latency_ms, id_length, txn_length = RECORD_HEADER.unpack_from(
+        buffer, offset
+    )
+    start = offset + RECORD_HEADER.size
+    audit_id = bytes(buffer[start : start + id_length]).decode()
+    start += id_length
+    transaction_id = bytes(buffer[start : start + txn_length]).decode()
+    start += txn_length
+    request_payload, decision_payload = orjson.loads(bytes(buffer[start : start + body_length]))
+    return {
+        "id": audit_id,
+        "transaction_id": transaction_id,
+        "request_payload": request_payload,
+        "decision_payload": decision_payload,
+        "latency_ms": latency_ms,
+        "created_at": _from_epoch(created_at),
+    }
+
+
+def iter_records(buffer: Any, start: int, end: int) -> Iterator[int]:
+    """
+    Offsets of the complete records in ``buffer[start:end]``; a torn record at
+    the end (a concurrent append in progress) is left for the next scan.
+    """
+
+    offset = start
+    while offset + RECORD_HEADER.size <= end:
+        body_length, _, _, id_length, txn_length = RECORD_HEADER.unpack_from(buffer, offset)
+        following = offset + RECORD_HEADER.size + id_length + txn_length + body_length
+        if following > end:
+            return
+        yield offset
+        offset = following
+
+
+class SegmentAuditBackend:
+    """
+    Append-only, time-partitioned audit segments.
+
+    - ``audit-<partition>.seg``: a magic header followed by records, appended
+      with one ``O_APPEND`` write per batch so several processes can share a
+      directory. Reads go through ``mmap``.
+    - ``audit-<partition>.seg.idx``: written once a partition has ended (plus
+      ``seal_grace_seconds``); sorted transaction-id hashes with record offsets,
+      binary-searched on lookup. Bytes appended after sealing are indexed in
+      memory.
+    - ``audit-<partition>.seg.z``: a sealed segment compressed after
+      ``compress_after_hours`` in blocks of about ``compress_block_bytes``, so a
+      lookup inflates only the block holding its record. Audits arriving for a
+      partition after that go to ``audit-<partition>.seg.late``, read alongside.
+
+    Lookups by a UUIDv7 transaction id only visit the partitions within
+    ``lookup_window_seconds`` of the time in the id (audits are written as the
+    transaction is created); other ids are looked up in every partition.
+    Partitions older than ``retention_hours`` are deleted file by file.
+    """
+
+    stores_in_database = False
+
+    def __init__(
+        self,
+        directory: str | os.PathLike[str],
+        *,
+        partition_minutes: int = 60,
+        retention_hours: Optional[float] = None,
+        compress_after_hours: Optional[float] = None,
+        seal_grace_seconds: float = 300.0,
+        compress_block_bytes: int = 64 * 1024,
+        lookup_window_seconds: float = 300.0,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.partition_seconds = partition_minutes * 60
+        self.retention_seconds = retention_hours * 3600 if retention_hours else None
+        self.compress_after_seconds = (
+            compress_after_hours * 3600 if compress_after_hours is not None else None
+        )
+        self.seal_grace_seconds = seal_grace_seconds
+        self.compress_block_bytes = compress_block_bytes
+        self.lookup_window_seconds = lookup_window_seconds
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._fds: dict[Path, int] = {}
+        # raw file name -> (bytes scanned, transaction id -> offsets) for unindexed bytes
+        self._tails: dict[str, tuple[int, dict[str, list[int]]]] = {}
+        self._current_partition: Optional[int] = None
+        self._maintenance_lock = threading.Lock()
+        self._maintainer: Optional[threading.Thread] = None
+
+    # -- writes -------------------------------------------------------------
+
+    def write_many(self, session: Optional[Session], rows: Sequence[dict[str, Any]]) -> None:
+        partitions: dict[int, list[bytes]] = defaultdict(list)
+        for row in rows:
+            partitions[self._partition_of(_to_epoch(row["created_at"]))].append(
+                encode_record(row)
+            )
+        rolled_over = False
+        with self._lock:
+            for partition, records in sorted(partitions.items()):
+                self._append(self._segment_path(partition), b"".join(records))
+                if self._current_partition is None or partition > self._current_partition:
+                    rolled_over = self._current_partition is not None
+                    self._current_partition = partition
+        if rolled_over:
+            self._maintain_in_background()
+
+    def _append(self, base: Path, data: bytes) -> None:
+        fd = self._fds.get(base)
+        if fd is not None and os.fstat(fd).st_nlink == 0:
+            # The file was deleted underneath us (reset, retention or compression).
+            os.close(fd)
+            fd = None
+        if fd is None:
+            # A compressed partition is immutable; late audits get a file of their own.
+            path = self._late_path(base) if self._compressed_path(base).exists() else base
+            self._create_segment(path)
+            fd = os.open(path, os.O_WRONLY | os.O_APPEND)
+            for stale in [p for p in self._fds if p != base]:
+                os.close(self._fds.pop(stale))
+            self._fds[base] = fd
+        view = memoryview(data)
+        while view:
+            written = os.write(fd, view)
+            view = view[written:]
+
+    @staticmethod
+    def _create_segment(path: Path) -> None:
+        """
+        Create ``path`` with its magic header atomically, unless it exists.
+        """
+
+        if path.exists():
+            return
+        temporary = path.with_name(f".{path.name}.{os.getpid()}.{threading.get_ident()}")
+        temporary.write_bytes(SEGMENT_MAGIC)
+        try:
+            os.link(temporary, path)
+        except FileExistsError:
+            pass
+        finally:
+            temporary.unlink()
+
+    # -- reads --------------------------------------------------------------
+
+    def fetch(
+        self, session: Optional[Session], transaction_id: str
+    ) -> List[models.DecisionAudit]:
+        rows: dict[str, dict[str, Any]] = {}
+        for base in self._lookup_bases(transaction_id):
+            for row in self._fetch_from_partition(base, transaction_id):
+                # Keyed by audit id: a reader racing compression may see both copies.
+                rows[row["id"]] = row
+        ordered = sorted(rows.values(), key=lambda row: row["created_at"], reverse=True)
+        return [models.DecisionAudit(**row) for row in ordered]
+
+    async def fetch_async(
+        self, session: Optional[AsyncSession], transaction_id: str
+    ) -> List[models.DecisionAudit]:
+        return await asyncio.to_thread(self.fetch, None, transaction_id)
+
+    def latencies(self, session: Optional[Session] = None, chunk_size: int = 0) -> Iterator[float]:
+        for base in self._segment_bases():
+            for buffer, offset in self._partition_records(base):
+                yield RECORD_HEADER.unpack_from(buffer, offset)[2]
+
+    def scan(
+        self,
+        session: Optional[Session] = None,
+        *,
+        created_from: Optional[datetime] = None,
+        created_to: Optional[datetime] = None,
+        chunk_size: int = 0,
+    ) -> Iterator[dict[str, Any]]:
+        """
+        Stream audits created in ``[created_from, created_to)``, oldest partition
+        first. Partitions entirely outside the range are skipped unopened.
+        """
+
+        start = _to_epoch(created_from) if created_from is not None else None
+        end = _to_epoch(created_to) if created_to is not None else None
+        for base in reversed(self._segment_bases()):
+            partition = self._partition_start(base)
+            if end is not None and partition >= end:
+                break
+            if start is not None and partition + self.partition_seconds <= start:
+                continue
+            for buffer, offset in self._partition_records(base):
+                created_at = RECORD_HEADER.unpack_from(buffer, offset)[1]
+                if start is not None and created_at < start:
+                    continue
+                if end is not None and created_at >= end:
+                    continue
+                yield decode_record(buffer, offset)
+
+    def _lookup_bases(self, transaction_id: str) -> list[Path]:
+        """
+        Partitions that can hold audits of ``transaction_id``, newest first.
+        """
+
+        minted = _uuid7_seconds(transaction_id)
+        if minted is None:
+            return self._segment_bases()
+        window = self.lookup_window_seconds
+        partitions = {
+            self._partition_of(minted + shift)
+            for shift in (-window, 0.0, window)
+        }
+        return [self._segment_path(partition) for partition in sorted(partitions, reverse=True)]
+
+    def _fetch_from_partition(self, base: Path, transaction_id: str) -> list[dict[str, Any]]:
+        covered, offsets = self._indexed_offsets(base, transaction_id)
+        rows = []
+        with self._open_partition(base) as (compressed, raw, raw_path):
+            if compressed is not None:
+                if covered is None:
+                    # Compressed without an index (never written that way); scan it.
+                    for block, offset in compressed.records():
+                        if _record_transaction_id(block, offset)[0] == transaction_id:
+                            rows.append(decode_record(block, offset))
+                for offset in offsets:
+                    block, local = compressed.locate(offset)
+                    if _record_transaction_id(block, local)[0] == transaction_id:
+                        rows.append(decode_record(block, local))
+                # The index described the compressed file; the raw one holds late audits.
+                covered, offsets = None, []
+            if raw is not None:
+                covered = covered or len(SEGMENT_MAGIC)
+                offsets += self._tail_offsets(raw_path, raw, covered, transaction_id)
+                for offset in offsets:
+                    if _record_transaction_id(raw, offset)[0] == transaction_id:
+                        rows.append(decode_record(raw, offset))
+        return rows
+
+    def _partition_records(self, base: Path) -> Iterator[tuple[Any, int]]:
+        """
+        ``(buffer, offset)`` of every record of a partition, compressed ones first.
+        """
+
+        with self._open_partition(base) as (compressed, raw, _):
+            if compressed is not None:
+                yield from compressed.records()
+            if raw is not None:
+                for offset in iter_records(raw, len(SEGMENT_MAGIC), len(raw)):
+                    yield raw, offset
+
+    @contextmanager
+    def _open_partition(
+        self, base: Path
+    ) -> Iterator[tuple[Optional["_CompressedSegment"], Any, Path]]:
+        """
+        The compressed segment (or None) and the mapped raw file (or None) of a
+        partition: the segment itself, or its late audits once compressed.
+        """
+
+        with ExitStack() as stack:
+            compressed = stack.enter_context(_open_compressed(self._compressed_path(base)))
+            raw_path = base if compressed is None else self._late_path(base)
+            raw = stack.enter_context(_open_mapped(raw_path))
+            if compressed is None and raw is None:
+                # Compressed between the two opens.
+                compressed = stack.enter_context(_open_compressed(self._compressed_path(base)))
+                raw_path = self._late_path(base)
+                raw = stack.enter_context(_open_mapped(raw_path))
+            yield compressed, raw, raw_path
+
+    def _indexed_offsets(
+        self, base: Path, transaction_id: str
+    ) -> tuple[Optional[int], list[int]]:
+        """
+        Binary-search the sealed index; returns (bytes it covers, candidate
+        offsets), with ``None`` covered when the partition is not sealed.
+        """
+
+        try:
+            with ExitStack() as stack:
+                handle = stack.enter_context(open(self._index_path(base), "rb"))
+                index = stack.enter_context(
+                    mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+                )
+                return _search_index(index, _key_hash(transaction_id))
+        except FileNotFoundError:
+            return None, []
+
+    def _tail_offsets(
+        self, path: Path, buffer: Any, covered: int, transaction_id: str
+    ) -> list[int]:
+        """
+        Offsets for records beyond the sealed index, scanned incrementally.
+        """
+
+        with self._lock:
+            scanned, tail = self._tails.get(path.name, (covered, {}))
+            if scanned < covered:
+                scanned, tail = covered, {}
+            for offset in iter_records(buffer, scanned, len(buffer)):
+                record_transaction_id, scanned = _record_transaction_id(buffer, offset)
+                tail.setdefault(record_transaction_id, []).append(offset)
+            self._tails[path.name] = (scanned, tail)
+            return list(tail.get(transaction_id, ()))
+
+    # -- maintenance --------------------------------------------------------
+
+    def maintain(self, now: Optional[float] = None) -> dict[str, int]:
+        """
+        Seal ended partitions, compress old ones and drop expired ones.
+        """
+
+        with self._maintenance_lock:
+            return self._maintain(now)
+
+    def _maintain_in_background(self) -> None:
+        # Sealing and compressing whole files would stall the write (a payment or
+        # a write-behind flush) that happened to cross the partition boundary.
+        maintainer = threading.Thread(
+            target=self._maintain_quietly, name="audit-segment-maintenance", daemon=True
+        )
+        self._maintainer = maintainer
+        maintainer.start()
+
+    def _maintain_quietly(self) -> None:
+        # A run already in progress covers this rollover too.
+        if not self._maintenance_lock.acquire(blocking=False):
+            return
+        try:
+            self._maintain(None)
+        except Exception:
+            logger.exception("Audit segment maintenance failed.")
+        finally:
+            self._maintenance_lock.release()
+
+    def _maintain(self, now: Optional[float]) -> dict[str, int]:
+        now = self._clock() if now is None else now
+        counts = {"sealed": 0, "compressed": 0, "dropped": 0}
+        for base in self._segment_bases():
+            ended = self._partition_start(base) + self.partition_seconds
+            age = now - ended
+            if self.retention_seconds is not None and age > self.retention_seconds:
+                self._drop(base)
+                counts["dropped"] += 1
+                continue
+            if age < self.seal_grace_seconds:
+                continue
+            if not self._index_path(base).exists():
+                self._seal(base)
+                counts["sealed"] += 1
+            if (
+                self.compress_after_seconds is not None
+                and age >= self.compress_after_seconds
+                and base.exists()
+                and self._compress(base)
+            ):
+                counts["compressed"] += 1
+        return counts
+
+    def _seal(self, base: Path) -> None:
+        with _open_mapped(base) as buffer:
+            if buffer is None:
+                return
+            entries = []
+            covered = len(SEGMENT_MAGIC)
+            for offset in iter_records(buffer, len(SEGMENT_MAGIC), len(buffer)):
+                transaction_id, covered = _record_transaction_id(buffer, offset)
+                entries.append((_key_hash(transaction_id), offset))
+        entries.sort()
+        payload = b"".join(
+            [INDEX_HEADER.pack(covered), *(INDEX_ENTRY.pack(*entry) for entry in entries)]
+        )
+        index_path = self._index_path(base)
+        temporary = index_path.with_name(f".{index_path.name}.{os.getpid()}")
+        temporary.write_bytes(payload)
+        os.replace(temporary, index_path)
+        with self._lock:
+            self._tails.pop(base.name, None)
+
+    def _compress(self, base: Path) -> bool:
+        compressed = self._compressed_path(base)
+        if compressed.exists():
+            return False
+        temporary = compressed.with_name(f".{compressed.name}.{os.getpid()}")
+        with _open_mapped(base) as buffer:
+            if buffer is None:
+                return False
+            with open(temporary, "wb") as output:
+                _write_blocks(output, buffer, self.compress_block_bytes)
+        os.replace(temporary, compressed)
+        with self._lock:
+            fd = self._fds.pop(base, None)
+            if fd is not None:
+                os.close(fd)
+            base.unlink()
+            self._tails.pop(base.name, None)
+        return True
+
+    def _drop(self, base: Path) -> None:
+        with self._lock:
+            fd = self._fds.pop(base, None)
+            if fd is not None:
+                os.close(fd)
+            for path in (
+                base,
+                self._compressed_path(base),
+                self._index_path(base),
+                self._late_path(base),
+            ):
+                path.unlink(missing_ok=True)
+                self._tails.pop(path.name, None)
+
+    def reset(self, session: Optional[Session] = None) -> None:
+        with self._maintenance_lock:
+            for base in self._segment_bases():
+                self._drop(base)
+
+    def close(self) -> None:
+        maintainer = self._maintainer
+        if maintainer is not None:
+            maintainer.join()
+        with self._lock:
+            for fd in self._fds.values():
+                os.close(fd)
+            self._fds.clear()
+
+    # -- layout helpers -----------------------------------------------------
+
+    def _partition_of(self, epoch: float) -> int:
+        return int(epoch // self.partition_seconds) * self.partition_seconds
+
+    def _segment_path(self, partition: int) -> Path:
+        stamp = datetime.fromtimestamp(partition, timezone.utc).strftime(PARTITION_FORMAT)
+        return self.directory / f"audit-{stamp}.seg"
+
+    @staticmethod
+    def _partition_start(base: Path) -> float:
+        stamp = base.name[len("audit-") : -len(".seg")]
+        return datetime.strptime(stamp, PARTITION_FORMAT).replace(tzinfo=timezone.utc).timestamp()
+
+    @staticmethod
+    def _index_path(base: Path) -> Path:
+        return base.with_name(base.name + ".idx")
+
+    @staticmethod
+    def _compressed_path(base: Path) -> Path:
+        return base.with_name(base.name + ".z")
+
+    @staticmethod
+    def _late_path(base: Path) -> Path:
+        return base.with_name(base.name + ".late")
+
+    def _segment_bases(self) -> list[Path]:
+        """
+        Every partition on disk (raw or compressed), newest first.
+        """
+
+        names = {path.name for path in self.directory.glob("audit-*.seg")}
+        names.update(path.name[: -len(".z")] for path in self.directory.glob("audit-*.seg.z"))
+        return [self.directory / name for name in sorted(names, reverse=True)]
+
+
+def _search_index(index: Any, target: int) -> tuple[int, list[int]]:
+    (covered,) = INDEX_HEADER.unpack_from(index, 0)
+    count = (len(index) - INDEX_HEADER.size) // INDEX_ENTRY.size
+    low, high = 0, count
+    while low < high:
+        middle = (low + high) // 2
+        key, _ = INDEX_ENTRY.unpack_from(index, INDEX_HEADER.size + middle * INDEX_ENTRY.size)
+        if key < target:
+            low = middle + 1
+        else:
+            high = middle
+    offsets = []
+    while low < count:
+        key, offset = INDEX_ENTRY.unpack_from(index, INDEX_HEADER.size + low * INDEX_ENTRY.size)
+        if key != target:
+            break
+        offsets.append(offset)
+        low += 1
+    return covered, offsets
+
+
+def _write_blocks(output: Any, buffer: Any, block_bytes: int) -> None:
+    """
+    Write the complete records of a raw segment as a block-compressed file.
+    """
+
+    output.write(BLOCK_MAGIC)
+    table = []
+
+    def flush(start: int, end: int) -> None:
+        data = zlib.compress(bytes(buffer[start:end]), 6)
+        table.append(BLOCK_ENTRY.pack(start, end - start, output.tell(), len(data)))
+        output.write(data)
+
+    block_start = end = len(SEGMENT_MAGIC)
+    for offset in iter_records(buffer, len(SEGMENT_MAGIC), len(buffer)):
+        if offset - block_start >= block_bytes:
+            flush(block_start, offset)
+            block_start = offset
+        end = _record_transaction_id(buffer, offset)[1]
+    if end > block_start:
+        flush(block_start, end)
+    table_offset = output.tell()
+    output.write(b"".join(table))
+    output.write(BLOCK_FOOTER.pack(table_offset, len(table)))
+
+
+class _CompressedSegment:
+    """
+    Block-level access to a compressed segment: a record is read by inflating
+    only its block.
+    """
+
+    def __init__(self, data: Any) -> None:
+        self._data = data
+        self._table, self._count = BLOCK_FOOTER.unpack_from(data, len(data) - BLOCK_FOOTER.size)
+        self._cached: Optional[tuple[int, int, bytes]] = None
+
+    def records(self) -> Iterator[tuple[bytes, int]]:
+        """
+        ``(block, offset)`` of every record, one inflated block at a time.
+        """
+
+        for number in range(self._count):
+            _, block = self._block(number)
+            for offset in iter_records(block, 0, len(block)):
+                yield block, offset
+
+    def locate(self, offset: int) -> tuple[bytes, int]:
+        """
+        The inflated block holding the record at segment ``offset``, and the
+        record's offset inside it.
+        """
+
+        low, high = 0, self._count
+        while low < high - 1:
+            middle = (low + high) // 2
+            if self._entry(middle)[0] <= offset:
+                low = middle
+            else:
+                high = middle
+        start, block = self._block(low)
+        return block, offset - start
+
+    def _entry(self, number: int) -> tuple[int, int, int, int]:
+        return BLOCK_ENTRY.unpack_from(self._data, self._table + number * BLOCK_ENTRY.size)
+
+    def _block(self, number: int) -> tuple[int, bytes]:
+        if self._cached is None or self._cached[0] != number:
+            start, _, position, length = self._entry(number)
+            block = zlib.decompress(self._data[position : position + length])
+            self._cached = (number, start, block)
+        return self._cached[1], self._cached[2]
+
+
+@contextmanager
+def _open_mapped(path: Path) -> Iterator[Any]:
+    """
+    Read-only mmap of ``path``, or None if it does not exist.
+    """
+
+    with ExitStack() as stack:
+        try:
+            handle = stack.enter_context(open(path, "rb"))
+        except FileNotFoundError:
+            yield None
+            return
+        if os.fstat(handle.fileno()).st_size <= len(SEGMENT_MAGIC):
+            yield SEGMENT_MAGIC
+            return
+        yield stack.enter_context(mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ))
+
+
+@contextmanager
+def _open_compressed(path: Path) -> Iterator[Optional[_CompressedSegment]]:
+    with _open_mapped(path) as data:
+        yield None if data is None else _CompressedSegment(data)
@@ -5,25 +5,309 @@ Feature cache helper for storing and retrieving transaction signals.
 from __future__ import annotations
 
 import json
-from typing import Any, Dict, Optional
+import struct
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterable, Mapping, Optional
+
+from app.schemas import TransactionFeatures
 
 try:
     import redis  # type: ignore
+    from redis import asyncio as redis_asyncio  # type: ignore
 except Exception:  # pragma: no cover - redis optional
     redis = None
+    redis_asyncio = None
+
+
+class LocalLRUCache:
+    """
+    Bounded in-process LRU whose entries expire after ``ttl_seconds``.
+    """
+
+    def __init__(
+        self,
+        max_entries: int,
+        ttl_seconds: float,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._clock = clock
+        self._entries: OrderedDict[str, tuple[float, Any]] = OrderedDict()
+        self._lock = threading.Lock()
+        self.evictions = 0
+        self.expirations = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: str) -> Any | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at <= self._clock():
+                del self._entries[key]
+                self.expirations += 1
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: Any) -> None:
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (self._clock() + self.ttl_seconds, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+class CircuitBreaker:
+    """
+    Skips Redis after ``failure_threshold`` consecutive errors, then lets a
+    single probe through once an exponentially growing backoff has elapsed.
+    """
+
+    def __init__(
+        self,
+        failure_threshold: int = 3,
+        backoff_seconds: float = 0.5,
+        max_backoff_seconds: float = 30.0,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.failure_threshold = failure_threshold
+        self.backoff_seconds = backoff_seconds
+        self.max_backoff_seconds = max_backoff_seconds
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._consecutive_failures = 0
+        self._opened = 0
+        self._retry_at = 0.0
+        self._probing = False
+        self.failures = 0
+
+    @property
+    def state(self) -> str:
+        if self._consecutive_failures < self.failure_threshold:
+            return "closed"
+        return "half_open" if self._probing else "open"
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self._consecutive_failures < self.failure_threshold:
+                return True
+            if self._probing or self._clock() < self._retry_at:
+                return False
+            self._probing = True
+            return True
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._consecutive_failures = 0
+            self._opened = 0
+            self._probing = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+            self._consecutive_failures += 1
+            self._probing = False
+            if self._consecutive_failures >= self.failure_threshold:
+                backoff = min(self.backoff_seconds * 2**self._opened, self.max_backoff_seconds)
+                self._opened += 1
+                self._retry_at = self._clock() + backoff
+
+
+class JSONCodec:
+    """
+    Human-readable encoding; handles any JSON-serializable feature blob.
+    """
+
+    name = "json"
+
+    def encode(self, value: Dict[str, Any]) -> bytes:
+        return json.dumps(value).encode()
+
+    def decode(self, data: bytes) -> Dict[str, Any]:
+        return json.loads(data)
+
+
+class BinaryFeatureCodec:
+    """
+    Packs the feature floats as little-endian doubles behind a version byte:
+    25 bytes per card instead of ~80 bytes of JSON, with no parsing on read.
+    Blobs written by the JSON codec are still decoded, so the encoding can be
+    switched without flushing Redis.
+    """
+
+    name = "binary"
+    version = b"\x01"
+
+    def __init__(self, fields: Iterable[str] | None = None) -> None:
+        # Velocity counters are per event and never cached.
+        self.fields = tuple(
+            fields or (name for name in TransactionFeatures.model_fields if name != "velocity")
+        )
+        self._struct = struct.Struct("<" + "d" * len(self.fields))
 
+    def encode(self, value: Dict[str, Any]) -> bytes:
+        return self.version + self._struct.pack(*(value[field] for field in self.fields))
 
-class FeatureCache:
+    def decode(self, data: bytes) -> Dict[str, Any]:
+        if data[:1] != self.version:
+            return json.loads(data)
+        return dict(zip(self.fields, self._struct.unpack(data[1:])))
+
+
+CODECS = {codec.name: codec for codec in (JSONCodec, BinaryFeatureCodec)}
+
+
+class _BaseFeatureCache(ABC):
     """
-    Wraps Redis but gracefully degrades to an in-memory dictionary when Redis
-    is unavailable (e.g., during local development without Docker Compose).
+    Two-tier layout shared by the sync and asyncio caches: a bounded local LRU
+    (L1) in front of Redis (L2), with a circuit breaker guarding Redis so an
+    outage degrades to L1 and recovers automatically once Redis is back.
     """
 
-    def __init__(self, redis_url: str, ttl_seconds: int = 300) -> None:
+    def __init__(
+        self,
+        redis_url: str,
+        ttl_seconds: int = 300,
+        *,
+        local_max_entries: int = 10_000,
+        local_ttl_seconds: float | None = None,
+        breaker: CircuitBreaker | None = None,
+        socket_timeout_seconds: float = 0.25,
+        encoding: str = "json",
+    ) -> None:
         self.redis_url = redis_url
         self.ttl_seconds = ttl_seconds
+        self.codec = CODECS[encoding]()
+        self.socket_timeout_seconds = socket_timeout_seconds
+        self._local = LocalLRUCache(
+            max_entries=local_max_entries,
+            ttl_seconds=local_ttl_seconds if local_ttl_seconds is not None else ttl_seconds,
+        )
+        self._breaker = breaker or CircuitBreaker()
         self._client = self._build_client()
-        self._fallback: dict[str, dict[str, Any]] = {}
+        self.local_hits = 0
+        self.redis_hits = 0
+        self.misses = 0
+
+    @abstractmethod
+    def _build_client(self):
+        """
+        Create the Redis client, or return None if it cannot be built.
+        """
+
+    def _redis_client(self):
+        """
+        Return the Redis client if the breaker allows a call, rebuilding it when
+        a previous construction failed.
+        """
+
+        if not self._breaker.allow():
+            return None
+        if self._client is None:
+            self._client = self._build_client()
+            if self._client is None:
+                self._breaker.record_failure()
+        return self._client
+
+    def build_key(self, card_number: str) -> str:
+        """
+        Compose a deterministic cache key using the last 8 digits of the card.
+        """
+
+        return f"features:{card_number[-8:]}"
+
+    def stats(self) -> dict[str, Any]:
+        """
+        Hit/miss/eviction counters plus the Redis breaker state.
+        """
+
+        return {
+            "local_hits": self.local_hits,
+            "redis_hits": self.redis_hits,
+            "misses": self.misses,
+            "evictions": self._local.evictions,
+            "expirations": self._local.expirations,
+            "local_entries": len(self._local),
+            "redis_state": self._breaker.state,
+            "redis_failures": self._breaker.failures,
+        }
+
+    def clear_local(self) -> None:
+        self._local.clear()
+
+    def _local_get(self, key: str) -> Optional[Dict[str, Any]]:
+        value = self._local.get(key)
+        if value is not None:
+            self.local_hits += 1
+        return value
+
+    def _remember(self, key: str, data: Any) -> Optional[Dict[str, Any]]:
+        if not data:
+            self.misses += 1
+            return None
+        try:
+            value = self.codec.decode(data)
+        except (ValueError, TypeError, struct.error):
+            # Written by another codec or feature layout (e.g. mid-rollout): treat
+            # it as a miss so the freshly computed features overwrite it.
+            self.misses += 1
+            return None
+        self.redis_hits += 1
+        self._local.set(key, value)
+        return value
+
+    def _split_local(self, keys: Iterable[str]) -> tuple[dict[str, Dict[str, Any]], list[str]]:
+        """
+        Serve what L1 can and return the keys that still need Redis.
+        """
+
+        found: dict[str, Dict[str, Any]] = {}
+        missing: list[str] = []
+        for key in dict.fromkeys(keys):
+            value = self._local_get(key)
+            if value is None:
+                missing.append(key)
+            else:
+                found[key] = value
+        return found, missing
+
+    def _remember_many(
+        self,
+        found: dict[str, Dict[str, Any]],
+        keys: list[str],
+        blobs: list[Any],
+    ) -> dict[str, Dict[str, Any]]:
+        for key, data in zip(keys, blobs):
+            value = self._remember(key, data)
+            if value is not None:
+                found[key] = value
+        return found
+
+
+class FeatureCache(_BaseFeatureCache):
+    """
+    Wraps Redis but gracefully degrades to the in-process tier when Redis is
+    unavailable (e.g., during local development without Docker Compose).
+    """
 
     def _build_client(self):
         if redis is None:
@@ -31,37 +315,82 @@ class FeatureCache:
         try:
             return redis.Redis.from_url(
                 self.redis_url,
-                decode_responses=True,
                 health_check_interval=30,
+                socket_connect_timeout=self.socket_timeout_seconds,
+                socket_timeout=self.socket_timeout_seconds,
             )
         except Exception:
             return None
 
-    def build_key(self, card_number: str) -> str:
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        value = self._local_get(key)
+        if value is not None:
+            return value
+        client = self._redis_client()
+        if client is None:
+            self.misses += 1
+            return None
+        try:
+            data = client.get(key)
+        except Exception:
+            self._breaker.record_failure()
+            self.misses += 1
+            return None
+        self._breaker.record_success()
+        return self._remember(key, data)
+
+    def set(self, key: str, value: Dict[str, Any]) -> None:
+        self._local.set(key, value)
+        client = self._redis_client()
+        if client is None:
+            return
+        try:
+            client.setex(key, self.ttl_seconds, self.codec.encode(value))
+        except Exception:
+            self._breaker.record_failure()
+        else:
+            self._breaker.record_success()
+
+    def get_many(self, keys: Iterable[str]) -> dict[str, Dict[str, Any]]:
         """
-        Compose a deterministic cache key using the last 8 digits of the card.
+        Look up many keys: L1 first, then a single ``MGET`` for the rest.
         """
 
-        return f"features:{card_number[-8:]}"
+        found, missing = self._split_local(keys)
+        if not missing:
+            return found
+        client = self._redis_client()
+        if client is None:
+            self.misses += len(missing)
+            return found
+        try:
+            blobs = client.mget(missing)
+        except Exception:
+            self._breaker.record_failure()
+            self.misses += len(missing)
+            return found
+        self._breaker.record_success()
+        return self._remember_many(found, missing, blobs)
 
-    def get(self, key: str) -> Optional[Dict[str, Any]]:
-        if self._client:
-            try:
-                data = self._client.get(key)
-                if data:
-                    return json.loads(data)
-            except Exception:
-                self._client = None
-        return self._fallback.get(key)
+    def set_many(self, values: Mapping[str, Dict[str, Any]]) -> None:
+        """
+        Store many keys with one pipelined round trip of ``SETEX`` commands.
+        """
 
-    def set(self, key: str, value: Dict[str, Any]) -> None:
-        encoded = json.dumps(value)
-        if self._client:
-            try:
-                self._client.setex(key, self.ttl_seconds, encoded)
-            except Exception:
-                self._client = None
-        self._fallback[key] = value
+        for key, value in values.items():
+            self._local.set(key, value)
+        client = self._redis_client()
+        if client is None or not values:
+            return
+        try:
+            pipeline = client.pipeline(transaction=False)
+            for key, value in values.items():
+                pipeline.setex(key, self.ttl_seconds, self.codec.encode(value))
+            pipeline.execute()
+        except Exception:
+            self._breaker.record_failure()
+        else:
+            self._breaker.record_success()
 
     def get_features(self, card_number: str) -> Optional[Dict[str, Any]]:
         """
@@ -76,3 +405,111 @@ class FeatureCache:
         """
 
         self.set(self.build_key(card_number), value)
+
+    def get_features_many(self, card_numbers: Iterable[str]) -> dict[str, Dict[str, Any]]:
+        """
+        Retrieve feature blobs for many cards, keyed by card number.
+        """
+
+        keys = {card_number: self.build_key(card_number) for card_number in card_numbers}
+        found = self.get_many(keys.values())
+        return {card: found[key] for card, key in keys.items() if key in found}
+
+    def set_features_many(self, values: Mapping[str, Dict[str, Any]]) -> None:
+        """
+        Cache feature blobs for many cards in one round trip.
+        """
+
+        self.set_many({self.build_key(card): value for card, value in values.items()})
+
+
+class AsyncFeatureCache(_BaseFeatureCache):
+    """
+    Asyncio twin of `FeatureCache` built on ``redis.asyncio`` so cache lookups
+    never block the event loop.
+    """
+
+    def _build_client(self):
+        if redis_asyncio is None:
+            return None
+        try:
+            return redis_asyncio.Redis.from_url(
+                self.redis_url,
+                health_check_interval=30,
+                socket_connect_timeout=self.socket_timeout_seconds,
+                socket_timeout=self.socket_timeout_seconds,
+            )
+        except Exception:
+            return None
+
+    async def get(self, key: str) -> Optional[Dict[str, Any]]:
+        value = self._local_get(key)
+        if value is not None:
+            return value
+        client = self._redis_client()
+        if client is None:
+            self.misses += 1
+            return None
+        try:
+            data = await client.get(key)
+        except Exception:
+            self._breaker.record_failure()
+            self.misses += 1
+            return None
+        self._breaker.record_success()
+        return self._remember(key, data)
+
+    async def set(self, key: str, value: Dict[str, Any]) -> None:
+        self._local.set(key, value)
+        client = self._redis_client()
+        if client is None:
+            return
+        try:
+            await client.setex(key, self.ttl_seconds, self.codec.encode(value))
+        except Exception:
+            self._breaker.record_failure()
+        else:
+            self._breaker.record_success()
+
+    async def get_many(self, keys: Iterable[str]) -> dict[str, Dict[str, Any]]:
+        found, missing = self._split_local(keys)
+        if not missing:
+            return found
+        client = self._redis_client()
+        if client is None:
+            self.misses += len(missing)
+            return found
+        try:
+            blobs = await client.mget(missing)
+        except Exception:
+            self._breaker.record_failure()
+            self.misses += len(missing)
+            return found
+        self._breaker.record_success()
+        return self._remember_many(found, missing, blobs)
+
+    async def set_many(self, values: Mapping[str, Dict[str, Any]]) -> None:
+        for key, value in values.items():
+            self._local.set(key, value)
+        client = self._redis_client()
+        if client is None or not values:
+            return
+        try:
+            pipeline = client.pipeline(transaction=False)
+            for key, value in values.items():
+                pipeline.setex(key, self.ttl_seconds, self.codec.encode(value))
+            await pipeline.execute()
+        except Exception:
+            self._breaker.record_failure()
+        else:
+            self._breaker.record_success()
+
+    async def get_features(self, card_number: str) -> Optional[Dict[str, Any]]:
+        return await self.get(self.build_key(card_number))
+
+    async def set_features(self, card_number: str, value: Dict[str, Any]) -> None:
+        await self.set(self.build_key(card_number), value)
+
+    async def close(self) -> None:
+        if self._client:
+            await self._client.aclose()
@@ -0,0 +1,338 @@
+"""
+Streaming export of transactions and decision audits for reconciliation.
+
+Rows are read through server-side cursors (``yield_per``) and encoded one batch
+at a time, so an export holds about one batch per shard in memory whether it
+covers ten thousand rows or a hundred million. Output is NDJSON or CSV, or,
+with ``pyarrow`` installed, an Arrow IPC stream or a Parquet file with one row
+group per batch.
+"""
+
+from __future__ import annotations
+
+import csv
+import heapq
+import io
+from abc import ABC, abstractmethod
+from contextlib import ExitStack
+from datetime import datetime
+from itertools import islice
+from typing import Any, Iterator, Optional
+
+import orjson
+from sqlalchemy import select
+
+from app import models, schemas
+from app.database import ShardRouter
+from app.services.audit import AuditService
+
+# format -> (media type, file extension)
+EXPORT_FORMATS = {
+    "ndjson": ("application/x-ndjson", "ndjson"),
+    "csv": ("text/csv", "csv"),
+    "arrow": ("application/vnd.apache.arrow.stream", "arrows"),
+    "parquet": ("application/vnd.apache.parquet", "parquet"),
+}
+
+# (column, kind); kinds map to CSV cells and Arrow types. Full card numbers are
+# never exported, only the last four digits `/transaction/{id}` also returns.
+TRANSACTION_COLUMNS = (
+    ("id", "str"),
+    ("card_last4", "str"),
+    ("amount", "float"),
+    ("currency", "str"),
+    ("merchant", "str"),
+    ("channel", "str"),
+    ("device_id", "str"),
+    ("status", "str"),
+    ("risk_flag", "str"),
+    ("created_at", "datetime"),
+)
+AUDIT_COLUMNS = (
+    ("id", "str"),
+    ("transaction_id", "str"),
+    ("request_payload", "json"),
+    ("decision_payload", "json"),
+    ("latency_ms", "float"),
+    ("created_at", "datetime"),
+)
+
+
+class ExportUnavailable(Exception):
+    """
+    Raised when an export format needs an optional dependency that is missing.
+    """
+
+
+def export_transactions(
+    router: ShardRouter,
+    export_format: str = "ndjson",
+    *,
+    created_from: Optional[datetime] = None,
+    created_to: Optional[datetime] = None,
+    batch_size: int = 5_000,
+) -> Iterator[bytes]:
+    """
+    Encoded chunks of every transaction created in ``[created_from, created_to)``,
+    oldest first. Raises `ExportUnavailable` before any row is read.
+    """
+
+    encoder = _encoder(export_format, TRANSACTION_COLUMNS)
+    rows = _transaction_rows(
+        router, created_from=created_from, created_to=created_to, batch_size=batch_size
+    )
+    return _encode(rows, encoder, batch_size)
+
+
+def export_audits(
+    router: ShardRouter,
+    audit_service: AuditService,
+    export_format: str = "ndjson",
+    *,
+    created_from: Optional[datetime] = None,
+    created_to: Optional[datetime] = None,
+    batch_size: int = 5_000,
+) -> Iterator[bytes]:
+    """
+    Encoded chunks of every stored audit created in ``[created_from, created_to)``.
+
+    Audits come in storage order (shard by shard, or partition by partition for
+    segments), not sorted, since sorting would mean buffering the whole range.
+    """
+
+    encoder = _encoder(export_format, AUDIT_COLUMNS)
+    rows = _audit_rows(
+        router,
+        audit_service,
+        created_from=created_from,
+        created_to=created_to,
+        batch_size=batch_size,
+    )
+    return _encode(rows, encoder, batch_size)
+
+
+def _transaction_rows(
+    router: ShardRouter,
+    *,
+    created_from: Optional[datetime],
+    created_to: Optional[datetime],
+    batch_size: int,
+) -> Iterator[dict[str, Any]]:
+    transaction = models.Transaction
+    query = select(
+        transaction.id,
+        transaction.card_number,
+        transaction.amount,
+        transaction.currency,
+        transaction.merchant,
+        transaction.channel,
+        transaction.device_id,
+        transaction.status,
+        transaction.risk_flag,
+        transaction.created_at,
+    )
+    if created_from is not None:
+        query = query.where(transaction.created_at >= created_from)
+    if created_to is not None:
+        query = query.where(transaction.created_at < created_to)
+    # An index range scan over (created_at, id); shards are merged on the same key.
+    query = query.order_by(transaction.created_at, transaction.id).execution_options(
+        yield_per=batch_size
+    )
+    with ExitStack() as stack:
+        streams = [
+            stack.enter_context(router.session(shard)).execute(query)
+            for shard in range(len(router))
+        ]
+        rows = (
+            streams[0]
+            if len(streams) == 1
+            else heapq.merge(*streams, key=lambda row: (row.created_at, row.id))
+        )
+        for row in rows:
+            yield schemas.TransactionResponse.payload(row)
+
+
+def _audit_rows(
+    router: ShardRouter,
+    audit_service: AuditService,
+    *,
+    created_from: Optional[datetime],
+    created_to: Optional[datetime],
+    batch_size: int,
+) -> Iterator[dict[str, Any]]:
+    # Audits still queued for write-behind are left out rather than waited for
+    # on the request thread; they are exported once flushed.
+    if not audit_service.backend.stores_in_database:
+        # Segment audits are not sharded.
+        yield from audit_service.scan(
+            None, created_from=created_from, created_to=created_to, chunk_size=batch_size
+        )
+        return
+    for shard in range(len(router)):
+        with router.session(shard) as session:
+            for row in audit_service.scan(
+                session, created_from=created_from, created_to=created_to, chunk_size=batch_size
+            ):
+                yield schemas.DecisionAuditResponse.payload(row)
+
+
+def _encode(
+    rows: Iterator[dict[str, Any]], encoder: "_Encoder", batch_size: int
+) -> Iterator[bytes]:
+    try:
+        while batch := list(islice(rows, batch_size)):
+            chunk = encoder.write(batch)
+            if chunk:
+                yield chunk
+        chunk = encoder.close()
+        if chunk:
+            yield chunk
+    finally:
+        # Closes the shard sessions promptly when a client disconnects mid-export.
+        rows.close()
+
+
+def _encoder(export_format: str, columns: tuple[tuple[str, str], ...]) -> "_Encoder":
+    if export_format not in EXPORT_FORMATS:
+        raise ValueError(f"Unknown export format {export_format!r}")
+    if export_format == "ndjson":
+        return _NdjsonEncoder(columns)
+    if export_format == "csv":
+        return _CsvEncoder(columns)
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError as exc:
+        raise ExportUnavailable(
+            f"Exporting as {export_format} requires pyarrow (pip install pyarrow)."
+        ) from exc
+    return _ArrowEncoder(columns, parquet=export_format == "parquet")
+
+
+class _Encoder(ABC):
+    """
+    Turns batches of row dicts into bytes; ``close`` returns any trailer.
+    """
+
+    def __init__(self, columns: tuple[tuple[str, str], ...]) -> None:
+        self.columns = columns
+
+    @abstractmethod
+    def write(self, rows: list[dict[str, Any]]) -> bytes:
+        """
+        Encode one batch of rows.
+        """
+
+    def close(self) -> bytes:
+        return b""
+
+
+class _NdjsonEncoder(_Encoder):
+    def write(self, rows: list[dict[str, Any]]) -> bytes:
+        return b"".join(orjson.dumps(row, option=orjson.OPT_APPEND_NEWLINE) for row in rows)
+
+
+class _CsvEncoder(_Encoder):
+    def __init__(self, columns: tuple[tuple[str, str], ...]) -> None:
+        super().__init__(columns)
+        self._buffer = io.StringIO()
+        self._writer = csv.writer(self._buffer)
+        self._writer.writerow([name for name, _ in columns])
+
+    def write(self, rows: list[dict[str, Any]]) -> bytes:
+        self._writer.writerows(
+            [self._cell(row[name], kind) for name, kind in self.columns] for row in rows
+        )
+        return self._drain()
+
+    def close(self) -> bytes:
+        # The header of an empty export.
+        return self._drain()
+
+    def _drain(self) -> bytes:
+        data = self._buffer.getvalue().encode()
+        self._buffer.seek(0)
+        self._buffer.truncate()
+        return data
+
+    @staticmethod
+    def _cell(value: Any, kind: str) -> Any:
+        if value is None:
+            return None
+        if kind == "json":
+            return orjson.dumps(value).decode()
+        if kind == "datetime":
+            return value.isoformat()
+        return value
+
+
+class _ArrowEncoder(_Encoder):
+    def __init__(self, columns: tuple[tuple[str, str], ...], *, parquet: bool) -> None:
+        import pyarrow as pa
+
+        super().__init__(columns)
+        types = {
+            "str": pa.string(),
+            "json": pa.string(),
+            "float": pa.float64(),
+            "datetime": pa.timestamp("us"),
+        }
+        self._schema = pa.schema([(name, types[kind]) for name, kind in columns])
+        self._sink = _Sink()
+        if parquet:
+            import pyarrow.parquet as pq
+
+            self._writer = pq.ParquetWriter(self._sink, self._schema)
+        else:
+            self._writer = pa.ipc.new_stream(self._sink, self._schema)
+
+    def write(self, rows: list[dict[str, Any]]) -> bytes:
+        import pyarrow as pa
+
+        arrays = {}
+        for name, kind in self.columns:
+            values = [row[name] for row in rows]
+            if kind == "json":
+                values = [
+                    None if value is None else orjson.dumps(value).decode() for value in values
+                ]
+            arrays[name] = values
+        self._writer.write_batch(pa.RecordBatch.from_pydict(arrays, schema=self._schema))
+        return self._sink.drain()
+
+    def close(self) -> bytes:
+        self._writer.close()
+        return self._sink.drain()
+
+
+class _Sink(io.RawIOBase):
+    """
+    Write-only file that hands its bytes back on `drain`, for pyarrow writers.
+    """
+
+    def __init__(self) -> None:
+        super().__init__()
+        self._chunks: list[bytes] = []
+        self._position = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data: Any) -> int:
+        chunk = bytes(data)
+        self._chunks.append(chunk)
+        self._position += len(chunk)
+        return len(chunk)
+
+    def tell(self) -> int:
+        return self._position
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+    def close(self) -> None:
+        # pyarrow closes its sink with the writer; keep the bytes for `drain`.
+        return None
+
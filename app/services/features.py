@@ -0,0 +1,80 @@
+"""
+Precomputed synthetic feature table.
+
+Synthetic features are seeded from the last four card digits, so only 10,000
+distinct feature vectors exist. Building them once into three flat float
+arrays turns every lookup into an index operation instead of constructing a
+new `random.Random` per cache miss.
+"""
+
+from __future__ import annotations
+
+import random
+import threading
+from array import array
+from functools import lru_cache
+
+from app.schemas import TransactionFeatures
+
+TABLE_SIZE = 10_000
+
+
+class FeatureTable:
+    """
+    Array-backed feature vectors indexed by ``int(card_number[-4:])``.
+    """
+
+    def __init__(self) -> None:
+        self.spending_velocity = array("d")
+        self.device_trust_score = array("d")
+        self.ip_risk_score = array("d")
+        self._lock = threading.Lock()
+        self._built = False
+
+    @staticmethod
+    def generate(seed: int) -> tuple[float, float, float]:
+        """
+        Reference generator; the table stores exactly these values.
+        """
+
+        rng = random.Random(seed)
+        return (
+            round(rng.uniform(0.1, 0.95), 3),
+            round(rng.uniform(0.2, 0.99), 3),
+            round(rng.uniform(0.05, 0.9), 3),
+        )
+
+    def build(self) -> "FeatureTable":
+        """
+        Populate the arrays once; later calls are no-ops.
+        """
+
+        if self._built:
+            return self
+        with self._lock:
+            if not self._built:
+                for seed in range(TABLE_SIZE):
+                    velocity, trust, ip_risk = self.generate(seed)
+                    self.spending_velocity.append(velocity)
+                    self.device_trust_score.append(trust)
+                    self.ip_risk_score.append(ip_risk)
+                self._built = True
+        return self
+
+    @staticmethod
+    def index(card_number: str) -> int:
+        return int(card_number[-4:])
+
+    def lookup(self, card_number: str) -> TransactionFeatures:
+        self.build()
+        idx = self.index(card_number)
+        return TransactionFeatures.model_construct(
+            spending_velocity=self.spending_velocity[idx],
+            device_trust_score=self.device_trust_score[idx],
+            ip_risk_score=self.ip_risk_score[idx],
+        )
+
+
+@lru_cache
+def get_feature_table() -> FeatureTable:
+    return FeatureTable()
@@ -0,0 +1,290 @@
+"""
+Idempotency-Key handling for `POST /payment`.
+
+The authoritative record is a row in ``idempotency_keys`` (key as primary key)
+written in the same transaction as the payment, so a retry can never create a
+second transaction even when it races the original on another process. The
+read path is tiered to keep duplicate checks cheap:
+
+1. A local Bloom filter of keys this process has stored or seen. A negative
+   answer means "new key" without any network call; the unique constraint
+   still catches keys first stored by another process.
+2. A local LRU of stored responses, so a retry storm against one process is
+   served from memory.
+3. Redis, shared by every process, filled from the database on confirmation.
+4. The database row.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import logging
+import math
+import threading
+from typing import Any, Optional
+
+from redis.exceptions import RedisError
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app import models
+from app.services.cache import CircuitBreaker, LocalLRUCache
+
+logger = logging.getLogger(__name__)
+
+
+class IdempotencyConflict(ValueError):
+    """
+    Raised when a key is reused with a different payment body.
+    """
+
+
+def fingerprint(request_payload: dict[str, Any]) -> str:
+    """
+    Stable digest of a payment body, stored alongside its key.
+    """
+
+    body = json.dumps(request_payload, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.blake2b(body.encode(), digest_size=16).hexdigest()
+
+
+class BloomFilter:
+    """
+    Fixed-size Bloom filter sized for ``capacity`` keys at ``error_rate``.
+
+    Positions come from one 128-bit blake2b digest split into two halves
+    (Kirsch-Mitzenmacher double hashing).
+    """
+
+    def __init__(self, capacity: int = 1_000_000, error_rate: float = 0.001) -> None:
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.size = max(8, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self._bits = bytearray((self.size + 7) // 8)
+        self._lock = threading.Lock()
+        self.count = 0
+
+    def _positions(self, key: str) -> list[int]:
+        digest = hashlib.blake2b(key.encode(), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], "little")
+        second = int.from_bytes(digest[8:], "little") | 1
+        return [(first + index * second) % self.size for index in range(self.hashes)]
+
+    def add(self, key: str) -> None:
+        positions = self._positions(key)
+        with self._lock:
+            for position in positions:
+                self._bits[position >> 3] |= 1 << (position & 7)
+            self.count += 1
+
+    def __contains__(self, key: str) -> bool:
+        bits = self._bits
+        return all(bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(key))
+
+    def clear(self) -> None:
+        with self._lock:
+            self._bits = bytearray(len(self._bits))
+            self.count = 0
+
+
+class IdempotencyStore:
+    """
+    Tiered lookup of stored payment responses by Idempotency-Key.
+    """
+
+    def __init__(
+        self,
+        *,
+        redis: Any = None,
+        ttl_seconds: int = 86_400,
+        bloom: Optional[BloomFilter] = None,
+        local_max_entries: int = 10_000,
+        key_prefix: str = "idempotency",
+        breaker: Optional[CircuitBreaker] = None,
+    ) -> None:
+        self.redis = redis
+        self.ttl_seconds = ttl_seconds
+        self.bloom = bloom or BloomFilter()
+        self.key_prefix = key_prefix
+        self.breaker = breaker or CircuitBreaker()
+        self._local = LocalLRUCache(local_max_entries, ttl_seconds)
+        self.bloom_negatives = 0
+        self.conflicts = 0
+        self.local_hits = 0
+        self.redis_hits = 0
+        self.database_hits = 0
+
+    def lookup(
+        self, db: Session, key: str, request_fingerprint: str
+    ) -> Optional[dict[str, Any]]:
+        """
+        The stored response for ``key``, or None when it was never stored.
+
+        Raises `IdempotencyConflict` if ``key`` was stored for a different body.
+        """
+
+        if not self.maybe_stored(key):
+            return None
+        return self.confirm(db, key, request_fingerprint)
+
+    def maybe_stored(self, key: str) -> bool:
+        """
+        False when ``key`` is certainly new to this process (no lookup needed).
+        """
+
+        if key in self.bloom:
+            return True
+        self.bloom_negatives += 1
+        return False
+
+    def confirm(
+        self, db: Session, key: str, request_fingerprint: str
+    ) -> Optional[dict[str, Any]]:
+        """
+        Look ``key`` up past the Bloom filter, e.g. after losing an insert race.
+        """
+
+        entry = self._local.get(key)
+        if entry is not None:
+            self.local_hits += 1
+        else:
+            entry = self._redis_get(key)
+            if entry is not None:
+                self.redis_hits += 1
+            else:
+                row = db.get(models.IdempotencyKey, key)
+                if row is None:
+                    return None
+                self.database_hits += 1
+                entry = {"fingerprint": row.fingerprint, "response": row.response}
+                self._redis_set(key, entry)
+            self._local.set(key, entry)
+            self.bloom.add(key)
+        return self._checked(key, entry, request_fingerprint)
+
+    async def confirm_async(
+        self, db: AsyncSession, key: str, request_fingerprint: str
+    ) -> Optional[dict[str, Any]]:
+        """
+        `confirm` for the event loop; Redis calls are moved to a thread.
+        """
+
+        entry = self._local.get(key)
+        if entry is not None:
+            self.local_hits += 1
+        else:
+            if self.redis is not None:
+                entry = await asyncio.to_thread(self._redis_get, key)
+            if entry is not None:
+                self.redis_hits += 1
+            else:
+                row = await db.get(models.IdempotencyKey, key)
+                if row is None:
+                    return None
+                self.database_hits += 1
+                entry = {"fingerprint": row.fingerprint, "response": row.response}
+                if self.redis is not None:
+                    await asyncio.to_thread(self._redis_set, key, entry)
+            self._local.set(key, entry)
+            self.bloom.add(key)
+        return self._checked(key, entry, request_fingerprint)
+
+    def _checked(
+        self, key: str, entry: dict[str, Any], request_fingerprint: str
+    ) -> dict[str, Any]:
+        if entry["fingerprint"] != request_fingerprint:
+            self.conflicts += 1
+            raise IdempotencyConflict(key)
+        return entry["response"]
+
+    def row(
+        self, key: str, request_fingerprint: str, transaction_id: str, response: dict[str, Any]
+    ) -> models.IdempotencyKey:
+        """
+        The row to add to the payment's transaction.
+        """
+
+        return models.IdempotencyKey(
+            key=key,
+            fingerprint=request_fingerprint,
+            transaction_id=transaction_id,
+            response=response,
+        )
+
+    def remember(self, key: str, request_fingerprint: str, response: dict[str, Any]) -> None:
+        """
+        Add a committed response to the Bloom filter and LRU. Redis is filled on
+        the first database confirmation, keeping the write path off the network.
+        """
+
+        self.bloom.add(key)
+        self._local.set(key, {"fingerprint": request_fingerprint, "response": response})
+
+    def reset(self) -> None:
+        """
+        Forget every key; the table itself is emptied by `reset_all`.
+        """
+
+        self.bloom.clear()
+        self._local.clear()
+        if self.redis is None:
+            return
+        try:
+            for redis_key in self.redis.scan_iter(match=f"{self.key_prefix}:*", count=1_000):
+                self.redis.delete(redis_key)
+        except RedisError:
+            logger.warning("Idempotency key reset failed", exc_info=True)
+
+    def warm(self, db: Session, limit: int) -> int:
+        """
+        Seed the Bloom filter with up to ``limit`` recently stored keys.
+        """
+
+        keys = db.scalars(
+            select(models.IdempotencyKey.key)
+            .order_by(models.IdempotencyKey.created_at.desc())
+            .limit(limit)
+        ).all()
+        for key in keys:
+            self.bloom.add(key)
+        return len(keys)
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "bloom_keys": self.bloom.count,
+            "bloom_negatives": self.bloom_negatives,
+            "conflicts": self.conflicts,
+            "local_hits": self.local_hits,
+            "redis_hits": self.redis_hits,
+            "database_hits": self.database_hits,
+            "redis_state": self.breaker.state,
+        }
+
+    def _redis_key(self, key: str) -> str:
+        digest = hashlib.blake2b(key.encode(), digest_size=16).hexdigest()
+        return f"{self.key_prefix}:{digest}"
+
+    def _redis_get(self, key: str) -> Optional[dict[str, Any]]:
+        if self.redis is None or not self.breaker.allow():
+            return None
+        try:
+            data = self.redis.get(self._redis_key(key))
+        except RedisError:
+            self.breaker.record_failure()
+            return None
+        self.breaker.record_success()
+        return json.loads(data) if data else None
+
+    def _redis_set(self, key: str, entry: dict[str, Any]) -> None:
+        if self.redis is None or not self.breaker.allow():
+            return
+        try:
+            self.redis.set(self._redis_key(key), json.dumps(entry), ex=self.ttl_seconds)
+        except RedisError:
+            self.breaker.record_failure()
+            return
+        self.breaker.record_success()
@@ -0,0 +1,206 @@
+"""
+Read-through cache for `GET /transaction/{id}` and `GET /audit/{id}` bodies.
+
+Transactions and their audits never change once written, so response bodies
+can be cached until `/admin/reset` wipes them. The first tier is a bounded
+in-process LRU filled on write by the payment handlers (audits only when they
+are written synchronously) and on every database read; the optional second
+tier is Redis, shared by every process and filled on database reads only, so
+the payment path stays off the network.
+
+`clear` also bumps a generation counter in Redis. Every process compares it
+with the generation its own LRU was filled under (at most once per
+``generation_check_seconds``) and drops the LRU when they differ, so a reset
+reaches the other workers' in-process tiers without waiting for their TTL.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from typing import Any, Callable, Optional
+
+import orjson
+from redis.exceptions import RedisError
+
+from app.services.cache import CircuitBreaker, LocalLRUCache
+
+logger = logging.getLogger(__name__)
+
+TRANSACTION = "transaction"
+AUDIT = "audit"
+
+
+class LookupCache:
+    """
+    Two-tier cache of JSON-ready response bodies keyed by kind and id.
+    """
+
+    def __init__(
+        self,
+        *,
+        local_max_entries: int = 10_000,
+        local_ttl_seconds: float = 300.0,
+        redis: Any = None,
+        redis_ttl_seconds: int = 3_600,
+        key_prefix: str = "lookup",
+        breaker: Optional[CircuitBreaker] = None,
+        generation_redis: Any = None,
+        generation_check_seconds: float = 1.0,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.redis = redis
+        # Resets are announced through Redis even when bodies are not cached there.
+        self.generation_redis = generation_redis if generation_redis is not None else redis
+        self.generation_check_seconds = generation_check_seconds
+        self._clock = clock
+        self._generation: Optional[int] = None
+        self._next_generation_check = 0.0
+        self.redis_ttl_seconds = redis_ttl_seconds
+        self.key_prefix = key_prefix
+        self.breaker = breaker or CircuitBreaker()
+        self._local = LocalLRUCache(local_max_entries, local_ttl_seconds)
+        self.local_hits = 0
+        self.redis_hits = 0
+        self.misses = 0
+
+    def get(self, kind: str, key: str) -> Optional[Any]:
+        if self._generation_check_due():
+            self._check_generation()
+        value = self._local.get(f"{kind}:{key}")
+        if value is not None:
+            self.local_hits += 1
+            return value
+        return self._shared_get(kind, key)
+
+    async def get_async(self, kind: str, key: str) -> Optional[Any]:
+        """
+        `get` for the event loop; only Redis calls are moved to a thread.
+        """
+
+        if self._generation_check_due():
+            await asyncio.to_thread(self._check_generation)
+        value = self._local.get(f"{kind}:{key}")
+        if value is not None:
+            self.local_hits += 1
+            return value
+        if self.redis is None:
+            self.misses += 1
+            return None
+        return await asyncio.to_thread(self._shared_get, kind, key)
+
+    def put(self, kind: str, key: str, value: Any) -> None:
+        """
+        Cache a freshly written body in process only.
+        """
+
+        self._local.set(f"{kind}:{key}", value)
+
+    def fill(self, kind: str, key: str, value: Any) -> None:
+        """
+        Cache a body read from the database in every tier.
+        """
+
+        self._local.set(f"{kind}:{key}", value)
+        if self.redis is None or not self.breaker.allow():
+            return
+        try:
+            self.redis.set(
+                self._redis_key(kind, key), orjson.dumps(value), ex=self.redis_ttl_seconds
+            )
+        except RedisError:
+            self.breaker.record_failure()
+            return
+        self.breaker.record_success()
+
+    async def fill_async(self, kind: str, key: str, value: Any) -> None:
+        if self.redis is None:
+            self._local.set(f"{kind}:{key}", value)
+        else:
+            await asyncio.to_thread(self.fill, kind, key, value)
+
+    def clear(self) -> None:
+        """
+        Drop every cached body (called by `/admin/reset`).
+
+        Other processes drop their in-process tiers on their next generation
+        check, or within ``local_ttl_seconds`` if Redis cannot be reached.
+        """
+
+        self._local.clear()
+        if self.generation_redis is not None:
+            try:
+                self._generation = int(self.generation_redis.incr(self._generation_key()))
+            except RedisError:
+                logger.warning("Lookup cache generation bump failed", exc_info=True)
+        if self.redis is None:
+            return
+        try:
+            for redis_key in self.redis.scan_iter(match=f"{self.key_prefix}:*", count=1_000):
+                self.redis.delete(redis_key)
+        except RedisError:
+            logger.warning("Lookup cache reset failed", exc_info=True)
+
+    def stats(self) -> dict[str, Any]:
+        lookups = self.local_hits + self.redis_hits + self.misses
+        return {
+            "local_hits": self.local_hits,
+            "redis_hits": self.redis_hits,
+            "misses": self.misses,
+            "hit_rate": round((self.local_hits + self.redis_hits) / lookups, 4) if lookups else 0.0,
+            "local_entries": len(self._local),
+            "evictions": self._local.evictions,
+            "redis_enabled": self.redis is not None,
+            "redis_state": self.breaker.state,
+        }
+
+    def _redis_key(self, kind: str, key: str) -> str:
+        return f"{self.key_prefix}:{kind}:{key}"
+
+    def _generation_key(self) -> str:
+        # Outside the ``{key_prefix}:*`` pattern that `clear` deletes.
+        return f"{self.key_prefix}-generation"
+
+    def _generation_check_due(self) -> bool:
+        return self.generation_redis is not None and self._clock() >= self._next_generation_check
+
+    def _check_generation(self) -> None:
+        """
+        Drop the in-process tier if another process cleared the cache since the
+        last check.
+        """
+
+        self._next_generation_check = self._clock() + self.generation_check_seconds
+        if not self.breaker.allow():
+            return
+        try:
+            data = self.generation_redis.get(self._generation_key())
+        except RedisError:
+            self.breaker.record_failure()
+            return
+        self.breaker.record_success()
+        generation = int(data or 0)
+        # On the first check nothing says which generation the LRU was filled under.
+        if generation != self._generation:
+            self._local.clear()
+        self._generation = generation
+
+    def _shared_get(self, kind: str, key: str) -> Optional[Any]:
+        if self.redis is None or not self.breaker.allow():
+            self.misses += 1
+            return None
+        try:
+            data = self.redis.get(self._redis_key(kind, key))
+        except RedisError:
+            self.breaker.record_failure()
+            self.misses += 1
+            return None
+        self.breaker.record_success()
+        if not data:
+            self.misses += 1
+            return None
+        self.redis_hits += 1
+        value = orjson.loads(data)
+        self._local.set(f"{kind}:{key}", value)
+        return value
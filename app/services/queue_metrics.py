@@ -0,0 +1,136 @@
+"""
+Per-queue background job metrics shared through Redis.
+
+Every worker process records finished jobs into a handful of Redis hashes, so
+throughput and latency aggregate across the whole worker pool and can be read
+from the API without talking to the workers.
+"""
+
+from __future__ import annotations
+
+import time
+from typing import Any, Callable, Iterable, Optional
+
+from app.services.stats import LatencySketch
+
+KEY_PREFIX = "riskops:queue-metrics"
+
+
+def _decode(value: Any) -> str:
+    return value.decode() if isinstance(value, bytes) else str(value)
+
+
+class QueueMetrics:
+    """
+    Job counters, item throughput and a run-time latency sketch per RQ queue.
+    """
+
+    def __init__(
+        self,
+        redis: Any,
+        *,
+        relative_accuracy: float = 0.01,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        self.redis = redis
+        self.relative_accuracy = relative_accuracy
+        self._clock = clock
+        self._sketch = LatencySketch(relative_accuracy)
+
+    @staticmethod
+    def counters_key(queue: str) -> str:
+        return f"{KEY_PREFIX}:{queue}"
+
+    @staticmethod
+    def latency_key(queue: str) -> str:
+        return f"{KEY_PREFIX}:{queue}:run-ms"
+
+    def record(
+        self,
+        queue: str,
+        *,
+        items: int,
+        run_seconds: float,
+        wait_seconds: float,
+        failed: bool = False,
+    ) -> None:
+        """
+        Record one finished job in a single pipelined round trip.
+        """
+
+        now = self._clock()
+        counters = self.counters_key(queue)
+        pipe = self.redis.pipeline(transaction=False)
+        pipe.sadd(f"{KEY_PREFIX}:queues", queue)
+        pipe.hincrby(counters, "jobs", 1)
+        pipe.hincrby(counters, "failed", int(failed))
+        pipe.hincrby(counters, "items", 0 if failed else items)
+        pipe.hincrbyfloat(counters, "run_seconds", run_seconds)
+        pipe.hincrbyfloat(counters, "wait_seconds", max(wait_seconds, 0.0))
+        pipe.hsetnx(counters, "first_ended_at", now)
+        pipe.hset(counters, "last_ended_at", now)
+        pipe.hincrby(self.latency_key(queue), self._sketch.key(run_seconds * 1_000), 1)
+        pipe.execute()
+
+    def queues(self) -> list[str]:
+        return sorted(_decode(name) for name in self.redis.smembers(f"{KEY_PREFIX}:queues"))
+
+    def snapshot(self, queues: Optional[Iterable[str]] = None) -> list[dict[str, Any]]:
+        """
+        Aggregated metrics for ``queues`` (default: every queue seen so far).
+        """
+
+        names = list(queues) if queues is not None else self.queues()
+        pipe = self.redis.pipeline(transaction=False)
+        for name in names:
+            pipe.hgetall(self.counters_key(name))
+            pipe.hgetall(self.latency_key(name))
+            # RQ keeps pending job ids in a list at ``rq:queue:<name>``.
+            pipe.llen(f"rq:queue:{name}")
+        results = pipe.execute()
+        return [
+            self._summarize(name, *results[index * 3 : index * 3 + 3])
+            for index, name in enumerate(names)
+        ]
+
+    def reset(self, queues: Optional[Iterable[str]] = None) -> None:
+        names = list(queues) if queues is not None else self.queues()
+        keys = [key for name in names for key in (self.counters_key(name), self.latency_key(name))]
+        if keys:
+            self.redis.delete(*keys)
+
+    def _summarize(
+        self,
+        queue: str,
+        counters: dict,
+        buckets: dict,
+        depth: int,
+    ) -> dict[str, Any]:
+        values = {_decode(key): float(_decode(value)) for key, value in counters.items()}
+        jobs = int(values.get("jobs", 0))
+        items = int(values.get("items", 0))
+        span = values.get("last_ended_at", 0.0) - values.get("first_ended_at", 0.0)
+        sketch = LatencySketch(self.relative_accuracy)
+        sketch.merge({int(_decode(key)): int(_decode(count)) for key, count in buckets.items()})
+
+        def quantile(q: float) -> Optional[float]:
+            value = sketch.quantile(q)
+            return round(value, 2) if value is not None else None
+
+        return {
+            "queue": queue,
+            "queued": int(depth),
+            "jobs": jobs,
+            "failed": int(values.get("failed", 0)),
+            "items": items,
+            "items_per_second": round(items / span, 2) if span > 0 else None,
+            "mean_wait_ms": round(values.get("wait_seconds", 0.0) * 1_000 / jobs, 2)
+            if jobs
+            else None,
+            "mean_run_ms": round(values.get("run_seconds", 0.0) * 1_000 / jobs, 2)
+            if jobs
+            else None,
+            "run_ms_p50": quantile(0.50),
+            "run_ms_p95": quantile(0.95),
+            "run_ms_p99": quantile(0.99),
+        }
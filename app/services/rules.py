@@ -0,0 +1,615 @@
+"""
+Declarative authorization rules compiled into Python code.
+
+A rule set is an ordered list of rules; the first rule whose conditions all hold
+decides the payment, declining it with that rule's ``decline_rate``. Rule sets
+are loaded from YAML or JSON (or built in Python from `Rule` objects) and
+compiled once. Single payments go through generated functions, dispatched on
+the most common equality field, and batches are evaluated with NumPy masks.
+`RuleEngine` reloads the file when it changes, without a restart.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import math
+import operator
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Iterable, Mapping, Optional, Sequence
+
+import numpy as np
+
+from app.core import config
+from app.core.constants import APPROVED, DECLINED
+from app.services.velocity import FIELDS as VELOCITY_FIELDS
+
+logger = logging.getLogger(__name__)
+
+HIGH_AMOUNT_REASON = "High amount flagged by risk heuristic."
+RANDOM_DECLINE_REASON = "Randomized decline to simulate fraud checks."
+
+NUMERIC_FIELDS = (
+    "amount",
+    "spending_velocity",
+    "device_trust_score",
+    "ip_risk_score",
+    *VELOCITY_FIELDS,
+)
+TEXT_FIELDS = ("currency", "merchant", "channel", "device_id")
+# Argument order of every compiled matcher.
+FIELDS = NUMERIC_FIELDS + TEXT_FIELDS
+
+COMPARISONS = {"eq": "==", "ne": "!=", "gt": ">", "gte": ">=", "lt": "<", "lte": "<="}
+MEMBERSHIP = {"in": "in", "not_in": "not in"}
+NUMPY_COMPARISONS = {
+    "eq": np.equal,
+    "ne": np.not_equal,
+    "gt": np.greater,
+    "gte": np.greater_equal,
+    "lt": np.less,
+    "lte": np.less_equal,
+}
+
+# Velocity counters read as zero when scoring runs without a velocity tracker.
+_NO_VELOCITY = (0.0,) * len(VELOCITY_FIELDS)
+_velocity_values = operator.attrgetter(*VELOCITY_FIELDS)
+
+# Below this many rules keyed on one text field, a flat chain is just as fast.
+DISPATCH_MIN_RULES = 8
+
+
+class RuleError(ValueError):
+    """
+    Raised when a rule set cannot be parsed or compiled.
+    """
+
+
+def _scalar(field: str, value: Any) -> Any:
+    if field in NUMERIC_FIELDS:
+        if isinstance(value, bool) or not isinstance(value, (int, float)):
+            raise RuleError(f"{field} conditions need a number, got {value!r}")
+        if not math.isfinite(value):
+            raise RuleError(f"{field} conditions need a finite number, got {value!r}")
+        return float(value)
+    if value is not None and not isinstance(value, str):
+        raise RuleError(f"{field} conditions need a string, got {value!r}")
+    return value
+
+
+@dataclass(frozen=True, slots=True)
+class Condition:
+    """
+    One ``field <op> value`` test; ``in``/``not_in`` take a list of values.
+    """
+
+    field: str
+    op: str
+    value: Any
+
+    def __post_init__(self) -> None:
+        if self.field not in FIELDS:
+            raise RuleError(f"Unknown rule field {self.field!r}; expected one of {FIELDS}")
+        if self.op in MEMBERSHIP:
+            if isinstance(self.value, (str, bytes)) or not hasattr(self.value, "__iter__"):
+                raise RuleError(f"{self.field} {self.op} needs a list of values")
+            values = frozenset(_scalar(self.field, value) for value in self.value)
+            object.__setattr__(self, "value", values)
+        elif self.op in COMPARISONS:
+            if self.field in TEXT_FIELDS and self.op not in ("eq", "ne"):
+                raise RuleError(f"{self.field} only supports eq, ne, in and not_in")
+            object.__setattr__(self, "value", _scalar(self.field, self.value))
+        else:
+            raise RuleError(f"Unknown operator {self.op!r} for {self.field}")
+
+    def source(self, constants: dict[str, Any]) -> str:
+        if self.op in COMPARISONS:
+            # Validated str/float/None values, so repr() is a safe literal.
+            return f"{self.field} {COMPARISONS[self.op]} {self.value!r}"
+        name = f"_values{len(constants)}"
+        constants[name] = self.value
+        return f"{self.field} {MEMBERSHIP[self.op]} {name}"
+
+
+@dataclass(frozen=True, slots=True)
+class Rule:
+    """
+    Declines matching payments with probability ``decline_rate`` (1.0 always
+    declines, 0.0 always approves); later rules are not consulted.
+    """
+
+    name: str
+    conditions: tuple[Condition, ...] = ()
+    decline_rate: float = 0.0
+    reason: Optional[str] = None
+
+    def __post_init__(self) -> None:
+        if not 0.0 <= self.decline_rate <= 1.0:
+            raise RuleError(f"Rule {self.name!r}: decline_rate must be between 0 and 1")
+        object.__setattr__(self, "conditions", tuple(self.conditions))
+
+    @classmethod
+    def from_dict(cls, raw: Mapping[str, Any], position: int) -> "Rule":
+        if not isinstance(raw, Mapping):
+            raise RuleError(f"Rule {position} must be a mapping, got {raw!r}")
+        unknown = set(raw) - {"name", "when", "decision", "decline_rate", "reason"}
+        name = str(raw.get("name") or f"rule-{position}")
+        if unknown:
+            raise RuleError(f"Rule {name!r}: unknown keys {sorted(map(str, unknown))}")
+        when = raw.get("when") or {}
+        if not isinstance(when, Mapping):
+            raise RuleError(f"Rule {name!r}: when must map fields to tests, got {when!r}")
+        conditions = []
+        for field, spec in when.items():
+            # ``merchant: Foo`` is shorthand for ``merchant: {eq: Foo}``.
+            tests = spec if isinstance(spec, Mapping) else {"eq": spec}
+            conditions.extend(Condition(field, op, value) for op, value in tests.items())
+        reason = raw.get("reason")
+        if reason is not None and not isinstance(reason, str):
+            raise RuleError(f"Rule {name!r}: reason must be a string")
+
+        decision = raw.get("decision")
+        if "decline_rate" in raw:
+            if decision is not None:
+                raise RuleError(f"Rule {name!r}: use either decision or decline_rate")
+            decline_rate = raw["decline_rate"]
+            if isinstance(decline_rate, bool) or not isinstance(decline_rate, (int, float)):
+                raise RuleError(f"Rule {name!r}: decline_rate must be a number")
+        elif decision == "decline":
+            decline_rate = 1.0
+        elif decision in (None, "approve"):
+            decline_rate = 0.0
+        else:
+            raise RuleError(f"Rule {name!r}: decision must be approve or decline")
+        return cls(name, tuple(conditions), float(decline_rate), reason)
+
+
+Entry = tuple[int, Sequence[Condition]]
+
+
+def _function_source(name: str, entries: Sequence[Entry], constants: dict[str, Any]) -> str:
+    lines = [f"def {name}({', '.join(FIELDS)}):"]
+    for index, conditions in entries:
+        test = " and ".join(condition.source(constants) for condition in conditions)
+        lines.append(f"    if {test or 'True'}:\n        return {index}")
+    lines.append("    return -1")
+    return "\n".join(lines)
+
+
+def _keyable(conditions: Sequence[Condition]) -> list[Condition]:
+    return [c for c in conditions if c.field in TEXT_FIELDS and c.op in ("eq", "in")]
+
+
+def _keyed(conditions: Sequence[Condition], field: str) -> list[Condition]:
+    return [c for c in _keyable(conditions) if c.field == field]
+
+
+def _values(condition: Condition) -> Iterable[Any]:
+    return condition.value if condition.op == "in" else (condition.value,)
+
+
+def _dispatch_field(entries: Sequence[Entry]) -> Optional[str]:
+    # Count each rule once per field it can be keyed on.
+    counts = Counter(
+        field for _, conditions in entries for field in {c.field for c in _keyable(conditions)}
+    )
+    if not counts:
+        return None
+    field, count = counts.most_common(1)[0]
+    return field if count >= DISPATCH_MIN_RULES else None
+
+
+class _Compiler:
+    """
+    Generates the source of one matcher module; see `compile_matcher`.
+    """
+
+    def __init__(self) -> None:
+        self.sources: list[str] = []
+        self.constants: dict[str, Any] = {}
+        self.tables: dict[str, dict[Any, str]] = {}
+        self.fields: list[str] = []
+
+    def emit(self, entries: Sequence[Entry]) -> str:
+        name = f"_match{len(self.sources)}"
+        field = _dispatch_field(entries)
+        if field is None:
+            self.sources.append(_function_source(name, entries, self.constants))
+            return name
+        self.sources.append("")  # reserve this function's slot
+        position = len(self.sources) - 1
+        self.fields.append(field)
+
+        keyed = [entry for entry in entries if _keyed(entry[1], field)]
+        keys = {
+            value
+            for _, conditions in keyed
+            for condition in _keyed(conditions, field)
+            for value in _values(condition)
+        }
+        table = {}
+        for key in sorted(keys, key=repr):
+            selected = []
+            for index, conditions in keyed:
+                tests = _keyed(conditions, field)
+                if all(key in _values(c) for c in tests):
+                    # The table lookup already established these tests.
+                    selected.append((index, [c for c in conditions if c not in tests]))
+            table[key] = f"_match{len(self.sources)}"
+            self.sources.append(_function_source(table[key], selected, self.constants))
+        # Rules not keyed on ``field`` may still be keyed on another one.
+        rest = self.emit([entry for entry in entries if not _keyed(entry[1], field)])
+
+        table_name = f"_table{len(self.tables)}"
+        self.tables[table_name] = table
+        arguments = ", ".join(FIELDS)
+        self.sources[position] = (
+            f"def {name}({arguments}):\n"
+            f"    keyed = {table_name}.get({field}, _no_match)({arguments})\n"
+            f"    rest = {rest}({arguments})\n"
+            "    if keyed < 0 or 0 <= rest < keyed:\n"
+            "        return rest\n"
+            "    return keyed"
+        )
+        return name
+
+
+def compile_matcher(rules: Sequence[Rule]) -> tuple[Callable[..., int], tuple[str, ...]]:
+    """
+    Compile ``rules`` into ``match(*FIELDS) -> rule index`` (-1 when none match).
+
+    When many rules test one text field for equality (say, per-merchant rules),
+    one function is generated per value of that field, holding only the rules
+    that can match it, and a dict lookup picks it at run time. The remaining
+    rules are compiled the same way on the next most common field, so the cost
+    depends on the rules relevant to a payment rather than on the rule count.
+    Returns the matcher and the fields it dispatches on.
+    """
+
+    compiler = _Compiler()
+    entry = compiler.emit([(index, rule.conditions) for index, rule in enumerate(rules)])
+    namespace: dict[str, Any] = dict(compiler.constants)
+    namespace["_no_match"] = lambda *_: -1
+    exec(compile("\n\n".join(compiler.sources), "<rules>", "exec"), namespace)
+    for table_name, table in compiler.tables.items():
+        namespace[table_name] = {key: namespace[name] for key, name in table.items()}
+    return namespace[entry], tuple(compiler.fields)
+
+
+class _Batch:
+    """
+    Column views of a batch for `RuleSet.match_many`. Text columns become
+    integer codes, grouped by value on first use.
+    """
+
+    def __init__(self, columns: Mapping[str, Sequence[Any]], fields: Iterable[str]) -> None:
+        self.count = len(next(iter(columns.values()))) if columns else 0
+        self.numbers: dict[str, np.ndarray] = {}
+        self.codes: dict[str, tuple[np.ndarray, dict[Any, int]]] = {}
+        self._groups: dict[str, tuple[np.ndarray, np.ndarray]] = {}
+        for field in fields:
+            if field in NUMERIC_FIELDS:
+                self.numbers[field] = np.asarray(columns[field], dtype=np.float64)
+                continue
+            vocabulary: dict[Any, int] = {}
+            codes = np.fromiter(
+                (vocabulary.setdefault(value, len(vocabulary)) for value in columns[field]),
+                dtype=np.intp,
+                count=self.count,
+            )
+            self.codes[field] = (codes, vocabulary)
+
+    def rows_with(self, field: str, values: Iterable[Any]) -> np.ndarray:
+        codes, vocabulary = self.codes[field]
+        if field not in self._groups:
+            order = np.argsort(codes, kind="stable")
+            bounds = np.searchsorted(codes[order], np.arange(len(vocabulary) + 1))
+            self._groups[field] = (order, bounds)
+        order, bounds = self._groups[field]
+        present = [vocabulary[value] for value in values if value in vocabulary]
+        if len(present) == 1:
+            code = present[0]
+            return order[bounds[code] : bounds[code + 1]]
+        groups = [order[bounds[code] : bounds[code + 1]] for code in present]
+        return np.sort(np.concatenate(groups)) if groups else order[:0]
+
+    def test(self, condition: Condition, rows: np.ndarray) -> np.ndarray:
+        if condition.field in NUMERIC_FIELDS:
+            column = self.numbers[condition.field][rows]
+            if condition.op in MEMBERSHIP:
+                mask = np.isin(column, list(condition.value))
+                return ~mask if condition.op == "not_in" else mask
+            return NUMPY_COMPARISONS[condition.op](column, condition.value)
+
+        codes, vocabulary = self.codes[condition.field]
+        column = codes[rows]
+        if condition.op in MEMBERSHIP:
+            present = [vocabulary[value] for value in condition.value if value in vocabulary]
+            mask = np.isin(column, present)
+            return ~mask if condition.op == "not_in" else mask
+        # Codes are >= 0, so a value absent from the batch matches nothing.
+        return NUMPY_COMPARISONS[condition.op](column, vocabulary.get(condition.value, -1))
+
+
+class RuleSet:
+    """
+    An ordered, compiled list of rules.
+    """
+
+    def __init__(
+        self,
+        rules: Sequence[Rule],
+        *,
+        version: Optional[str] = None,
+        source: Optional[str] = None,
+    ) -> None:
+        self.rules = tuple(rules)
+        self.version = version
+        self.source = source
+        self.fields = frozenset(c.field for rule in self.rules for c in rule.conditions)
+        self._uses_velocity = not self.fields.isdisjoint(VELOCITY_FIELDS)
+        self.match, self.dispatch_fields = compile_matcher(self.rules)
+        # Batches start each rule from the rows sharing one of its keyable values.
+        self._plans = []
+        for rule in self.rules:
+            anchors = _keyable(rule.conditions)
+            anchor = anchors[0] if anchors else None
+            self._plans.append((anchor, [c for c in rule.conditions if c is not anchor]))
+        # Index -1 (no rule matched) picks the trailing "approve" entry.
+        self._decline_rates = np.array([rule.decline_rate for rule in self.rules] + [0.0])
+        self._reasons = np.array([rule.reason for rule in self.rules] + [None], dtype=object)
+
+    def __len__(self) -> int:
+        return len(self.rules)
+
+    @classmethod
+    def from_dict(cls, data: Mapping[str, Any], *, source: Optional[str] = None) -> "RuleSet":
+        if not isinstance(data, Mapping) or not isinstance(data.get("rules"), list):
+            raise RuleError("A rule set needs a top-level 'rules' list")
+        rules = [Rule.from_dict(raw, position) for position, raw in enumerate(data["rules"])]
+        version = data.get("version")
+        return cls(rules, version=None if version is None else str(version), source=source)
+
+    @classmethod
+    def load(cls, path: str | Path) -> "RuleSet":
+        """
+        Read a ``.json``, ``.yaml`` or ``.yml`` rule file.
+        """
+
+        path = Path(path)
+        try:
+            text = path.read_text(encoding="utf-8")
+            if path.suffix in (".yaml", ".yml"):
+                import yaml
+
+                try:
+                    data = yaml.safe_load(text)
+                except yaml.YAMLError as exc:
+                    raise RuleError(f"{path}: {exc}") from exc
+            else:
+                data = json.loads(text)
+        except ValueError as exc:  # json.JSONDecodeError and UnicodeDecodeError
+            raise RuleError(f"{path}: {exc}") from exc
+        return cls.from_dict(data, source=str(path))
+
+    @classmethod
+    def from_settings(cls, settings: config.Settings) -> "RuleSet":
+        """
+        The built-in heuristic: a high-amount rule, then a random decline.
+        """
+
+        return cls(
+            [
+                Rule(
+                    "high_amount",
+                    (Condition("amount", "gt", settings.high_amount_threshold),),
+                    settings.high_amount_decline_rate,
+                    HIGH_AMOUNT_REASON,
+                ),
+                Rule("random_decline", (), settings.random_decline_rate, RANDOM_DECLINE_REASON),
+            ],
+            version="settings",
+            source="settings",
+        )
+
+    def decide(self, payload: Any, features: Any, draw: float) -> tuple[str, Optional[str]]:
+        """
+        Status and reason for one payment; ``draw`` is uniform in [0, 1).
+        """
+
+        velocity = _NO_VELOCITY
+        if self._uses_velocity and features.velocity is not None:
+            velocity = _velocity_values(features.velocity)
+        index = self.match(
+            payload.amount,
+            features.spending_velocity,
+            features.device_trust_score,
+            features.ip_risk_score,
+            *velocity,
+            payload.currency,
+            payload.merchant,
+            payload.channel,
+            payload.device_id,
+        )
+        if index < 0:
+            return APPROVED, None
+        rule = self.rules[index]
+        if draw < rule.decline_rate:
+            return DECLINED, rule.reason
+        return APPROVED, None
+
+    def match_many(self, columns: Mapping[str, Sequence[Any]]) -> np.ndarray:
+        """
+        First matching rule index (or -1) per row of the given field columns.
+
+        Rules are applied in order to the rows no earlier rule matched, and a
+        rule keyed on a text value only looks at the rows holding that value.
+        """
+
+        batch = _Batch(columns, self.fields)
+        matched = np.full(batch.count, -1, dtype=np.intp)
+        pending = np.ones(batch.count, dtype=bool)
+        pending_rows = np.arange(batch.count)
+        for index, (anchor, conditions) in enumerate(self._plans):
+            if anchor is None:
+                rows = pending_rows
+            else:
+                rows = batch.rows_with(anchor.field, _values(anchor))
+                rows = rows[pending[rows]]
+            for condition in conditions:
+                if not rows.size:
+                    break
+                rows = rows[batch.test(condition, rows)]
+            if rows.size:
+                matched[rows] = index
+                pending[rows] = False
+                pending_rows = np.flatnonzero(pending)
+                if not pending_rows.size:
+                    break
+        return matched
+
+    def decide_many(
+        self,
+        payloads: Sequence[Any],
+        features: Sequence[Any],
+        amounts: np.ndarray,
+        draws: np.ndarray,
+    ) -> tuple[list[str], list[Optional[str]]]:
+        """
+        Vectorized counterpart of `decide` for a batch.
+        """
+
+        columns: dict[str, Any] = {"amount": amounts}
+        for field in self.fields:
+            if field in TEXT_FIELDS:
+                columns[field] = [getattr(payload, field) for payload in payloads]
+            elif field in VELOCITY_FIELDS:
+                columns[field] = np.fromiter(
+                    (
+                        getattr(feature_set.velocity, field) if feature_set.velocity else 0.0
+                        for feature_set in features
+                    ),
+                    dtype=np.float64,
+                    count=len(features),
+                )
+            elif field != "amount":
+                columns[field] = np.fromiter(
+                    (getattr(feature_set, field) for feature_set in features),
+                    dtype=np.float64,
+                    count=len(features),
+                )
+        matched = self.match_many(columns)
+        declined = draws < self._decline_rates[matched]
+        statuses = np.where(declined, DECLINED, APPROVED).tolist()
+        reasons = np.where(declined, self._reasons[matched], None).tolist()
+        return statuses, reasons
+
+
+class RuleEngine:
+    """
+    Serves the active rule set, reloading ``path`` when its file changes.
+
+    The file is checked at most every ``reload_interval_seconds``, on the
+    request path. A file that fails to parse or compile is logged and
+    `last_error` is set, but the previous rule set stays active.
+    """
+
+    def __init__(
+        self,
+        default: RuleSet,
+        path: Optional[str | Path] = None,
+        *,
+        reload_interval_seconds: float = 1.0,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.default = default
+        self.path = Path(path) if path else None
+        self.reload_interval_seconds = reload_interval_seconds
+        self._clock = clock
+        self._rules = default
+        self._signature: Optional[tuple[int, int]] = None
+        self._next_check = 0.0
+        self._lock = threading.Lock()
+        self.loaded_at = datetime.now(timezone.utc)
+        self.reloads = 0
+        self.last_error: Optional[str] = None
+        if self.path is not None:
+            # Fail fast on a broken file at startup instead of serving defaults.
+            self._signature = self._stat()
+            self._rules = RuleSet.load(self.path)
+
+    @classmethod
+    def from_settings(cls, settings: config.Settings) -> "RuleEngine":
+        return cls(
+            RuleSet.from_settings(settings),
+            settings.rules_path,
+            reload_interval_seconds=settings.rules_reload_interval_seconds,
+        )
+
+    def current(self) -> RuleSet:
+        if self.path is not None and self._clock() >= self._next_check:
+            self.reload()
+        return self._rules
+
+    def reload(self, force: bool = False) -> bool:
+        """
+        Swap in the rule file if it changed (or ``force``). Returns True when
+        a new rule set was installed.
+        """
+
+        if self.path is None:
+            return False
+        # Another thread is already reloading; keep serving the current rules.
+        if not self._lock.acquire(blocking=False):
+            return False
+        try:
+            self._next_check = self._clock() + self.reload_interval_seconds
+            try:
+                signature = self._stat()
+            except OSError as exc:
+                self._failed(exc)
+                return False
+            if signature == self._signature and not force:
+                return False
+            # Remember even a broken file so it is not re-parsed on every check.
+            self._signature = signature
+            try:
+                rules = RuleSet.load(self.path)
+            except (OSError, RuleError) as exc:
+                self._failed(exc)
+                return False
+            self._rules = rules
+            self.loaded_at = datetime.now(timezone.utc)
+            self.reloads += 1
+            self.last_error = None
+            logger.info(
+                "Loaded %d rules (version %s) from %s", len(rules), rules.version, self.path
+            )
+            return True
+        finally:
+            self._lock.release()
+
+    def _failed(self, exc: Exception) -> None:
+        self.last_error = str(exc)
+        logger.error("Keeping previous rule set; could not load %s: %s", self.path, exc)
+
+    def _stat(self) -> tuple[int, int]:
+        stat = self.path.stat()
+        return stat.st_mtime_ns, stat.st_size
+
+    def info(self) -> dict[str, Any]:
+        rules = self._rules
+        return {
+            "source": rules.source,
+            "version": rules.version,
+            "rules": len(rules),
+            "dispatch_fields": list(rules.dispatch_fields),
+            "loaded_at": self.loaded_at,
+            "reloads": self.reloads,
+            "last_error": self.last_error,
+        }
@@ -0,0 +1,294 @@
+"""
+Incrementally maintained processing statistics backed by a mergeable latency sketch.
+"""
+
+from __future__ import annotations
+
+import math
+import random
+from collections import Counter
+from typing import Any, Iterable, Mapping, Optional
+
+from sqlalchemy import delete, func, select, update
+from sqlalchemy.orm import Session
+
+from app import models
+from app.core.constants import APPROVED, DECLINED
+
+# Counter stripe ids are 1..N; a database from before striping has only row 1.
+STATS_ROW_ID = 1
+
+
+class LatencySketch:
+    """
+    DDSketch-style quantile sketch: values are counted in logarithmic buckets so
+    every quantile estimate is within ``relative_accuracy`` of the true value.
+    Sketches merge by adding bucket counts, which lets the buckets live in a
+    table and be incremented with plain UPSERTs.
+    """
+
+    min_value = 1e-3
+
+    def __init__(self, relative_accuracy: float = 0.01) -> None:
+        self.relative_accuracy = relative_accuracy
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self.gamma)
+        self.buckets: Counter[int] = Counter()
+
+    @property
+    def count(self) -> int:
+        return sum(self.buckets.values())
+
+    def key(self, value: float) -> int:
+        return math.ceil(math.log(max(value, self.min_value)) / self._log_gamma)
+
+    def value(self, key: int) -> float:
+        return 2 * self.gamma**key / (self.gamma + 1)
+
+    def add(self, value: float, count: int = 1) -> None:
+        self.buckets[self.key(value)] += count
+
+    def merge(self, buckets: Mapping[int, int]) -> None:
+        self.buckets.update(buckets)
+
+    def quantile(self, q: float) -> Optional[float]:
+        """
+        Nearest-rank quantile, matching the exact percentile used previously.
+        """
+
+        total = self.count
+        if not total:
+            return None
+        q = max(0.0, min(q, 1.0))
+        rank = max(0, math.ceil(q * total) - 1)
+        seen = 0
+        for key in sorted(self.buckets):
+            seen += self.buckets[key]
+            if seen > rank:
+                return self.value(key)
+        return self.value(max(self.buckets))
+
+
+class StatsService:
+    """
+    Maintains running counters and the latency sketch inside the caller's
+    transaction, so `/stats` reads a fixed number of rows no matter how many
+    transactions exist.
+
+    The counters and latency buckets are striped over ``counter_stripes`` rows
+    each, and a write bumps one random stripe of both, so concurrent payments do
+    not all queue on the same row locks until they commit; `read` adds the
+    stripes back up.
+    """
+
+    def __init__(self, relative_accuracy: float = 0.01, counter_stripes: int = 1) -> None:
+        self.relative_accuracy = relative_accuracy
+        self.counter_stripes = max(counter_stripes, 1)
+
+    def record(self, db: Session, *, status: str, amount: float, latency_ms: float) -> None:
+        self.record_many(db, [(status, amount, latency_ms)])
+
+    def record_many(self, db: Session, entries: Iterable[tuple[str, float, float]]) -> None:
+        """
+        Add ``(status, amount, latency_ms)`` entries; the caller commits.
+        """
+
+        sketch = LatencySketch(self.relative_accuracy)
+        totals = {"total": 0, "approved": 0, "declined": 0, "amount_sum": 0.0}
+        for status, amount, latency_ms in entries:
+            totals["total"] += 1
+            totals["approved"] += status == APPROVED
+            totals["declined"] += status == DECLINED
+            totals["amount_sum"] += amount
+            sketch.add(latency_ms)
+        if totals["total"]:
+            self.apply(db, totals, sketch.buckets)
+
+    def apply(
+        self,
+        db: Session,
+        totals: Mapping[str, float],
+        buckets: Mapping[int, int],
+    ) -> None:
+        """
+        Increment the counter row and sketch buckets by pre-aggregated deltas.
+        """
+
+        stripe = random.randrange(self.counter_stripes)
+        _upsert_increment(
+            db,
+            models.StatsCounter,
+            [{"id": STATS_ROW_ID + stripe, **totals}],
+            ("total", "approved", "declined", "amount_sum"),
+        )
+        # Sorted keys keep concurrent writers locking buckets in the same order.
+        _upsert_increment(
+            db,
+            models.LatencyBucket,
+            [
+                {"stripe": stripe, "bucket": key, "count": buckets[key]}
+                for key in sorted(buckets)
+            ],
+            ("count",),
+        )
+
+    def snapshot(self, db: Session) -> dict[str, Any]:
+        return self.combine([self.read(db)])
+
+    def read(self, db: Session) -> tuple[tuple[int, int, int, float], dict[int, int]]:
+        """
+        Raw counters and sketch buckets of one database (or shard).
+        """
+
+        counter = models.StatsCounter
+        row = db.execute(
+            select(
+                func.coalesce(func.sum(counter.total), 0),
+                func.coalesce(func.sum(counter.approved), 0),
+                func.coalesce(func.sum(counter.declined), 0),
+                func.coalesce(func.sum(counter.amount_sum), 0.0),
+            )
+        ).one()
+        bucket = models.LatencyBucket
+        buckets = db.execute(select(bucket.bucket, func.sum(bucket.count)).group_by(bucket.bucket))
+        total, approved, declined, amount_sum = row
+        return (int(total), int(approved), int(declined), float(amount_sum)), {
+            key: int(count) for key, count in buckets
+        }
+
+    def combine(
+        self, parts: Iterable[tuple[tuple[int, int, int, float], Mapping[int, int]]]
+    ) -> dict[str, Any]:
+        """
+        Merge `read` results from every shard; counters add up and so do the
+        sketch buckets, so quantiles stay within the sketch's accuracy.
+        """
+
+        total = approved = declined = 0
+        amount_sum = 0.0
+        sketch = LatencySketch(self.relative_accuracy)
+        for (shard_total, shard_approved, shard_declined, shard_amount), buckets in parts:
+            total += shard_total
+            approved += shard_approved
+            declined += shard_declined
+            amount_sum += shard_amount
+            sketch.merge(buckets)
+        return self.to_payload(
+            total=total,
+            approved=approved,
+            declined=declined,
+            amount_sum=amount_sum,
+            sketch=sketch,
+        )
+
+    @staticmethod
+    def to_payload(
+        *,
+        total: int,
+        approved: int,
+        declined: int,
+        amount_sum: float,
+        sketch: LatencySketch,
+    ) -> dict[str, Any]:
+        p95_latency = sketch.quantile(0.95)
+        return {
+            "total": total,
+            "approved": approved,
+            "declined": declined,
+            "approval_rate": round(approved / total, 4) if total else 0.0,
+            "avg_amount": round(amount_sum / total, 2) if total else 0.0,
+            "p95_latency": round(p95_latency, 2) if p95_latency is not None else None,
+        }
+
+    def reset(self, db: Session) -> None:
+        """
+        Zero every counter and bucket; the caller commits.
+        """
+
+        db.execute(delete(models.LatencyBucket))
+        db.execute(delete(models.StatsCounter))
+
+    def rebuild(
+        self,
+        db: Session,
+        chunk_size: int = 10_000,
+        latencies: Optional[Iterable[float]] = None,
+    ) -> dict[str, Any]:
+        """
+        Recompute counters and the sketch from the source tables and commit.
+
+        ``latencies`` overrides where audit latencies come from (e.g. audit
+        segments); by default they are streamed from ``decision_audits``.
+        """
+
+        self.reset(db)
+        totals = {"total": 0, "approved": 0, "declined": 0, "amount_sum": 0.0}
+        rows = db.execute(
+            select(
+                models.Transaction.status,
+                func.count(models.Transaction.id),
+                func.coalesce(func.sum(models.Transaction.amount), 0.0),
+            ).group_by(models.Transaction.status)
+        )
+        for status, count, amount_sum in rows:
+            totals["total"] += count
+            totals["amount_sum"] += float(amount_sum)
+            if status == APPROVED:
+                totals["approved"] = count
+            elif status == DECLINED:
+                totals["declined"] = count
+
+        sketch = LatencySketch(self.relative_accuracy)
+        if latencies is None:
+            rows = db.execute(
+                select(models.DecisionAudit.latency_ms).execution_options(yield_per=chunk_size)
+            )
+            latencies = (latency_ms for (latency_ms,) in rows if latency_ms is not None)
+        for latency_ms in latencies:
+            sketch.add(latency_ms)
+
+        if totals["total"] or sketch.buckets:
+            self.apply(db, totals, sketch.buckets)
+        db.commit()
+        return self.snapshot(db)
+
+
+def _upsert_increment(
+    db: Session,
+    model: type,
+    rows: list[dict[str, Any]],
+    increment_columns: tuple[str, ...],
+) -> None:
+    """
+    Insert ``rows`` or add their values onto existing rows sharing a primary key.
+    """
+
+    if not rows:
+        return
+    table = model.__table__
+    dialect = db.get_bind().dialect.name
+    if dialect in ("postgresql", "sqlite"):
+        if dialect == "postgresql":
+            from sqlalchemy.dialects.postgresql import insert
+        else:
+            from sqlalchemy.dialects.sqlite import insert
+        statement = insert(table).values(rows)
+        statement = statement.on_conflict_do_update(
+            index_elements=[column.name for column in table.primary_key],
+            set_={
+                name: table.c[name] + getattr(statement.excluded, name)
+                for name in increment_columns
+            },
+        )
+        db.execute(statement)
+        return
+
+    for values in rows:
+        key = {column.name: values[column.name] for column in table.primary_key}
+        result = db.execute(
+            update(table)
+            .filter_by(**key)
+            .values({name: table.c[name] + values[name] for name in increment_columns})
+        )
+        if not result.rowcount:
+            db.execute(table.insert().values(**values))
@@ -0,0 +1,114 @@
+"""
+Push `/stats` to any number of viewers for the cost of one.
+
+`StatsBroadcaster` runs a single producer task per process while anyone is
+subscribed: every ``interval_seconds`` it computes the stats once and hands
+the fields that changed to each subscriber. A subscriber first receives the
+latest full snapshot. Slow subscribers never hold up the producer; their
+pending deltas are merged so they catch up with the newest values.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+from typing import Any, AsyncIterator, Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+# (event name, payload): "snapshot" carries every field, "delta" the changed ones.
+StatsEvent = tuple[str, dict[str, Any]]
+
+
+class _Subscriber:
+    __slots__ = ("pending", "ready")
+
+    def __init__(self) -> None:
+        self.pending: dict[str, Any] = {}
+        self.ready = asyncio.Event()
+
+    def push(self, delta: dict[str, Any]) -> None:
+        self.pending.update(delta)
+        self.ready.set()
+
+    def take(self) -> dict[str, Any]:
+        delta, self.pending = self.pending, {}
+        self.ready.clear()
+        return delta
+
+
+class StatsBroadcaster:
+    """
+    Computes stats once per tick and fans the changes out to subscribers.
+    """
+
+    def __init__(
+        self,
+        compute: Callable[[], dict[str, Any]],
+        *,
+        interval_seconds: float = 1.0,
+    ) -> None:
+        self.compute = compute
+        self.interval_seconds = interval_seconds
+        self.ticks = 0
+        self._latest: Optional[dict[str, Any]] = None
+        self._subscribers: set[_Subscriber] = set()
+        self._task: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    @property
+    def subscribers(self) -> int:
+        return len(self._subscribers)
+
+    async def subscribe(
+        self, heartbeat_seconds: Optional[float] = None
+    ) -> AsyncIterator[Optional[StatsEvent]]:
+        """
+        Yield a snapshot, then deltas as they are produced. With
+        ``heartbeat_seconds``, None is yielded after that long without changes.
+        """
+
+        subscriber = _Subscriber()
+        self._subscribers.add(subscriber)
+        self._ensure_running()
+        try:
+            if self._latest is None:
+                self._latest = await asyncio.to_thread(self.compute)
+            # Deltas pushed so far are already part of the snapshot.
+            snapshot = dict(self._latest)
+            subscriber.take()
+            yield "snapshot", snapshot
+            while True:
+                try:
+                    await asyncio.wait_for(subscriber.ready.wait(), heartbeat_seconds)
+                except asyncio.TimeoutError:
+                    yield None
+                    continue
+                yield "delta", subscriber.take()
+        finally:
+            self._subscribers.discard(subscriber)
+
+    def _ensure_running(self) -> None:
+        loop = asyncio.get_running_loop()
+        if self._task is None or self._task.done() or self._loop is not loop:
+            self._loop = loop
+            self._task = loop.create_task(self._run())
+
+    async def _run(self) -> None:
+        while self._subscribers:
+            await asyncio.sleep(self.interval_seconds)
+            if not self._subscribers:
+                break
+            try:
+                snapshot = await asyncio.to_thread(self.compute)
+            except Exception:
+                logger.exception("Stats stream tick failed")
+                continue
+            self.ticks += 1
+            previous, self._latest = self._latest or {}, snapshot
+            delta = {key: value for key, value in snapshot.items() if previous.get(key) != value}
+            if delta:
+                for subscriber in self._subscribers:
+                    subscriber.push(delta)
+        # The next subscriber starts from a fresh snapshot.
+        self._latest = None
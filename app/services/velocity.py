@@ -0,0 +1,280 @@
+"""
+Sliding-window velocity counters per card and per device.
+
+Each window (1 minute, 1 hour, 24 hours) is a ring of ``buckets`` time slots
+holding a count and an amount sum, plus running totals. Recording a payment
+advances the ring (clearing at most ``buckets`` expired slots), adds to the
+current slot and returns the totals, so both updates and reads are O(1) per
+event and never query the ``transactions`` table. Windows slide in steps of
+``window / buckets``.
+
+`InMemoryVelocity` keeps the rings in process, bounded by an LRU over keys.
+`RedisVelocity` keeps them in one Redis hash per card or device, updated by a
+Lua script, so every API and worker process shares the same counts.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Iterable, Optional, Sequence
+
+from redis.exceptions import RedisError
+
+from app.services.cache import CircuitBreaker
+
+logger = logging.getLogger(__name__)
+
+WINDOWS = (("1m", 60.0), ("1h", 3_600.0), ("24h", 86_400.0))
+ENTITIES = ("card", "device")
+FIELDS = tuple(
+    f"{entity}_{metric}_{window}"
+    for entity in ENTITIES
+    for window, _ in WINDOWS
+    for metric in ("count", "amount")
+)
+
+# (count field, amount field) per window, for each entity.
+_NAMES = {
+    entity: [(f"{entity}_count_{window}", f"{entity}_amount_{window}") for window, _ in WINDOWS]
+    for entity in ENTITIES
+}
+
+# Velocity event: (card_number, device_id or None, amount).
+Event = tuple[str, Optional[str], float]
+
+
+def spending_velocity(values: dict[str, float], reference_amount: float) -> float:
+    """
+    Normalized spending velocity: the card's spend over the last hour relative
+    to ``reference_amount``, capped at 1.
+    """
+
+    return round(min(values["card_amount_1h"] / reference_amount, 1.0), 3)
+
+
+def _empty(entity: str) -> dict[str, float]:
+    return {field: 0.0 for field in FIELDS if field.startswith(f"{entity}_")}
+
+
+class _Rings:
+    """
+    Ring buckets and running totals of every window for one key.
+    """
+
+    __slots__ = ("ticks", "counts", "sums", "count_totals", "sum_totals")
+
+    def __init__(self, buckets: int) -> None:
+        self.ticks = [-1] * len(WINDOWS)
+        self.counts = [0] * (len(WINDOWS) * buckets)
+        self.sums = [0.0] * (len(WINDOWS) * buckets)
+        self.count_totals = [0] * len(WINDOWS)
+        self.sum_totals = [0.0] * len(WINDOWS)
+
+
+class InMemoryVelocity:
+    """
+    Per-process velocity counters; the least recently seen keys are dropped
+    beyond ``max_keys``.
+    """
+
+    def __init__(
+        self,
+        *,
+        buckets: int = 12,
+        max_keys: int = 100_000,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        self.buckets = buckets
+        self.max_keys = max_keys
+        self._clock = clock
+        self._widths = [seconds / buckets for _, seconds in WINDOWS]
+        self._rings: OrderedDict[str, _Rings] = OrderedDict()
+        self._lock = threading.Lock()
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._rings)
+
+    def record(
+        self, card_number: str, device_id: Optional[str], amount: float
+    ) -> dict[str, float]:
+        """
+        Count one payment and return the velocity features including it.
+        """
+
+        now = self._clock()
+        with self._lock:
+            values = self._add("card", f"c:{card_number}", amount, now)
+            if device_id:
+                values.update(self._add("device", f"d:{device_id}", amount, now))
+            else:
+                values.update(_empty("device"))
+        return values
+
+    def record_many(self, events: Sequence[Event]) -> list[dict[str, float]]:
+        # In order, so repeated cards within a batch see the earlier payments.
+        return [self.record(*event) for event in events]
+
+    def reset(self) -> None:
+        with self._lock:
+            self._rings.clear()
+
+    def _add(self, entity: str, key: str, amount: float, now: float) -> dict[str, float]:
+        rings = self._rings.get(key)
+        if rings is None:
+            rings = self._rings[key] = _Rings(self.buckets)
+            if len(self._rings) > self.max_keys:
+                self._rings.popitem(last=False)
+                self.evictions += 1
+        else:
+            self._rings.move_to_end(key)
+
+        values = {}
+        buckets = self.buckets
+        for window_index, (count_name, amount_name) in enumerate(_NAMES[entity]):
+            tick = int(now // self._widths[window_index])
+            base = window_index * buckets
+            last = rings.ticks[window_index]
+            if tick > last:
+                # Clear the slots that fell out of the window since the last event.
+                for step in range(1, min(tick - last, buckets) + 1):
+                    slot = base + (last + step) % buckets
+                    rings.count_totals[window_index] -= rings.counts[slot]
+                    rings.sum_totals[window_index] -= rings.sums[slot]
+                    rings.counts[slot] = 0
+                    rings.sums[slot] = 0.0
+                rings.ticks[window_index] = tick
+            # A clock that stepped back counts towards the newest slot.
+            slot = base + rings.ticks[window_index] % buckets
+            rings.counts[slot] += 1
+            rings.sums[slot] += amount
+            rings.count_totals[window_index] += 1
+            rings.sum_totals[window_index] += amount
+            values[count_name] = float(rings.count_totals[window_index])
+            values[amount_name] = round(rings.sum_totals[window_index], 2)
+        return values
+
+
+# KEYS[1]: the key's hash. ARGV: now, amount, buckets, window widths...
+# Fields are "<window>:<slot>:t|c|s" (tick, count, sum), so a hash holds at most
+# 3 * windows * buckets fields and a recycled slot is reset when its tick is stale.
+RECORD_SCRIPT = """
+local now = tonumber(ARGV[1])
+local amount = tonumber(ARGV[2])
+local buckets = tonumber(ARGV[3])
+local result = {}
+for w = 1, #ARGV - 3 do
+    local tick = math.floor(now / tonumber(ARGV[3 + w]))
+    local prefix = w .. ':' .. (tick % buckets) .. ':'
+    if tonumber(redis.call('HGET', KEYS[1], prefix .. 't')) ~= tick then
+        redis.call('HSET', KEYS[1], prefix .. 't', tick, prefix .. 'c', 0, prefix .. 's', 0)
+    end
+    redis.call('HINCRBY', KEYS[1], prefix .. 'c', 1)
+    redis.call('HINCRBYFLOAT', KEYS[1], prefix .. 's', amount)
+    local count, total = 0, 0
+    for slot = 0, buckets - 1 do
+        local slot_prefix = w .. ':' .. slot .. ':'
+        local fields = redis.call(
+            'HMGET', KEYS[1], slot_prefix .. 't', slot_prefix .. 'c', slot_prefix .. 's'
+        )
+        local slot_tick = tonumber(fields[1])
+        if slot_tick and slot_tick > tick - buckets then
+            count = count + tonumber(fields[2])
+            total = total + tonumber(fields[3])
+        end
+    end
+    result[#result + 1] = count
+    -- Lua numbers are truncated to integers on return, so send sums as strings.
+    result[#result + 1] = tostring(total)
+end
+-- Keep the hash for the longest window plus one slot after its last event.
+redis.call('EXPIRE', KEYS[1], math.ceil(tonumber(ARGV[#ARGV]) * (buckets + 1)))
+return result
+"""
+
+
+class RedisVelocity:
+    """
+    Velocity counters shared through Redis; one round trip per payment or batch.
+
+    Card numbers are hashed before they are used in key names. While Redis is
+    failing (see `CircuitBreaker`), `record` returns None and payments are
+    scored without velocity features instead of waiting on Redis.
+    """
+
+    def __init__(
+        self,
+        redis: Any,
+        *,
+        buckets: int = 12,
+        clock: Callable[[], float] = time.time,
+        key_prefix: str = "velocity",
+        breaker: Optional[CircuitBreaker] = None,
+    ) -> None:
+        self.redis = redis
+        self.buckets = buckets
+        self.key_prefix = key_prefix
+        self.breaker = breaker or CircuitBreaker()
+        self._clock = clock
+        self._widths = [seconds / buckets for _, seconds in WINDOWS]
+        self._script = redis.register_script(RECORD_SCRIPT)
+
+    def key(self, entity: str, value: str) -> str:
+        digest = hashlib.blake2b(value.encode(), digest_size=12).hexdigest()
+        return f"{self.key_prefix}:{entity}:{digest}"
+
+    def record(
+        self, card_number: str, device_id: Optional[str], amount: float
+    ) -> Optional[dict[str, float]]:
+        values = self.record_many([(card_number, device_id, amount)])
+        return values[0] if values else None
+
+    def record_many(self, events: Sequence[Event]) -> Optional[list[dict[str, float]]]:
+        if not self.breaker.allow():
+            return None
+        now = self._clock()
+        pipe = self.redis.pipeline(transaction=False)
+        for card_number, device_id, amount in events:
+            self._queue(pipe, "card", card_number, amount, now)
+            if device_id:
+                self._queue(pipe, "device", device_id, amount, now)
+        try:
+            results = iter(pipe.execute())
+        except RedisError:
+            self.breaker.record_failure()
+            logger.warning("Velocity update failed; scoring without velocity", exc_info=True)
+            return None
+        self.breaker.record_success()
+        values = []
+        for _card_number, device_id, _amount in events:
+            row = self._values("card", next(results))
+            row.update(self._values("device", next(results)) if device_id else _empty("device"))
+            values.append(row)
+        return values
+
+    def reset(self) -> None:
+        try:
+            for key in self.redis.scan_iter(match=f"{self.key_prefix}:*", count=1_000):
+                self.redis.delete(key)
+        except RedisError:
+            logger.warning("Velocity reset failed", exc_info=True)
+
+    def _queue(self, pipe: Any, entity: str, value: str, amount: float, now: float) -> None:
+        self._script(
+            keys=[self.key(entity, value)],
+            args=[repr(now), repr(float(amount)), self.buckets, *map(repr, self._widths)],
+            client=pipe,
+        )
+
+    @staticmethod
+    def _values(entity: str, result: Iterable[Any]) -> dict[str, float]:
+        result = list(result)
+        values = {}
+        for index, (count_name, amount_name) in enumerate(_NAMES[entity]):
+            values[count_name] = float(result[index * 2])
+            values[amount_name] = round(float(result[index * 2 + 1]), 2)
+        return values
@@ -1,54 +1,154 @@
-import math
-from typing import Any, Iterable, List, Optional
+import base64
+import binascii
+from datetime import datetime, timezone
+from typing import Any, Optional
 
-from sqlalchemy import func
+import orjson
+from fastapi import status
+from fastapi.responses import ORJSONResponse
+from sqlalchemy import literal, select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
 from app import models
-from app.core.constants import APPROVED, DECLINED
+from app.core import config
+from app.core.constants import IDEMPOTENT_REPLAY_HEADER
+from app.database import ShardRouter, get_shard_router
+from app.services.stats import StatsService
 
 
-def calculate_stats(db: Session) -> dict[str, Any]:
+def calculate_stats(db: Session, router: Optional[ShardRouter] = None) -> dict[str, Any]:
     """
     Compute aggregate metrics across transactions.
+
+    Reads the running counters and latency sketch maintained on every write,
+    so the cost is independent of table size. Use `scripts/rebuild_stats.py`
+    to recompute them from the source tables. With several shards each one is
+    read concurrently and the results are merged (``db`` is then unused).
     """
-    total = db.query(func.count(models.Transaction.id)).scalar() or 0
-    approved = (
-        db.query(func.count(models.Transaction.id))
-        .filter(models.Transaction.status == APPROVED)
-        .scalar()
-        or 0
-    )
-    declined = (
-        db.query(func.count(models.Transaction.id))
-        .filter(models.Transaction.status == DECLINED)
-        .scalar()
-        or 0
-    )
-    avg_amount = (
-        db.query(func.coalesce(func.avg(models.Transaction.amount), 0.0)).scalar() or 0.0
-    )
-    approval_rate = approved / total if total else 0.0
-    p95_latency = _calculate_percentile(
-        [value for (value,) in db.query(models.DecisionAudit.latency_ms).all()],
-        percentile=0.95,
+    settings = config.get_settings()
+    service = StatsService(settings.stats_sketch_relative_accuracy)
+    router = router or get_shard_router()
+    if len(router) == 1:
+        return service.snapshot(db)
+    return service.combine(router.scatter(service.read))
+
+
+async def calculate_stats_async(db: AsyncSession) -> dict[str, Any]:
+    """
+    `calculate_stats` for the asyncio path.
+    """
+    router = get_shard_router()
+    if len(router) == 1:
+        return await db.run_sync(calculate_stats)
+    settings = config.get_settings()
+    service = StatsService(settings.stats_sketch_relative_accuracy)
+    return service.combine(await router.scatter_async(service.read))
+
+
+def replay_response(stored: dict[str, Any]) -> ORJSONResponse:
+    """
+    Replay the response stored for an Idempotency-Key, flagged as a replay.
+    """
+    return ORJSONResponse(
+        stored,
+        status_code=status.HTTP_201_CREATED,
+        headers={IDEMPOTENT_REPLAY_HEADER: "true"},
     )
 
-    return {
-        "total": total,
-        "approved": approved,
-        "declined": declined,
-        "approval_rate": round(approval_rate, 4),
-        "avg_amount": round(float(avg_amount), 2),
-        "p95_latency": p95_latency,
-    }
-
-
-def _calculate_percentile(values: Iterable[float], percentile: float) -> Optional[float]:
-    data: List[float] = sorted(value for value in values if value is not None)
-    if not data:
-        return None
-    percentile = max(0.0, min(percentile, 1.0))
-    index = math.ceil(percentile * len(data)) - 1
-    index = max(0, index)
-    return round(data[index], 2)
+
+class InvalidCursor(ValueError):
+    """
+    Raised when a pagination cursor cannot be decoded.
+    """
+
+
+def as_naive_utc(value: Optional[datetime]) -> Optional[datetime]:
+    """
+    Timestamps are stored as naive UTC; convert aware client bounds to match.
+    """
+
+    if value is None or value.tzinfo is None:
+        return value
+    return value.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+def encode_cursor(created_at: datetime, transaction_id: str) -> str:
+    """
+    Opaque keyset cursor: the (created_at, id) of the last row on a page.
+    """
+
+    raw = orjson.dumps([created_at.isoformat(), transaction_id])
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, str]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        created_at, transaction_id = orjson.loads(raw)
+        created_at = datetime.fromisoformat(created_at)
+    except (binascii.Error, orjson.JSONDecodeError, TypeError, ValueError) as exc:
+        raise InvalidCursor("Malformed pagination cursor.") from exc
+    transaction_id = models.parse_id(transaction_id)
+    if transaction_id is None:
+        raise InvalidCursor("Malformed pagination cursor.")
+    return created_at, transaction_id
+
+
+def list_transactions(
+    db: Session,
+    *,
+    limit: int,
+    router: Optional[ShardRouter] = None,
+    cursor: Optional[str] = None,
+    status: Optional[str] = None,
+    merchant: Optional[str] = None,
+    card_last4: Optional[str] = None,
+    created_from: Optional[datetime] = None,
+    created_to: Optional[datetime] = None,
+) -> tuple[list[models.Transaction], Optional[str]]:
+    """
+    One page of transactions, newest first, plus the cursor for the next page.
+
+    Keyset pagination seeks past the previous page's last (created_at, id)
+    instead of using OFFSET, so every page is an index range scan over one of
+    the composite indexes on `Transaction`, however deep the caller pages. With
+    several shards the same page is read from each and the results merged.
+    """
+
+    transaction = models.Transaction
+    query = select(transaction)
+    if status is not None:
+        query = query.where(transaction.status == status)
+    if merchant is not None:
+        query = query.where(transaction.merchant == merchant)
+    if card_last4 is not None:
+        query = query.where(transaction.card_last4 == card_last4)
+    if created_from is not None:
+        query = query.where(transaction.created_at >= created_from)
+    if created_to is not None:
+        query = query.where(transaction.created_at < created_to)
+    if cursor is not None:
+        cursor_created_at, cursor_id = decode_cursor(cursor)
+        query = query.where(
+            tuple_(transaction.created_at, transaction.id)
+            < tuple_(
+                # Typed binds so the id compares in its stored (binary) form.
+                literal(cursor_created_at, transaction.created_at.type),
+                literal(cursor_id, transaction.id.type),
+            )
+        )
+    query = query.order_by(transaction.created_at.desc(), transaction.id.desc()).limit(limit + 1)
+
+    router = router or get_shard_router()
+    if len(router) == 1:
+        rows = list(db.scalars(query))
+    else:
+        rows = []
+        for shard_rows in router.scatter(lambda session: list(session.scalars(query))):
+            rows.extend(shard_rows)
+        rows.sort(key=lambda row: (row.created_at, row.id), reverse=True)
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, encode_cursor(rows[-1].created_at, rows[-1].id)
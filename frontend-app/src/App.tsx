@@ -32,9 +32,7 @@ function App() {
     audits: false
   });
 
-  useEffect(() => {
-    refreshStats();
-  }, []);
+  useEffect(() => api.streamStats(setStats), []);
 
   const refreshStats = async () => {
     setLoading((state) => ({ ...state, stats: true }));
@@ -55,7 +53,6 @@ function App() {
       const response = await api.postPayment(paymentPayload);
       setPaymentResult(response);
       setTransactionLookup(response.transaction_id);
-      await refreshStats();
       await fetchAuditLogs(response.transaction_id);
     } catch (error) {
       console.error(error);
@@ -249,7 +246,7 @@ function App() {
 
         <section>
           <h2>3. Platform metrics</h2>
-          <p className="caption">Live stats produced by the SQL aggregation helpers.</p>
+          <p className="caption">Live stats pushed by the /stats/stream endpoint.</p>
           <button type="button" disabled={loading.stats} onClick={refreshStats}>
             {loading.stats ? "Refreshing…" : "Refresh metrics"}
           </button>
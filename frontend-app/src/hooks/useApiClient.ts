@@ -45,10 +45,27 @@ async function request<T>(path: string, method: HttpMethod, body?: unknown): Pro
   return response.json() as Promise<T>;
 }
 
+// Live stats over Server-Sent Events: a full snapshot, then changed fields only.
+function streamStats(onStats: (stats: StatsResponse) => void): () => void {
+  const source = new EventSource(`${API_BASE}/stats/stream`);
+  let current: StatsResponse | null = null;
+  const apply = (event: MessageEvent<string>) => {
+    current = { ...(current ?? {}), ...JSON.parse(event.data) } as StatsResponse;
+    onStats(current);
+  };
+  source.addEventListener("snapshot", (event) => {
+    current = null;
+    apply(event as MessageEvent<string>);
+  });
+  source.addEventListener("delta", (event) => apply(event as MessageEvent<string>));
+  return () => source.close();
+}
+
 export const useApiClient = () => ({
   postPayment: (payload: PaymentRequest) => request<PaymentResponse>("/payment", "POST", payload),
   getTransaction: (id: string) => request<TransactionResponse>(`/transaction/${id}`, "GET"),
   getStats: () => request<StatsResponse>("/stats", "GET"),
+  streamStats,
   getAuditLogs: (transactionId: string) =>
     request<DecisionAuditResponse[]>(`/audit/${transactionId}`, "GET"),
   resetDemo: () => request<StatsResponse>("/admin/reset", "DELETE")
@@ -0,0 +1,24 @@
+"""
+Seal, compress and expire audit segment files (`AUDIT_BACKEND=segments`).
+
+Segments are maintained on a background thread whenever a writer rolls over
+to a new partition; run this from cron to keep idle deployments tidy as well.
+"""
+
+from __future__ import annotations
+
+from app.dependencies import get_audit_service
+
+
+def main() -> None:
+    service = get_audit_service()
+    counts = service.maintain()
+    service.close()
+    print(
+        f"Audit segments: {counts['sealed']} sealed, {counts['compressed']} compressed, "
+        f"{counts['dropped']} dropped."
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""
+Benchmark: insert throughput and index size of random (UUIDv4) versus
+time-ordered (UUIDv7) primary keys, stored as 36-character text or 16 bytes.
+
+Each variant fills a fresh SQLite file shaped like ``transactions`` (primary key
+plus the ``(created_at, id)`` index). Use ``--rows 10000000`` for the numbers
+that matter: random keys only fall behind once the indexes outgrow the page
+cache (``--cache-mb``).
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import sqlite3
+import tempfile
+import time
+import uuid
+from datetime import datetime
+from typing import Callable
+
+from app.models import uuid7
+
+VARIANTS: dict[str, tuple[str, Callable[[], uuid.UUID], Callable[[uuid.UUID], object]]] = {
+    "uuid4 text": ("TEXT", uuid.uuid4, str),
+    "uuid7 text": ("TEXT", uuid7, str),
+    "uuid4 blob": ("BLOB", uuid.uuid4, lambda value: value.bytes),
+    "uuid7 blob": ("BLOB", uuid7, lambda value: value.bytes),
+}
+
+
+def _run(path: str, variant: str, rows: int, batch_size: int, cache_mb: int) -> dict:
+    column_type, generate, encode = VARIANTS[variant]
+    connection = sqlite3.connect(path, isolation_level=None)
+    connection.execute(f"PRAGMA cache_size = -{cache_mb * 1024}")
+    connection.execute(
+        f"CREATE TABLE transactions (id {column_type} PRIMARY KEY, "
+        "amount REAL NOT NULL, status TEXT NOT NULL, created_at TEXT NOT NULL)"
+    )
+    connection.execute("CREATE INDEX ix_created_at_id ON transactions (created_at, id)")
+
+    tail_from = rows - max(rows // 10, 1)
+    tail_offset, tail_started = 0, None
+    started = time.perf_counter()
+    for offset in range(0, rows, batch_size):
+        if tail_started is None and offset >= tail_from:
+            tail_offset, tail_started = offset, time.perf_counter()
+        created_at = datetime.utcnow().isoformat(sep=" ")
+        batch = [
+            (encode(generate()), 10.0, "Approved", created_at)
+            for _ in range(min(batch_size, rows - offset))
+        ]
+        connection.execute("BEGIN")
+        connection.executemany("INSERT INTO transactions VALUES (?, ?, ?, ?)", batch)
+        connection.execute("COMMIT")
+    finished = time.perf_counter()
+
+    sizes = dict(
+        connection.execute(
+            "SELECT name, SUM(pgsize) FROM dbstat "
+            "WHERE name IN ('sqlite_autoindex_transactions_1', 'ix_created_at_id') "
+            "GROUP BY name"
+        )
+    )
+    connection.close()
+    return {
+        "rows_per_second": rows / (finished - started),
+        "tail_rows_per_second": (rows - tail_offset) / (finished - (tail_started or started)),
+        "pk_index_mb": sizes.get("sqlite_autoindex_transactions_1", 0) / 2**20,
+        "created_at_index_mb": sizes.get("ix_created_at_id", 0) / 2**20,
+        "file_mb": os.path.getsize(path) / 2**20,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark primary key layouts.")
+    parser.add_argument("--rows", type=int, default=1_000_000, help="Rows per variant.")
+    parser.add_argument("--batch-size", type=int, default=10_000, help="Rows per transaction.")
+    parser.add_argument("--cache-mb", type=int, default=64, help="SQLite page cache size.")
+    parser.add_argument(
+        "--variants",
+        default=",".join(VARIANTS),
+        help="Comma-separated subset of: " + ", ".join(VARIANTS),
+    )
+    args = parser.parse_args()
+
+    print(
+        f"{'variant':<11} {'rows/s':>10} {'last 10%':>10} "
+        f"{'pk idx MB':>10} {'ts idx MB':>10} {'file MB':>9}"
+    )
+    with tempfile.TemporaryDirectory(prefix="bench-ids-") as directory:
+        for variant in (name.strip() for name in args.variants.split(",")):
+            path = os.path.join(directory, f"{variant.replace(' ', '-')}.db")
+            result = _run(path, variant, args.rows, args.batch_size, args.cache_mb)
+            os.remove(path)
+            print(
+                f"{variant:<11} {result['rows_per_second']:>10,.0f} "
+                f"{result['tail_rows_per_second']:>10,.0f} "
+                f"{result['pk_index_mb']:>10.1f} {result['created_at_index_mb']:>10.1f} "
+                f"{result['file_mb']:>9.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
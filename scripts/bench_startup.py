@@ -0,0 +1,104 @@
+"""
+Benchmark: cold start of a fresh API process, from interpreter launch to the
+first served request, plus the import cost of ``worker.tasks``.
+
+Each run is a new Python process so nothing is warm. Phases reported (median
+over ``--runs``):
+
+- ``interpreter``: process launch until the benchmark code starts.
+- ``import``: ``import app.main`` (what every uvicorn worker and test pays).
+- ``lifespan``: startup hooks (schema check, feature table, idempotency warm-up).
+- ``first_request``: the first ``GET /health`` through the ASGI stack.
+
+``--output`` appends one JSON line per invocation so results can be tracked
+over time, e.g. ``PYTHONPATH=. python scripts/bench_startup.py --output startup.jsonl``.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+API_PROBE = """
+import json, sys, time
+started = time.perf_counter()
+import app.main
+imported = time.perf_counter()
+from fastapi.testclient import TestClient
+with TestClient(app.main.app) as client:
+    ready = time.perf_counter()
+    assert client.get("/health").status_code == 200
+    served = time.perf_counter()
+print(json.dumps({
+    "started": time.time() - (time.perf_counter() - started),
+    "import": imported - started,
+    "lifespan": ready - imported,
+    "first_request": served - ready,
+}))
+"""
+
+WORKER_PROBE = """
+import json, time
+started = time.perf_counter()
+import worker.tasks
+print(json.dumps({"import": time.perf_counter() - started}))
+"""
+
+
+def _probe(code: str, env: dict[str, str]) -> dict[str, float]:
+    launched = time.time()
+    output = subprocess.run(
+        [sys.executable, "-c", code], env=env, check=True, capture_output=True, text=True
+    ).stdout
+    result = json.loads(output.strip().splitlines()[-1])
+    if "started" in result:
+        result["interpreter"] = max(result.pop("started") - launched, 0.0)
+    return result
+
+
+def _median_ms(runs: list[dict[str, float]], phase: str) -> float:
+    return round(statistics.median(run[phase] for run in runs) * 1_000, 1)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark API and worker cold start.")
+    parser.add_argument("--runs", type=int, default=5, help="Fresh processes per probe.")
+    parser.add_argument(
+        "--database-url",
+        default=None,
+        help="Database to start against (default: a throwaway SQLite file).",
+    )
+    parser.add_argument("--output", default=None, help="Append results as a JSON line here.")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="bench-startup-") as directory:
+        env = {
+            **os.environ,
+            "DATABASE_URL": args.database_url
+            or f"sqlite:///{os.path.join(directory, 'startup.db')}",
+        }
+        api_runs = [_probe(API_PROBE, env) for _ in range(args.runs)]
+        worker_runs = [_probe(WORKER_PROBE, env) for _ in range(args.runs)]
+
+    phases = ("interpreter", "import", "lifespan", "first_request")
+    result = {phase: _median_ms(api_runs, phase) for phase in phases}
+    result["total"] = round(sum(result.values()), 1)
+    result["worker_import"] = _median_ms(worker_runs, "import")
+    for name, value in result.items():
+        print(f"{name:<14} {value:8.1f} ms")
+
+    if args.output:
+        record = {"at": datetime.now(timezone.utc).isoformat(), "runs": args.runs, **result}
+        with open(args.output, "a", encoding="utf-8") as handle:
+            handle.write(json.dumps(record) + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""
+Stream transactions or decision audits to a file (or stdout) for reconciliation.
+
+Reads with server-side cursors and writes one batch at a time, like
+``GET /export/*``, so memory stays flat however many rows are exported, e.g.::
+
+    PYTHONPATH=. python scripts/export_data.py transactions --format csv \\
+        --from 2024-06-01 --to 2024-07-01 --output june.csv
+
+A summary line (bytes written, seconds and peak RSS) goes to stderr.
+"""
+
+from __future__ import annotations
+
+import argparse
+import resource
+import sys
+import time
+from contextlib import ExitStack
+from datetime import datetime
+
+from app import utils
+from app.core import config
+from app.database import get_shard_router
+from app.dependencies import get_audit_service
+from app.services import EXPORT_FORMATS, ExportUnavailable, export_audits, export_transactions
+
+
+def _timestamp(value: str) -> datetime:
+    return utils.as_naive_utc(datetime.fromisoformat(value))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Stream transactions or audits to a file.")
+    parser.add_argument("kind", choices=("transactions", "audits"))
+    parser.add_argument("--format", choices=sorted(EXPORT_FORMATS), default="ndjson")
+    parser.add_argument(
+        "--from", dest="created_from", type=_timestamp, help="Inclusive lower bound (ISO 8601)."
+    )
+    parser.add_argument(
+        "--to", dest="created_to", type=_timestamp, help="Exclusive upper bound (ISO 8601)."
+    )
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=None,
+        help="Rows per cursor round trip and encoded chunk (default: EXPORT_BATCH_SIZE).",
+    )
+    parser.add_argument("--output", default="-", help="File to write (default: stdout).")
+    args = parser.parse_args()
+
+    options = {
+        "created_from": args.created_from,
+        "created_to": args.created_to,
+        "batch_size": args.batch_size or config.get_settings().export_batch_size,
+    }
+    router = get_shard_router()
+    try:
+        if args.kind == "transactions":
+            chunks = export_transactions(router, args.format, **options)
+        else:
+            chunks = export_audits(router, get_audit_service(), args.format, **options)
+    except ExportUnavailable as exc:
+        parser.error(str(exc))
+
+    started = time.perf_counter()
+    written = 0
+    with ExitStack() as stack:
+        if args.output == "-":
+            output = sys.stdout.buffer
+        else:
+            output = stack.enter_context(open(args.output, "wb"))
+        for chunk in chunks:
+            output.write(chunk)
+            written += len(chunk)
+    elapsed = time.perf_counter() - started
+    peak_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(
+        f"Exported {args.kind} as {args.format}: {written:,} bytes in {elapsed:.1f}s, "
+        f"peak RSS {peak_mb:.0f} MB",
+        file=sys.stderr,
+    )
+
+
+if __name__ == "__main__":
+    main()
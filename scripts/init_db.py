@@ -0,0 +1,34 @@
+"""
+Create the database tables and indexes (on every shard).
+
+Run once per deployment (and after upgrades that add tables or indexes) with
+``CREATE_SCHEMA_ON_STARTUP=false`` on the API, so starting a process never
+issues DDL or waits on its locks. Indexes added to existing tables are only
+built here, ``CONCURRENTLY`` on Postgres. Id columns created as text by older
+versions are converted to native ``uuid`` (Postgres) or 16-byte blobs (SQLite)
+first; on Postgres that rewrites the table under an exclusive lock. A
+``latency_buckets`` table from before it was striped is recreated with its
+counts kept.
+"""
+
+from __future__ import annotations
+
+from app import models
+from app.database import get_shard_router
+
+
+def main() -> None:
+    engines = get_shard_router().engines()
+    for engine in engines:
+        url = engine.url.render_as_string(hide_password=True)
+        migrated = models.migrate_legacy_ids(engine)
+        if migrated:
+            print(f"Converted {migrated} text id column(s) on {url}")
+        if models.migrate_unstriped_buckets(engine):
+            print(f"Striped latency_buckets on {url}")
+        models.create_schema(engine, backfill_indexes=True)
+        print(f"Schema ready on {url}")
+
+
+if __name__ == "__main__":
+    main()
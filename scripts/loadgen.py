@@ -0,0 +1,293 @@
+"""
+Load generator for the authorization API.
+
+Replays a JSONL file of `PaymentRequest` bodies (or synthesizes them) against
+`/payment`, either over HTTP or in-process through the ASGI app, and reports
+throughput plus latency percentiles.
+
+- Open loop (``--rate``): requests are sent on a fixed arrival schedule no
+  matter how slow the server is. Latency is measured from each request's
+  scheduled send time, so queueing delay is not hidden (no coordinated omission).
+- Closed loop (``--concurrency``): N virtual users each send their next request
+  as soon as the previous one completes.
+
+Examples:
+    PYTHONPATH=. python scripts/loadgen.py --in-process --rate 200 --duration 10
+    PYTHONPATH=. python scripts/loadgen.py --url http://localhost:8000 \\
+        --concurrency 32 --requests 20000 --output results.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import contextlib
+import itertools
+import json
+import math
+import random
+import sys
+import time
+from array import array
+from collections import Counter
+from pathlib import Path
+from typing import Any, AsyncIterator, Iterator
+
+import httpx
+
+PERCENTILES = {"p50": 0.50, "p95": 0.95, "p99": 0.99, "p999": 0.999}
+
+
+def load_payloads(path: Path) -> list[dict[str, Any]]:
+    payloads = []
+    with path.open(encoding="utf-8") as handle:
+        for line in handle:
+            line = line.strip()
+            if line:
+                payloads.append(json.loads(line))
+    if not payloads:
+        raise SystemExit(f"No payment requests found in {path}")
+    return payloads
+
+
+def synthetic_payloads(seed: int) -> Iterator[dict[str, Any]]:
+    rng = random.Random(seed)
+    while True:
+        yield {
+            "card_number": f"4{rng.randint(10**14, 10**15 - 1)}",
+            "amount": round(rng.lognormvariate(4.5, 1.0), 2),
+            "currency": "GBP",
+            "merchant": f"Loadgen Merchant {rng.randint(1, 500)}",
+            "channel": rng.choice(["ecommerce", "in-store", "moto"]),
+            "device_id": f"loadgen-device-{rng.randint(1, 10_000)}",
+        }
+
+
+class Recorder:
+    """
+    Collects per-request latencies and outcomes for the final report.
+    """
+
+    def __init__(self) -> None:
+        self.latencies_ms = array("d")
+        self.statuses: Counter[str] = Counter()
+
+    def record(self, latency_ms: float, outcome: str) -> None:
+        self.latencies_ms.append(latency_ms)
+        self.statuses[outcome] += 1
+
+    def percentile(self, values: list[float], q: float) -> float | None:
+        if not values:
+            return None
+        index = max(0, math.ceil(q * len(values)) - 1)
+        return round(values[index], 3)
+
+    def histogram(self, values: list[float]) -> list[dict[str, Any]]:
+        """
+        Power-of-two latency buckets (upper bounds in ms).
+        """
+
+        buckets: Counter[float] = Counter()
+        for value in values:
+            upper = 2 ** math.ceil(math.log2(value)) if value > 0.125 else 0.125
+            buckets[upper] += 1
+        return [{"le_ms": upper, "count": buckets[upper]} for upper in sorted(buckets)]
+
+    def report(self, elapsed_s: float, config: dict[str, Any]) -> dict[str, Any]:
+        values = sorted(self.latencies_ms)
+        completed = len(values)
+        return {
+            "config": config,
+            "completed": completed,
+            "elapsed_s": round(elapsed_s, 3),
+            "throughput_rps": round(completed / elapsed_s, 2) if elapsed_s else 0.0,
+            "outcomes": dict(self.statuses),
+            "latency_ms": {
+                **{name: self.percentile(values, q) for name, q in PERCENTILES.items()},
+                "min": round(values[0], 3) if values else None,
+                "max": round(values[-1], 3) if values else None,
+                "mean": round(sum(values) / completed, 3) if values else None,
+            },
+            "histogram": self.histogram(values),
+        }
+
+
+async def send(
+    client: httpx.AsyncClient,
+    path: str,
+    body: dict[str, Any],
+    scheduled: float,
+    recorder: Recorder,
+) -> None:
+    try:
+        response = await client.post(path, json=body)
+        outcome = str(response.status_code)
+    except httpx.HTTPError as exc:
+        outcome = type(exc).__name__
+    recorder.record((time.perf_counter() - scheduled) * 1_000, outcome)
+
+
+async def run_open_loop(
+    client: httpx.AsyncClient,
+    args: argparse.Namespace,
+    bodies: Iterator[dict[str, Any]],
+    recorder: Recorder,
+) -> None:
+    rng = random.Random(args.seed)
+    in_flight: set[asyncio.Task] = set()
+    started = time.perf_counter()
+    scheduled = started
+    for sent in itertools.count():
+        if args.requests and sent >= args.requests:
+            break
+        if args.duration and scheduled - started >= args.duration:
+            break
+        delay = scheduled - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        if len(in_flight) >= args.max_in_flight:
+            # The client itself is saturated; count it rather than silently waiting.
+            recorder.statuses["client_saturated"] += 1
+        else:
+            task = asyncio.create_task(send(client, args.path, next(bodies), scheduled, recorder))
+            in_flight.add(task)
+            task.add_done_callback(in_flight.discard)
+        interval = rng.expovariate(args.rate) if args.poisson else 1 / args.rate
+        scheduled += interval
+    if in_flight:
+        await asyncio.gather(*in_flight)
+
+
+async def run_closed_loop(
+    client: httpx.AsyncClient,
+    args: argparse.Namespace,
+    bodies: Iterator[dict[str, Any]],
+    recorder: Recorder,
+) -> None:
+    started = time.perf_counter()
+    issued = itertools.count()
+
+    async def user() -> None:
+        while True:
+            if args.requests and next(issued) >= args.requests:
+                return
+            if args.duration and time.perf_counter() - started >= args.duration:
+                return
+            await send(client, args.path, next(bodies), time.perf_counter(), recorder)
+
+    await asyncio.gather(*(user() for _ in range(args.concurrency)))
+
+
+@contextlib.asynccontextmanager
+async def build_client(args: argparse.Namespace) -> AsyncIterator[httpx.AsyncClient]:
+    timeout = httpx.Timeout(args.timeout)
+    if not args.in_process:
+        limits = httpx.Limits(max_connections=max(args.concurrency or 0, args.max_in_flight))
+        async with httpx.AsyncClient(base_url=args.url, timeout=timeout, limits=limits) as client:
+            yield client
+        return
+
+    from app.main import app
+
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(
+            transport=transport, base_url="http://loadgen", timeout=timeout
+        ) as client:
+            yield client
+
+
+async def main_async(args: argparse.Namespace) -> dict[str, Any]:
+    if args.replay:
+        bodies: Iterator[dict[str, Any]] = itertools.cycle(load_payloads(args.replay))
+    else:
+        bodies = synthetic_payloads(args.seed)
+    recorder = Recorder()
+    async with build_client(args) as client:
+        started = time.perf_counter()
+        if args.rate:
+            await run_open_loop(client, args, bodies, recorder)
+        else:
+            await run_closed_loop(client, args, bodies, recorder)
+        elapsed = time.perf_counter() - started
+    config = {
+        "mode": "open" if args.rate else "closed",
+        "target": "in-process" if args.in_process else args.url,
+        "path": args.path,
+        "rate": args.rate,
+        "poisson": args.poisson,
+        "concurrency": None if args.rate else args.concurrency,
+        "requests": args.requests,
+        "duration": args.duration,
+        "replay": str(args.replay) if args.replay else None,
+    }
+    return recorder.report(elapsed, config)
+
+
+def print_report(report: dict[str, Any]) -> None:
+    latency = report["latency_ms"]
+    print(
+        f"{report['config']['mode']}-loop: {report['completed']} requests in "
+        f"{report['elapsed_s']}s -> {report['throughput_rps']} req/s"
+    )
+    print("outcomes: " + ", ".join(f"{k}={v}" for k, v in sorted(report["outcomes"].items())))
+    print(
+        "latency ms: "
+        + "  ".join(f"{name}={latency[name]}" for name in (*PERCENTILES, "max"))
+    )
+    peak = max((bucket["count"] for bucket in report["histogram"]), default=0)
+    for bucket in report["histogram"]:
+        bar = "#" * max(1, round(40 * bucket["count"] / peak))
+        print(f"  <= {bucket['le_ms']:>9g} ms {bucket['count']:>8} {bar}")
+
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Load generator for POST /payment.")
+    target = parser.add_mutually_exclusive_group()
+    target.add_argument("--url", default="http://localhost:8000", help="API base URL.")
+    target.add_argument(
+        "--in-process",
+        action="store_true",
+        help="Drive the ASGI app directly instead of going over the network.",
+    )
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument("--rate", type=float, help="Open loop: target arrivals per second.")
+    mode.add_argument(
+        "--concurrency",
+        type=int,
+        default=16,
+        help="Closed loop: number of concurrent virtual users (default: 16).",
+    )
+    parser.add_argument("--poisson", action="store_true", help="Exponential inter-arrival times.")
+    parser.add_argument("--requests", type=int, default=0, help="Stop after N requests.")
+    parser.add_argument("--duration", type=float, default=0, help="Stop after N seconds.")
+    parser.add_argument("--replay", type=Path, help="JSONL file of PaymentRequest bodies.")
+    parser.add_argument("--path", default="/payment", help="Endpoint to exercise.")
+    parser.add_argument("--timeout", type=float, default=30.0, help="Per-request timeout (s).")
+    parser.add_argument(
+        "--max-in-flight",
+        type=int,
+        default=1_000,
+        help="Open loop: cap on outstanding requests before arrivals are counted as saturated.",
+    )
+    parser.add_argument("--seed", type=int, default=7, help="Seed for synthetic payloads.")
+    parser.add_argument("--output", type=Path, help="Write the JSON report to this file.")
+    args = parser.parse_args(argv)
+    if not args.requests and not args.duration:
+        parser.error("set --requests and/or --duration")
+    if args.rate is not None and args.rate <= 0:
+        parser.error("--rate must be positive")
+    return args
+
+
+def main(argv: list[str] | None = None) -> None:
+    args = parse_args(argv)
+    report = asyncio.run(main_async(args))
+    print_report(report)
+    if args.output:
+        args.output.write_text(json.dumps(report, indent=2), encoding="utf-8")
+        print(f"wrote {args.output}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+"""
+Recompute the incremental `/stats` counters and latency sketch from scratch.
+Run after restoring a backup, importing rows out-of-band, or upgrading a
+database that predates the counters.
+"""
+
+from __future__ import annotations
+
+import argparse
+
+from app import models, utils
+from app.core import config
+from app.database import SessionLocal, get_shard_router, use_shard
+from app.dependencies import get_audit_service
+from app.services import StatsService
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Rebuild incremental stats.")
+    parser.add_argument(
+        "--chunk-size",
+        type=int,
+        default=10_000,
+        help="Rows fetched per round trip while streaming audit latencies.",
+    )
+    args = parser.parse_args()
+
+    router = get_shard_router()
+    models.create_schema(router.engines())
+    settings = config.get_settings()
+    service = StatsService(settings.stats_sketch_relative_accuracy)
+    audit_service = get_audit_service()
+    for shard in range(len(router)):
+        with SessionLocal() as session:
+            use_shard(session, shard)
+            # Segment audits are not sharded; their latencies all go to shard 0,
+            # which `/stats` merges with the others anyway.
+            latencies = ()
+            if audit_service.backend.stores_in_database or shard == 0:
+                latencies = audit_service.latencies(session, args.chunk_size)
+            service.rebuild(session, chunk_size=args.chunk_size, latencies=latencies)
+    with SessionLocal() as session:
+        stats = utils.calculate_stats(session)
+    print(f"Rebuilt stats: {stats}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,13 +1,18 @@
 """
 Utility script to populate the database with synthetic transactions.
 Intended for Docker Compose bootstrap and local demos.
+
+`--bulk` switches to the chunked, multi-process writer in `worker.bulk_seed`
+for capacity tests with millions of rows.
 """
 
 from __future__ import annotations
 
 import argparse
+import os
 
-from app.database import Base, engine
+from app import models
+from app.database import get_shard_router
 from worker import tasks
 
 
@@ -19,11 +24,50 @@ def main() -> None:
         default=10,
         help="Number of synthetic transactions to create.",
     )
+    parser.add_argument(
+        "--bulk",
+        action="store_true",
+        help="Write in chunks with COPY/executemany instead of the ORM.",
+    )
+    parser.add_argument(
+        "--chunk-size",
+        type=int,
+        default=10_000,
+        help="Rows per chunk and per transaction in bulk mode.",
+    )
+    parser.add_argument(
+        "--processes",
+        type=int,
+        default=os.cpu_count() or 1,
+        help="Producer processes generating chunks in bulk mode.",
+    )
+    parser.add_argument(
+        "--seed",
+        type=int,
+        default=None,
+        help="Seed for reproducible bulk payloads.",
+    )
     args = parser.parse_args()
 
-    Base.metadata.create_all(bind=engine)
-    created = tasks.seed_synthetic_transactions(batch_size=args.batch_size)
-    print(f"Seeded {len(created)} demo transactions.")
+    models.create_schema(get_shard_router().engines())
+    if not args.bulk:
+        created = tasks.seed_synthetic_transactions(batch_size=args.batch_size)
+        print(f"Seeded {len(created)} demo transactions.")
+        return
+
+    from worker import bulk_seed
+
+    result = bulk_seed.bulk_seed(
+        args.batch_size,
+        chunk_size=args.chunk_size,
+        processes=args.processes,
+        seed=args.seed,
+        progress=bulk_seed.print_progress(args.batch_size),
+    )
+    print(
+        f"Seeded {result.rows:,} transactions in {result.seconds:.1f}s "
+        f"({result.rows_per_second:,.0f} rows/s)."
+    )
 
 
 if __name__ == "__main__":
@@ -0,0 +1,84 @@
+"""
+Smoke tests for the asyncio twin of the authorization hot path.
+"""
+
+import asyncio
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app import async_routes
+from app.dependencies import get_idempotency_store
+from app.services import IdempotencyStore
+
+async_app = FastAPI()
+async_app.include_router(async_routes.router)
+
+
+def test_async_payment_round_trip():
+    with TestClient(async_app) as client:
+        response = client.post(
+            "/payment",
+            json={"card_number": "4000001234569999", "amount": 42.0, "merchant": "Async"},
+        )
+        assert response.status_code == 201
+        transaction_id = response.json()["transaction_id"]
+
+        lookup = client.get(f"/transaction/{transaction_id}")
+        assert lookup.status_code == 200
+        assert lookup.json()["merchant"] == "Async"
+
+        audits = client.get(f"/audit/{transaction_id}")
+        assert audits.status_code == 200
+        assert audits.json()[0]["transaction_id"] == transaction_id
+
+        assert client.get("/stats").json()["total"] >= 1
+        assert client.get("/transaction/missing").status_code == 404
+
+
+class ThreadCheckingRedis:
+    """
+    Records each call and whether it ran with no event loop on its thread.
+    """
+
+    def __init__(self) -> None:
+        self.calls: list[tuple[str, bool]] = []
+
+    def _record(self, name: str) -> None:
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            self.calls.append((name, True))
+        else:
+            self.calls.append((name, False))
+
+    def get(self, key: str):
+        self._record("get")
+        return None
+
+    def set(self, key: str, value: str, ex: int) -> None:
+        self._record("set")
+
+
+def test_async_idempotency_checks_keep_redis_off_the_event_loop():
+    redis = ThreadCheckingRedis()
+    stores = [IdempotencyStore(redis=redis)]
+    async_app.dependency_overrides[get_idempotency_store] = lambda: stores[-1]
+    payment = {"card_number": "4000001234568888", "amount": 42.0, "merchant": "Async"}
+    headers = {"Idempotency-Key": "async-retry-1"}
+    try:
+        with TestClient(async_app) as client:
+            first = client.post("/payment", json=payment, headers=headers)
+            assert redis.calls == []  # new keys are ruled out locally
+
+            # Another process whose filter has seen the key confirms it via Redis and the row.
+            stores.append(IdempotencyStore(redis=redis))
+            stores[-1].bloom.add("async-retry-1")
+            retry = client.post("/payment", json=payment, headers=headers)
+    finally:
+        async_app.dependency_overrides.pop(get_idempotency_store)
+
+    assert retry.headers["Idempotent-Replayed"] == "true"
+    assert retry.json() == first.json()
+    assert redis.calls == [("get", True), ("set", True)]
+    assert stores[-1].database_hits == 1
@@ -19,3 +19,11 @@ def test_health_endpoint():
 def test_docs_redirect():
     response = client.get("/")
     assert response.status_code == 200
+
+
+def test_rules_endpoint_reports_builtin_heuristic():
+    response = client.get("/admin/rules")
+    assert response.status_code == 200
+    body = response.json()
+    assert (body["source"], body["rules"]) == ("settings", 2)
+    assert client.post("/admin/rules/reload").status_code == 409
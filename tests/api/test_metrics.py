@@ -0,0 +1,49 @@
+"""
+Prometheus `/metrics` endpoint tests.
+"""
+
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.metrics import STAGES
+
+
+client = TestClient(app)
+
+
+def _sample(body: str, prefix: str) -> float:
+    for line in body.splitlines():
+        if line.startswith(prefix):
+            return float(line.rsplit(" ", 1)[1])
+    raise AssertionError(f"{prefix} not found in /metrics output")
+
+
+def test_metrics_expose_stage_histograms_after_a_payment():
+    before = _sample(client.get("/metrics").text, 'payment_stage_seconds_count{stage="rules"}')
+    response = client.post(
+        "/payment",
+        json={"card_number": "4000001234560042", "amount": 75.0, "merchant": "Metrics"},
+    )
+    assert response.status_code == 201
+
+    metrics = client.get("/metrics")
+    assert metrics.status_code == 200
+    assert metrics.headers["content-type"].startswith("text/plain")
+    body = metrics.text
+    assert _sample(body, 'payment_stage_seconds_count{stage="rules"}') == before + 1
+    for stage in ("feature_generation", "score", "transaction_commit", "audit_write"):
+        assert stage in STAGES
+        assert _sample(body, f'payment_stage_seconds_count{{stage="{stage}"}}') >= 1
+    assert _sample(body, "payment_handler_seconds_count") >= 1
+
+
+def test_metrics_expose_pool_cache_and_audit_gauges():
+    client.get("/stats")
+    body = client.get("/metrics").text
+    assert 'db_pool_connections{shard="0",state="checked_out"}' in body
+    assert 'feature_cache_events_total{event="misses"}' in body
+    assert 'feature_cache_redis_breaker_state{state="closed"} 1.0' in body
+    assert "feature_cache_redis_failures_total " in body
+    assert "audit_queue_depth 0.0" in body
+    assert 'payment_shed_total{reason="queue_full"}' in body
+    assert "payment_in_flight 0.0" in body
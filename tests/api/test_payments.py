@@ -0,0 +1,116 @@
+"""
+Authorization endpoint tests covering single and batch submissions.
+"""
+
+from fastapi.testclient import TestClient
+
+from app.dependencies import get_audit_service
+from app.main import app
+from app.services import AuditService
+
+
+client = TestClient(app)
+
+
+def _payment(idx: int, amount: float = 120.0) -> dict:
+    return {
+        "card_number": f"400000123456{idx:04d}",
+        "amount": amount,
+        "merchant": f"Merchant {idx}",
+    }
+
+
+def test_create_payment_returns_decision():
+    response = client.post("/payment", json=_payment(1))
+    assert response.status_code == 201
+    body = response.json()
+    assert body["status"] in {"Approved", "Declined"}
+
+    lookup = client.get(f"/transaction/{body['transaction_id']}")
+    assert lookup.status_code == 200
+    assert lookup.json()["card_last4"] == "0001"
+    assert lookup.json()["id"] == body["transaction_id"]
+    assert client.get("/transaction/not-a-uuid").status_code == 404
+    assert client.get("/audit/not-a-uuid").status_code == 404
+
+
+def test_batch_payment_persists_every_result_in_order():
+    payments = [_payment(idx, amount=50.0 + idx * 100) for idx in range(10)]
+    response = client.post("/payments/batch", json={"payments": payments})
+    assert response.status_code == 201
+    body = response.json()
+    assert len(body["results"]) == len(payments)
+    assert body["approved"] + body["declined"] == len(payments)
+
+    for idx, result in enumerate(body["results"]):
+        lookup = client.get(f"/transaction/{result['transaction_id']}")
+        assert lookup.status_code == 200
+        assert lookup.json()["merchant"] == f"Merchant {idx}"
+        audits = client.get(f"/audit/{result['transaction_id']}")
+        assert audits.status_code == 200
+        assert audits.json()[0]["decision_payload"]["status"] == result["status"]
+
+
+def test_batch_payment_rejects_empty_batch():
+    response = client.post("/payments/batch", json={"payments": []})
+    assert response.status_code == 422
+
+
+def test_stats_track_writes_and_reset():
+    reset = client.delete("/admin/reset")
+    assert reset.status_code == 200
+    assert reset.json()["total"] == 0
+
+    client.post("/payment", json=_payment(7, amount=100.0))
+    client.post("/payments/batch", json={"payments": [_payment(8, 200.0), _payment(9, 300.0)]})
+
+    stats = client.get("/stats").json()
+    assert stats["total"] == 3
+    assert stats["approved"] + stats["declined"] == 3
+    assert stats["avg_amount"] == 200.0
+    assert stats["p95_latency"] is not None
+
+
+def test_idempotency_key_replays_first_response():
+    headers = {"Idempotency-Key": "retry-me-1"}
+    stats_before = client.get("/stats").json()["total"]
+
+    first = client.post("/payment", json=_payment(11), headers=headers)
+    retry = client.post("/payment", json=_payment(11), headers=headers)
+    assert first.status_code == retry.status_code == 201
+    assert retry.json() == first.json()
+    assert retry.headers["Idempotent-Replayed"] == "true"
+    assert "Idempotent-Replayed" not in first.headers
+    assert client.get("/stats").json()["total"] == stats_before + 1
+
+    conflict = client.post("/payment", json=_payment(11, amount=999.0), headers=headers)
+    assert conflict.status_code == 422
+
+
+def test_lookups_are_cached_on_write_and_cleared_by_reset():
+    body = client.post("/payment", json=_payment(12)).json()
+    before = client.get("/admin/lookup-cache").json()
+
+    transaction = client.get(f"/transaction/{body['transaction_id']}")
+    audits = client.get(f"/audit/{body['transaction_id']}")
+    assert transaction.json()["card_last4"] == "0012"
+    assert audits.json()[0]["decision_payload"]["status"] == body["status"]
+    after = client.get("/admin/lookup-cache").json()
+    assert after["local_hits"] == before["local_hits"] + 2
+    assert after["misses"] == before["misses"]
+
+    client.delete("/admin/reset")
+    assert client.get(f"/transaction/{body['transaction_id']}").status_code == 404
+    assert client.get(f"/audit/{body['transaction_id']}").status_code == 404
+
+
+def test_write_behind_audits_are_not_cached_before_they_are_stored():
+    service = AuditService(write_behind=True, flush_batch_size=1_000, flush_interval_seconds=2)
+    app.dependency_overrides[get_audit_service] = lambda: service
+    try:
+        body = client.post("/payment", json=_payment(13)).json()
+        assert client.get(f"/audit/{body['transaction_id']}").status_code == 404
+        service.close()
+        assert client.get(f"/audit/{body['transaction_id']}").status_code == 200
+    finally:
+        app.dependency_overrides.pop(get_audit_service)
@@ -0,0 +1,96 @@
+"""
+Transaction listing and export tests: filters, keyset pagination and streaming.
+"""
+
+import orjson
+from fastapi.testclient import TestClient
+from sqlalchemy import select
+
+from app import models
+from app.database import engine
+from app.main import app
+
+
+client = TestClient(app)
+
+
+def test_listing_pages_through_a_merchant_without_gaps_or_duplicates():
+    payments = [
+        {"card_number": f"411111111111{idx:04d}", "amount": 20.0 + idx, "merchant": "Keyset Cafe"}
+        for idx in range(5)
+    ]
+    response = client.post("/payments/batch", json={"payments": payments})
+    created = {result["transaction_id"] for result in response.json()["results"]}
+
+    seen: list[dict] = []
+    cursor = None
+    while True:
+        params = {"merchant": "Keyset Cafe", "limit": 2}
+        if cursor:
+            params["cursor"] = cursor
+        page = client.get("/transactions", params=params).json()
+        assert len(page["items"]) <= 2
+        seen.extend(page["items"])
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+
+    assert {item["id"] for item in seen} == created
+    assert len(seen) == len(created)
+    keys = [(item["created_at"], item["id"]) for item in seen]
+    assert keys == sorted(keys, reverse=True)
+
+
+def test_listing_filters_by_card_last4_and_status():
+    client.post(
+        "/payment",
+        json={"card_number": "4000009999997321", "amount": 12.0, "merchant": "Last4"},
+    )
+    page = client.get("/transactions", params={"card_last4": "7321"}).json()
+    assert page["items"] and all(item["card_last4"] == "7321" for item in page["items"])
+
+    status = page["items"][0]["status"]
+    filtered = client.get("/transactions", params={"card_last4": "7321", "status": status})
+    assert all(item["status"] == status for item in filtered.json()["items"])
+
+
+def test_listing_rejects_malformed_cursor_and_last4():
+    assert client.get("/transactions", params={"cursor": "not-a-cursor"}).status_code == 400
+    assert client.get("/transactions", params={"card_last4": "12a4"}).status_code == 422
+
+
+def test_export_streams_matching_transactions_as_ndjson_and_csv():
+    payments = [
+        {"card_number": f"411111111112{idx:04d}", "amount": 30.0 + idx, "merchant": "Export Shop"}
+        for idx in range(3)
+    ]
+    results = client.post("/payments/batch", json={"payments": payments}).json()["results"]
+    first = client.get(f"/transaction/{results[0]['transaction_id']}").json()
+
+    response = client.get("/export/transactions", params={"created_from": first["created_at"]})
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/x-ndjson"
+    exported = {orjson.loads(line)["id"] for line in response.content.splitlines()}
+    assert {result["transaction_id"] for result in results} <= exported
+
+    response = client.get("/export/transactions", params={"format": "csv"})
+    assert response.headers["content-disposition"] == 'attachment; filename="transactions.csv"'
+    assert response.text.startswith("id,card_last4,amount,")
+    assert client.get("/export/audits", params={"format": "xml"}).status_code == 422
+
+
+def test_card_last4_filter_is_served_by_its_expression_index():
+    transaction = models.Transaction
+    query = (
+        select(transaction.id)
+        .where(transaction.card_last4 == "0012")
+        .order_by(transaction.created_at.desc(), transaction.id.desc())
+        .limit(5)
+    )
+    compiled = query.compile(engine)
+    params = tuple(compiled.params[name] for name in compiled.positiontup)
+    with engine.connect() as connection:
+        plan = connection.exec_driver_sql(f"EXPLAIN QUERY PLAN {compiled}", params).all()
+    assert "USING INDEX ix_transactions_card_last4_created_at_id" in " ".join(
+        row[-1] for row in plan
+    )
@@ -0,0 +1,18 @@
+"""
+Shared pytest setup: point the app at a throwaway SQLite database before import.
+"""
+
+import os
+import tempfile
+
+os.environ.setdefault(
+    "DATABASE_URL",
+    f"sqlite:///{os.path.join(tempfile.mkdtemp(prefix='riskops-tests-'), 'test.db')}",
+)
+
+# The app no longer creates tables at import time; tests that skip the lifespan
+# (a bare `TestClient(app)`) still need the schema.
+from app import models  # noqa: E402
+from app.database import get_shard_router  # noqa: E402
+
+models.create_schema(get_shard_router().engines())
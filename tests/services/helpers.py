@@ -0,0 +1,67 @@
+"""
+Builders shared by the service tests.
+"""
+
+import os
+import tempfile
+from datetime import datetime
+
+from app import models, schemas
+from app.database import ShardRouter
+from app.schemas import RiskDecision, TransactionFeatures
+from app.services import StatsService
+
+SEGMENT_START = datetime(2024, 5, 1, 10, 0, 0)
+
+
+def make_audit(transaction_id: str) -> schemas.DecisionAuditCreate:
+    return schemas.DecisionAuditCreate(
+        transaction_id=transaction_id,
+        request_payload={"amount": 10.0},
+        decision_payload=RiskDecision(
+            status="Approved",
+            score=0.1,
+            latency_ms=1.5,
+            features=TransactionFeatures(
+                spending_velocity=0.1,
+                device_trust_score=0.9,
+                ip_risk_score=0.2,
+            ),
+        ),
+    )
+
+
+def audit_row(transaction_id: str, created_at: datetime, latency_ms: float = 1.0) -> dict:
+    return {
+        "id": models.new_id(),
+        "transaction_id": transaction_id,
+        "request_payload": {"amount": 10.0, "merchant": "Segments"},
+        "decision_payload": {"status": "Approved", "latency_ms": latency_ms},
+        "latency_ms": latency_ms,
+        "created_at": created_at,
+    }
+
+
+def shard_router(shards: int = 3) -> ShardRouter:
+    directory = tempfile.mkdtemp(prefix="riskops-shards-")
+    router = ShardRouter(
+        [f"sqlite:///{os.path.join(directory, f'shard-{n}.db')}" for n in range(shards)]
+    )
+    models.create_schema(router.engines())
+    return router
+
+
+def write_transaction(router: ShardRouter, card_number: str, amount: float, status: str) -> str:
+    shard = router.shard_for_card(card_number)
+    with router.session(shard) as session:
+        transaction = models.Transaction(
+            id=models.new_id(shard),
+            card_number=card_number,
+            amount=amount,
+            merchant="Shard Shop",
+            status=status,
+        )
+        session.add(transaction)
+        StatsService().record(session, status=status, amount=amount, latency_ms=amount / 10)
+        session.commit()
+        return transaction.id
@@ -0,0 +1,85 @@
+"""
+Unit tests for `/payment` admission control and load shedding.
+"""
+
+import asyncio
+
+import httpx
+import pytest
+from fastapi import FastAPI
+
+from app.services import AdmissionController, AdmissionMiddleware, Overloaded
+
+
+def test_waiters_get_slots_in_order_and_a_full_queue_is_shed():
+    async def scenario() -> tuple[float, AdmissionController]:
+        controller = AdmissionController(max_concurrency=1, max_queue=1, max_wait_seconds=1.0)
+        assert await controller.acquire() == 0.0
+        waiting = asyncio.create_task(controller.acquire())
+        await asyncio.sleep(0)
+        with pytest.raises(Overloaded) as shed:
+            await controller.acquire()
+        assert shed.value.reason == "queue_full"
+        await asyncio.sleep(0.02)
+        controller.release(0.02)
+        queued = await waiting
+        controller.release(0.02)
+        return queued, controller
+
+    queued, controller = asyncio.run(scenario())
+
+    assert queued >= 0.02
+    stats = controller.stats()
+    assert (stats["admitted"], stats["shed_queue_full"]) == (2, 1)
+    assert (stats["in_flight"], stats["queued"]) == (0, 0)
+
+
+def test_deadlines_shed_up_front_or_after_waiting():
+    async def scenario() -> AdmissionController:
+        controller = AdmissionController(max_concurrency=1, max_queue=10, max_wait_seconds=1.0)
+        await controller.acquire()
+        with pytest.raises(Overloaded) as shed:
+            await controller.acquire(deadline_seconds=0.02)
+        assert shed.value.reason == "timeout"
+        # Once a payment is known to take ~1s, a 0.1s budget cannot be met.
+        controller.release(1.0)
+        await controller.acquire()
+        with pytest.raises(Overloaded) as shed:
+            await controller.acquire(deadline_seconds=0.1)
+        assert shed.value.reason == "deadline"
+        return controller
+
+    stats = asyncio.run(scenario()).stats()
+
+    assert (stats["shed_timeout"], stats["shed_deadline"]) == (1, 1)
+    assert (stats["in_flight"], stats["queued"]) == (1, 0)
+
+
+def test_middleware_answers_503_with_retry_after_when_overloaded():
+    controller = AdmissionController(
+        max_concurrency=1, max_queue=0, max_wait_seconds=1.0, retry_after_seconds=2
+    )
+    release = asyncio.Event()
+    app = FastAPI()
+    app.add_middleware(AdmissionMiddleware, controller=lambda: controller)
+
+    @app.post("/payment")
+    async def payment() -> dict:
+        await release.wait()
+        return {"status": "ok"}
+
+    async def scenario() -> list[httpx.Response]:
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            first = asyncio.create_task(client.post("/payment"))
+            await asyncio.sleep(0.05)
+            second = await client.post("/payment")
+            release.set()
+            return [await first, second]
+
+    first, second = asyncio.run(scenario())
+
+    assert first.status_code == 200
+    assert second.status_code == 503
+    assert second.headers["retry-after"] == "2"
+    assert controller.stats()["shed_queue_full"] == 1
@@ -0,0 +1,27 @@
+"""
+Unit tests for the audit service write-behind pipeline.
+"""
+
+from app import models
+from app.database import Base, SessionLocal, engine
+from app.services import AuditService
+from tests.services.helpers import make_audit
+
+
+def test_write_behind_flushes_queued_audits_on_close():
+    Base.metadata.create_all(bind=engine)
+    service = AuditService(write_behind=True, flush_batch_size=3, flush_interval_seconds=0.01)
+    transaction_ids = [models.new_id() for _ in range(7)]
+
+    with SessionLocal() as session:
+        for transaction_id in transaction_ids:
+            service.record(session, make_audit(transaction_id))
+    service.close()
+
+    with SessionLocal() as session:
+        for transaction_id in transaction_ids:
+            assert len(service.fetch_by_transaction(session, transaction_id)) == 1
+    stats = service.queue_stats()
+    assert stats["flushed"] == 7
+    assert stats["queue_depth"] == 0
+    assert stats["dropped"] == 0
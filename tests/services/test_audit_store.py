@@ -0,0 +1,143 @@
+"""
+Segment audit backend tests: partitioning, sealed indexes, compression and retention.
+"""
+
+import threading
+import uuid
+import zlib
+from datetime import datetime, timedelta, timezone
+
+from app import models
+from app.services import AuditService, SegmentAuditBackend
+from tests.services.helpers import SEGMENT_START, audit_row, make_audit
+
+
+def test_segments_partition_by_time_and_survive_seal_compress_and_retention(tmp_path):
+    now = [SEGMENT_START.timestamp()]
+    backend = SegmentAuditBackend(
+        tmp_path,
+        partition_minutes=60,
+        compress_after_hours=2,
+        retention_hours=5,
+        seal_grace_seconds=60,
+        clock=lambda: now[0],
+    )
+    backend.write_many(
+        None, [audit_row("txn-a", SEGMENT_START), audit_row("txn-b", SEGMENT_START, 2.0)]
+    )
+    backend.write_many(None, [audit_row("txn-a", SEGMENT_START + timedelta(hours=1), 3.0)])
+    assert sorted(path.name for path in tmp_path.glob("*.seg")) == [
+        "audit-20240501T1000.seg",
+        "audit-20240501T1100.seg",
+    ]
+
+    audits = backend.fetch(None, "txn-a")
+    assert [audit.latency_ms for audit in audits] == [3.0, 1.0]  # newest first
+    assert audits[0].request_payload["merchant"] == "Segments"
+
+    # Two hours after the first partition ended: sealed and compressed.
+    counts = backend.maintain(now=SEGMENT_START.timestamp() + 3 * 3600)
+    assert counts == {"sealed": 2, "compressed": 1, "dropped": 0}
+    assert (tmp_path / "audit-20240501T1000.seg.z").exists()
+    assert (tmp_path / "audit-20240501T1100.seg.idx").exists()
+    assert [audit.latency_ms for audit in backend.fetch(None, "txn-a")] == [3.0, 1.0]
+    assert len(backend.fetch(None, "txn-b")) == 1
+
+    # A late write into a sealed partition is still found through the tail scan.
+    backend.write_many(None, [audit_row("txn-c", SEGMENT_START + timedelta(hours=1, minutes=5))])
+    assert len(backend.fetch(None, "txn-c")) == 1
+    assert sorted(backend.latencies()) == [1.0, 1.0, 2.0, 3.0]
+
+    assert backend.maintain(now=SEGMENT_START.timestamp() + 8 * 3600)["dropped"] == 2
+    assert backend.fetch(None, "txn-a") == []
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_audit_service_writes_behind_into_segments(tmp_path):
+    service = AuditService(
+        write_behind=True,
+        flush_batch_size=2,
+        flush_interval_seconds=0.01,
+        backend=SegmentAuditBackend(tmp_path),
+    )
+    transaction_ids = [models.new_id() for _ in range(5)]
+    for transaction_id in transaction_ids:
+        service.record(None, make_audit(transaction_id))
+    service.close()
+
+    for transaction_id in transaction_ids:
+        (audit,) = service.to_schema(service.fetch_by_transaction(None, transaction_id))
+        assert audit.transaction_id == transaction_id
+        assert audit.decision_payload.features.device_trust_score == 0.9
+    assert service.queue_stats()["flushed"] == 5
+
+    service.reset(None)
+    assert service.fetch_by_transaction(None, transaction_ids[0]) == []
+
+
+def test_compressed_partitions_inflate_one_block_and_keep_late_audits(tmp_path, monkeypatch):
+    backend = SegmentAuditBackend(
+        tmp_path, compress_after_hours=0, seal_grace_seconds=0, compress_block_bytes=512
+    )
+    backend.write_many(
+        None,
+        [audit_row(f"txn-{n}", SEGMENT_START + timedelta(seconds=n)) for n in range(100)],
+    )
+    assert backend.maintain(now=SEGMENT_START.timestamp() + 7200)["compressed"] == 1
+    assert not (tmp_path / "audit-20240501T1000.seg").exists()
+
+    inflated = []
+    decompress = zlib.decompress
+    monkeypatch.setattr(zlib, "decompress", lambda data: inflated.append(1) or decompress(data))
+    (audit,) = backend.fetch(None, "txn-42")
+    assert audit.latency_ms == 1.0
+    assert len(inflated) == 1
+
+    # A late audit for the compressed partition goes to a file of its own.
+    backend.write_many(None, [audit_row("txn-42", SEGMENT_START + timedelta(minutes=30), 7.0)])
+    assert (tmp_path / "audit-20240501T1000.seg.late").exists()
+    assert [audit.latency_ms for audit in backend.fetch(None, "txn-42")] == [7.0, 1.0]
+    assert len(list(backend.scan())) == 101
+    assert backend.maintain(now=SEGMENT_START.timestamp() + 7200)["compressed"] == 0
+
+
+def test_rolling_over_a_partition_maintains_segments_off_the_writing_thread(
+    tmp_path, monkeypatch
+):
+    backend = SegmentAuditBackend(tmp_path, compress_after_hours=0, seal_grace_seconds=0)
+    sealed_on = []
+    seal = backend._seal
+    monkeypatch.setattr(
+        backend, "_seal", lambda base: sealed_on.append(threading.current_thread()) or seal(base)
+    )
+    backend.write_many(None, [audit_row("txn-a", SEGMENT_START)])
+    backend.write_many(None, [audit_row("txn-b", SEGMENT_START + timedelta(hours=1))])
+    backend.close()  # waits for the maintenance run
+
+    assert sealed_on and threading.current_thread() not in sealed_on
+    assert (tmp_path / "audit-20240501T1000.seg.z").exists()
+    assert len(backend.fetch(None, "txn-a")) == 1
+
+
+def test_uuid7_lookups_only_visit_partitions_near_the_id_time(tmp_path, monkeypatch):
+    backend = SegmentAuditBackend(tmp_path)
+    transaction_id = models.new_id()
+    minted = datetime.fromtimestamp(
+        (uuid.UUID(transaction_id).int >> 80) / 1_000, timezone.utc
+    ).replace(tzinfo=None)
+    backend.write_many(
+        None,
+        [audit_row(transaction_id, minted)]
+        + [audit_row(models.new_id(), minted - timedelta(hours=hours)) for hours in range(2, 12)],
+    )
+
+    visited = []
+    fetch_from_partition = backend._fetch_from_partition
+    monkeypatch.setattr(
+        backend,
+        "_fetch_from_partition",
+        lambda base, key: visited.append(base.name) or fetch_from_partition(base, key),
+    )
+
+    assert len(backend.fetch(None, transaction_id)) == 1
+    assert 1 <= len(visited) <= 2
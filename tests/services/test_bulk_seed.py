@@ -0,0 +1,40 @@
+"""
+Bulk seeding tests: chunked writes keep transactions, audits and stats in step.
+"""
+
+from sqlalchemy import func, select
+
+from app import models, utils
+from app.database import Base, SessionLocal, engine
+from worker.bulk_seed import bulk_seed, generate_chunk
+
+
+def _counts() -> tuple[int, int, int]:
+    with SessionLocal() as session:
+        transactions = session.scalar(select(func.count(models.Transaction.id)))
+        audits = session.scalar(select(func.count(models.DecisionAudit.id)))
+        total = utils.calculate_stats(session)["total"]
+    return transactions, audits, total
+
+
+def test_generate_chunk_is_reproducible_and_aggregates_stats():
+    first = generate_chunk(3, 50, seed=11)
+    second = generate_chunk(3, 50, seed=11)
+    assert [row[1:3] for row in first.transactions] == [row[1:3] for row in second.transactions]
+    assert first.totals["total"] == 50
+    assert first.totals["approved"] + first.totals["declined"] == 50
+    assert sum(first.buckets.values()) == 50
+    assert {audit[1] for audit in first.audits} == {row[0] for row in first.transactions}
+
+
+def test_bulk_seed_writes_every_chunk_with_stats():
+    Base.metadata.create_all(bind=engine)
+    before = _counts()
+    progress: list[int] = []
+
+    result = bulk_seed(250, chunk_size=100, seed=5, progress=lambda rows, _: progress.append(rows))
+
+    assert result.rows == 250
+    assert progress == [100, 200, 250]
+    after = _counts()
+    assert [a - b for a, b in zip(after, before)] == [250, 250, 250]
@@ -0,0 +1,153 @@
+"""
+Unit tests for the two-tier feature cache building blocks.
+"""
+
+from app.services import CircuitBreaker, FeatureCache, LocalLRUCache
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_lru_evicts_least_recently_used_and_expires_entries():
+    clock = FakeClock()
+    lru = LocalLRUCache(max_entries=2, ttl_seconds=10, clock=clock)
+    lru.set("a", 1)
+    lru.set("b", 2)
+    assert lru.get("a") == 1
+    lru.set("c", 3)
+
+    assert lru.get("b") is None
+    assert lru.evictions == 1
+
+    clock.now = 11
+    assert lru.get("a") is None
+    assert lru.expirations == 1
+    assert len(lru) == 1
+
+
+def test_breaker_backs_off_exponentially_and_recovers():
+    clock = FakeClock()
+    breaker = CircuitBreaker(failure_threshold=2, backoff_seconds=1, clock=clock)
+    breaker.record_failure()
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == "open"
+    assert not breaker.allow()
+
+    clock.now = 1
+    assert breaker.allow()
+    assert not breaker.allow()  # only one probe while half-open
+    breaker.record_failure()
+    clock.now = 2.5
+    assert not breaker.allow()  # second backoff doubles to 2 seconds
+    clock.now = 3
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state == "closed"
+
+
+class FlakyRedis:
+    def __init__(self) -> None:
+        self.data: dict[str, str] = {}
+        self.down = True
+
+    def get(self, key):
+        if self.down:
+            raise ConnectionError("redis down")
+        return self.data.get(key)
+
+    def setex(self, key, ttl, value):
+        if self.down:
+            raise ConnectionError("redis down")
+        self.data[key] = value
+
+
+def test_feature_cache_survives_outage_and_reconnects():
+    clock = FakeClock()
+    redis = FlakyRedis()
+    cache = FeatureCache(
+        "redis://unused",
+        local_max_entries=1,
+        breaker=CircuitBreaker(failure_threshold=1, backoff_seconds=5, clock=clock),
+    )
+    cache._client = redis
+
+    cache.set("k1", {"v": 1})
+    assert cache.get("k1") == {"v": 1}  # served by L1 during the outage
+    assert cache.stats()["redis_state"] == "open"
+
+    redis.down = False
+    redis.data["k2"] = '{"v": 2}'
+    assert cache.get("k2") is None  # breaker still open
+    clock.now = 5
+    assert cache.get("k2") == {"v": 2}
+    assert cache.stats()["redis_state"] == "closed"
+    assert cache.stats()["evictions"] == 1
+
+
+class PipelinedRedis(FlakyRedis):
+    def __init__(self) -> None:
+        super().__init__()
+        self.down = False
+        self.round_trips = 0
+
+    def mget(self, keys):
+        self.round_trips += 1
+        return [self.data.get(key) for key in keys]
+
+    def pipeline(self, transaction=True):
+        redis = self
+
+        class Pipeline:
+            def __init__(self) -> None:
+                self.commands = []
+
+            def setex(self, key, ttl, value):
+                self.commands.append((key, value))
+
+            def execute(self):
+                redis.round_trips += 1
+                redis.data.update(self.commands)
+
+        return Pipeline()
+
+
+def test_get_many_and_set_many_use_single_round_trips_with_binary_codec():
+    redis = PipelinedRedis()
+    cache = FeatureCache("redis://unused", local_max_entries=0, encoding="binary")
+    cache._client = redis
+    blobs = {
+        f"40000012345{idx:05d}": {
+            "spending_velocity": idx / 100,
+            "device_trust_score": 0.5,
+            "ip_risk_score": 0.25,
+        }
+        for idx in range(50)
+    }
+
+    cache.set_features_many(blobs)
+    assert redis.round_trips == 1
+    assert all(len(value) == 25 for value in redis.data.values())
+
+    assert cache.get_features_many([*blobs, "4000009999999999"]) == blobs
+    assert redis.round_trips == 2
+    assert cache.stats()["misses"] == 1
+
+
+def test_blobs_from_another_codec_or_layout_count_as_misses():
+    redis = PipelinedRedis()
+    cache = FeatureCache("redis://unused", local_max_entries=0, encoding="json")
+    cache._client = redis
+    redis.data[cache.build_key("4000001234567890")] = b"\x01" + b"\x00" * 24
+    binary = FeatureCache("redis://unused", local_max_entries=0, encoding="binary")
+    binary._client = redis
+    redis.data[binary.build_key("4000001234560000")] = b"\x01" + b"\x00" * 16
+
+    assert cache.get_features("4000001234567890") is None
+    assert binary.get_features("4000001234560000") is None
+    assert (cache.stats()["misses"], binary.stats()["misses"]) == (1, 1)
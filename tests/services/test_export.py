@@ -0,0 +1,86 @@
+"""
+Unit tests for streaming transaction and audit exports.
+"""
+
+import csv
+import io
+from datetime import datetime, timedelta
+
+import orjson
+import pytest
+
+from app.services import AuditService, SegmentAuditBackend, export_audits, export_transactions
+from tests.services.helpers import (
+    SEGMENT_START,
+    audit_row,
+    make_audit,
+    shard_router,
+    write_transaction,
+)
+
+
+def test_transactions_stream_oldest_first_across_shards_in_every_text_format():
+    router = shard_router()
+    ids = {write_transaction(router, f"40000012345{n:05d}", 5.0 + n, "Approved") for n in range(23)}
+
+    lines = b"".join(export_transactions(router, "ndjson", batch_size=4)).splitlines()
+    rows = [orjson.loads(line) for line in lines]
+    assert {row["id"] for row in rows} == ids
+    keys = [(row["created_at"], row["id"]) for row in rows]
+    assert keys == sorted(keys)
+    assert "card_number" not in rows[0] and len(rows[0]["card_last4"]) == 4
+
+    middle = datetime.fromisoformat(rows[10]["created_at"])
+    text = b"".join(export_transactions(router, "csv", created_from=middle, batch_size=4))
+    exported = list(csv.DictReader(io.StringIO(text.decode())))
+    later = [row for row in rows if row["created_at"] >= rows[10]["created_at"]]
+    assert [row["id"] for row in exported] == [row["id"] for row in later]
+    assert float(exported[0]["amount"]) == later[0]["amount"]
+
+
+def test_arrow_and_parquet_round_trip_and_empty_exports_keep_the_header():
+    pa = pytest.importorskip("pyarrow")
+    parquet = pytest.importorskip("pyarrow.parquet")
+    router = shard_router(2)
+    service = AuditService()
+    for n in range(9):
+        transaction_id = write_transaction(router, f"40000012345{n:05d}", 5.0, "Approved")
+        with router.session(router.shard_for_id(transaction_id)) as session:
+            service.record(session, make_audit(transaction_id))
+
+    table = pa.ipc.open_stream(b"".join(export_audits(router, service, "arrow", batch_size=4)))
+    audits = table.read_all()
+    assert audits.num_rows == 9
+    assert orjson.loads(audits.column("decision_payload")[0].as_py())["status"] == "Approved"
+
+    data = b"".join(export_transactions(router, "parquet", batch_size=4))
+    assert parquet.ParquetFile(io.BytesIO(data)).metadata.num_rows == 9
+
+    future = datetime.utcnow() + timedelta(days=1)
+    header = b"".join(export_transactions(router, "csv", created_from=future))
+    assert header.decode().splitlines() == [
+        "id,card_last4,amount,currency,merchant,channel,device_id,status,risk_flag,created_at"
+    ]
+
+
+def test_segment_audits_export_only_partitions_in_range(tmp_path):
+    backend = SegmentAuditBackend(tmp_path, partition_minutes=60)
+    backend.write_many(
+        None,
+        [
+            audit_row(f"txn-{hour}", SEGMENT_START + timedelta(hours=hour, minutes=30))
+            for hour in range(4)
+        ],
+    )
+    service = AuditService(backend=backend)
+
+    chunks = export_audits(
+        shard_router(1),
+        service,
+        created_from=SEGMENT_START + timedelta(hours=1, minutes=30),
+        created_to=SEGMENT_START + timedelta(hours=3),
+    )
+    rows = [orjson.loads(line) for line in b"".join(chunks).splitlines()]
+
+    assert [row["transaction_id"] for row in rows] == ["txn-1", "txn-2"]
+    assert rows[0]["request_payload"]["merchant"] == "Segments"
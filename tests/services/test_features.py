@@ -0,0 +1,30 @@
+"""
+The precomputed feature table must reproduce the seeded generator exactly.
+"""
+
+from app.services.features import TABLE_SIZE, FeatureTable
+
+
+def test_table_matches_reference_generator_for_every_seed():
+    table = FeatureTable().build()
+
+    for seed in range(TABLE_SIZE):
+        expected = FeatureTable.generate(seed)
+        assert (
+            table.spending_velocity[seed],
+            table.device_trust_score[seed],
+            table.ip_risk_score[seed],
+        ) == expected
+
+
+def test_lookup_indexes_by_last_four_digits():
+    table = FeatureTable()
+    features = table.lookup("4000001234560042")
+
+    assert features.model_dump() == dict(
+        zip(
+            ("spending_velocity", "device_trust_score", "ip_risk_score"),
+            FeatureTable.generate(42),
+        ),
+        velocity=None,
+    )
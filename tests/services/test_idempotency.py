@@ -0,0 +1,43 @@
+"""
+Unit tests for Idempotency-Key lookups.
+"""
+
+import pytest
+
+from app.database import Base, SessionLocal, engine
+from app.models import new_id
+from app.services import BloomFilter, IdempotencyConflict, IdempotencyStore
+from app.services.idempotency import fingerprint
+
+
+def test_bloom_filter_has_no_false_negatives_and_few_false_positives():
+    bloom = BloomFilter(capacity=10_000, error_rate=0.01)
+    for idx in range(10_000):
+        bloom.add(f"key-{idx}")
+
+    assert all(f"key-{idx}" in bloom for idx in range(10_000))
+    false_positives = sum(f"other-{idx}" in bloom for idx in range(10_000))
+    assert false_positives < 200
+
+
+def test_store_confirms_from_database_after_restart():
+    Base.metadata.create_all(bind=engine)
+    key, transaction_id = f"key-{new_id()}", new_id()
+    request_fingerprint = fingerprint({"card_number": "4000001234567890", "amount": 10.0})
+    response = {"transaction_id": transaction_id, "status": "Approved"}
+    with SessionLocal() as session:
+        session.add(IdempotencyStore().row(key, request_fingerprint, transaction_id, response))
+        session.commit()
+
+    # A fresh store (new process) has an empty filter and answers without a lookup.
+    store = IdempotencyStore(bloom=BloomFilter(capacity=1_000))
+    with SessionLocal() as session:
+        assert store.lookup(session, key, request_fingerprint) is None
+        assert store.bloom_negatives == 1
+        assert store.warm(session, limit=1_000) >= 1
+        assert store.lookup(session, key, request_fingerprint) == response
+        assert store.database_hits == 1
+        assert store.lookup(session, key, request_fingerprint) == response
+        assert store.local_hits == 1
+        with pytest.raises(IdempotencyConflict):
+            store.lookup(session, key, fingerprint({"amount": 11.0}))
@@ -0,0 +1,65 @@
+"""
+Unit tests for time-ordered ids and their compact storage.
+"""
+
+import uuid
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import Session
+
+from app import models
+from app.database import Base, SessionLocal, engine
+
+
+def test_new_ids_are_uuid7_and_sort_in_creation_order():
+    ids = [models.new_id() for _ in range(5_000)]
+    assert ids == sorted(ids)
+    assert len(set(ids)) == len(ids)
+    parsed = uuid.UUID(ids[0])
+    assert parsed.version == 7
+    assert parsed.variant == uuid.RFC_4122
+    assert models.parse_id(ids[0].upper()) == ids[0]
+    assert models.parse_id("not-a-uuid") is None
+
+
+def test_ids_are_stored_as_16_bytes_and_read_back_as_strings():
+    Base.metadata.create_all(bind=engine)
+    transaction_id = models.new_id()
+    with SessionLocal() as session:
+        session.add(
+            models.Transaction(
+                id=transaction_id,
+                card_number="4000001234567890",
+                amount=12.5,
+                merchant="Compact Ids",
+                status="Approved",
+            )
+        )
+        session.commit()
+        stored = session.execute(
+            text("SELECT id FROM transactions WHERE merchant = 'Compact Ids'")
+        ).scalar_one()
+        assert stored == uuid.UUID(transaction_id).bytes
+        assert session.get(models.Transaction, transaction_id).id == transaction_id
+
+
+def test_text_ids_from_older_schemas_are_migrated_to_compact_storage(tmp_path):
+    legacy = create_engine(f"sqlite:///{tmp_path / 'legacy.db'}")
+    transaction_id = str(uuid.uuid4())
+    with legacy.begin() as connection:
+        connection.exec_driver_sql(
+            "CREATE TABLE transactions (id VARCHAR PRIMARY KEY, card_number VARCHAR NOT NULL, "
+            "amount FLOAT NOT NULL, currency VARCHAR(3) NOT NULL, merchant VARCHAR NOT NULL, "
+            "channel VARCHAR, device_id VARCHAR, status VARCHAR NOT NULL, risk_flag VARCHAR, "
+            "created_at DATETIME NOT NULL)"
+        )
+        connection.exec_driver_sql(
+            "INSERT INTO transactions VALUES "
+            f"('{transaction_id}', '4000001234567890', 5.0, 'GBP', 'Legacy', NULL, NULL, "
+            "'Approved', NULL, '2024-05-01 10:00:00')"
+        )
+
+    assert models.migrate_legacy_ids(legacy, batch_size=1) == 1
+    assert models.migrate_legacy_ids(legacy) == 0
+    with Session(legacy) as session:
+        assert session.get(models.Transaction, transaction_id).merchant == "Legacy"
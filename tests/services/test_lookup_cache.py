@@ -0,0 +1,76 @@
+"""
+Unit tests for the transaction/audit lookup cache.
+"""
+
+import fnmatch
+
+from app.services import LookupCache
+from app.services.lookup_cache import TRANSACTION
+
+
+def test_read_through_counts_hits_and_misses():
+    cache = LookupCache(local_max_entries=2)
+
+    assert cache.get(TRANSACTION, "a") is None
+    cache.fill(TRANSACTION, "a", {"id": "a"})
+    cache.put(TRANSACTION, "b", {"id": "b"})
+    cache.put(TRANSACTION, "c", {"id": "c"})
+
+    assert cache.get(TRANSACTION, "a") is None  # evicted by the size bound
+    assert cache.get(TRANSACTION, "c") == {"id": "c"}
+    stats = cache.stats()
+    assert (stats["local_hits"], stats["misses"], stats["evictions"]) == (1, 2, 1)
+    assert stats["hit_rate"] == round(1 / 3, 4)
+
+    cache.clear()
+    assert cache.get(TRANSACTION, "c") is None
+
+
+def test_zero_capacity_disables_caching():
+    cache = LookupCache(local_max_entries=0)
+    cache.put(TRANSACTION, "a", {"id": "a"})
+
+    assert cache.get(TRANSACTION, "a") is None
+    assert cache.stats()["local_entries"] == 0
+
+
+class SharedRedis:
+    def __init__(self) -> None:
+        self.data: dict[str, bytes] = {}
+
+    def get(self, key: str):
+        return self.data.get(key)
+
+    def set(self, key: str, value: bytes, ex: int) -> None:
+        self.data[key] = value
+
+    def incr(self, key: str) -> int:
+        value = int(self.data.get(key, 0)) + 1
+        self.data[key] = str(value).encode()
+        return value
+
+    def scan_iter(self, match: str, count: int):
+        return [key for key in list(self.data) if fnmatch.fnmatch(key, match)]
+
+    def delete(self, key: str) -> None:
+        self.data.pop(key, None)
+
+
+def test_clear_reaches_the_in_process_tier_of_other_processes():
+    redis = SharedRedis()
+    resetter = LookupCache(redis=redis, generation_check_seconds=0)
+    other = LookupCache(generation_redis=redis, generation_check_seconds=0)
+    assert other.get(TRANSACTION, "a") is None  # the first lookup learns the generation
+    other.put(TRANSACTION, "a", {"id": "a"})
+    assert other.get(TRANSACTION, "a") == {"id": "a"}
+
+    resetter.clear()
+    assert other.get(TRANSACTION, "a") is None
+
+    # Bodies in the Redis tier are deleted, but the generation key survives.
+    shared = LookupCache(redis=redis, generation_check_seconds=0)
+    shared.fill(TRANSACTION, "b", {"id": "b"})
+    assert shared.get(TRANSACTION, "b") == {"id": "b"}
+    resetter.clear()
+    assert shared.get(TRANSACTION, "b") is None
+    assert redis.get("lookup-generation") == b"2"
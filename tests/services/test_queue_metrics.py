@@ -0,0 +1,99 @@
+"""
+Per-queue worker metrics tests against a minimal in-memory Redis stand-in.
+"""
+
+from collections import defaultdict
+
+from app.services import QueueMetrics
+from worker.run_worker import job_items
+from worker.tasks import chunked
+
+
+class HashRedis:
+    def __init__(self) -> None:
+        self.hashes: dict[str, dict[str, str]] = defaultdict(dict)
+        self.sets: dict[str, set[str]] = defaultdict(set)
+        self.lists: dict[str, list[str]] = defaultdict(list)
+        self.round_trips = 0
+
+    def pipeline(self, transaction=True):
+        redis = self
+
+        class Pipeline:
+            def __init__(self) -> None:
+                self.calls = []
+
+            def __getattr__(self, name):
+                def queue(*args):
+                    self.calls.append((name, args))
+
+                return queue
+
+            def execute(self):
+                redis.round_trips += 1
+                return [getattr(redis, name)(*args) for name, args in self.calls]
+
+        return Pipeline()
+
+    def sadd(self, key, value):
+        self.sets[key].add(value)
+
+    def smembers(self, key):
+        return {value.encode() for value in self.sets[key]}
+
+    def hincrby(self, key, field, amount):
+        field = str(field)
+        self.hashes[key][field] = str(int(self.hashes[key].get(field, 0)) + amount)
+
+    def hincrbyfloat(self, key, field, amount):
+        self.hashes[key][field] = str(float(self.hashes[key].get(field, 0)) + amount)
+
+    def hsetnx(self, key, field, value):
+        self.hashes[key].setdefault(field, str(value))
+
+    def hset(self, key, field, value):
+        self.hashes[key][field] = str(value)
+
+    def hgetall(self, key):
+        return {k.encode(): v.encode() for k, v in self.hashes.get(key, {}).items()}
+
+    def llen(self, key):
+        return len(self.lists[key])
+
+    def delete(self, *keys):
+        for key in keys:
+            self.hashes.pop(key, None)
+
+
+def test_queue_metrics_aggregate_throughput_and_latency():
+    redis = HashRedis()
+    clock_values = iter([100.0, 101.0, 102.0])
+    metrics = QueueMetrics(redis, clock=lambda: next(clock_values))
+    redis.lists["rq:queue:riskops"] = ["job-a", "job-b"]
+
+    metrics.record("riskops", items=1_000, run_seconds=0.2, wait_seconds=0.05)
+    metrics.record("riskops", items=1_000, run_seconds=0.4, wait_seconds=0.15)
+    metrics.record("riskops", items=500, run_seconds=1.0, wait_seconds=0.0, failed=True)
+
+    assert redis.round_trips == 3
+    (summary,) = metrics.snapshot()
+    assert summary["queue"] == "riskops"
+    assert summary["queued"] == 2
+    assert summary["jobs"] == 3
+    assert summary["failed"] == 1
+    assert summary["items"] == 2_000
+    assert summary["items_per_second"] == 1_000.0
+    assert summary["mean_wait_ms"] == 66.67
+    assert abs(summary["run_ms_p50"] - 400) <= 4
+    assert abs(summary["run_ms_p99"] - 1_000) <= 10
+
+    metrics.reset()
+    assert metrics.snapshot()[0]["jobs"] == 0
+
+
+def test_job_items_and_chunking_helpers():
+    assert job_items(250) == 250
+    assert job_items(["a", "b"]) == 2
+    assert job_items({"spending_velocity": 0.1}) == 1
+    assert job_items(None) == 1
+    assert list(chunked(range(5), 2)) == [[0, 1], [2, 3], [4]]
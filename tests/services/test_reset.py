@@ -0,0 +1,69 @@
+"""
+Unit tests for the fast table reset.
+"""
+
+from sqlalchemy import func, select, text
+from sqlalchemy.dialects import postgresql
+
+from app import models
+from app.database import Base, SessionLocal, engine
+from app.services import AuditService, reset_all
+from tests.services.helpers import make_audit
+
+
+def _index_names() -> set[str]:
+    with engine.connect() as connection:
+        rows = connection.execute(
+            text(
+                "SELECT name FROM sqlite_master "
+                "WHERE type = 'index' AND tbl_name = 'transactions'"
+            )
+        )
+        return {row[0] for row in rows}
+
+
+def test_reset_all_empties_tables_and_keeps_indexes():
+    Base.metadata.create_all(bind=engine)
+    models.ensure_indexes(engine)
+    indexes_before = _index_names()
+    service = AuditService()
+    with SessionLocal() as session:
+        transaction = models.Transaction(
+            card_number="4000001234567890",
+            amount=10.0,
+            currency="GBP",
+            merchant="Reset Shop",
+            status="Approved",
+        )
+        session.add(transaction)
+        session.commit()
+        service.record(session, make_audit(transaction.id))
+
+    reset_all(engine, service, lock_timeout_ms=1_000)
+
+    with SessionLocal() as session:
+        assert session.scalar(select(func.count()).select_from(models.Transaction)) == 0
+        assert session.scalar(select(func.count()).select_from(models.DecisionAudit)) == 0
+        assert session.scalar(select(func.count()).select_from(models.StatsCounter)) == 0
+    assert "ix_transactions_card_last4_created_at_id" in indexes_before
+    assert _index_names() == indexes_before
+
+
+def test_discard_pending_drops_queued_audits():
+    Base.metadata.create_all(bind=engine)
+    service = AuditService(write_behind=True, flush_batch_size=1_000, flush_interval_seconds=60)
+    transaction_id = models.new_id()
+    with SessionLocal() as session:
+        service.record(session, make_audit(transaction_id))
+    service.discard_pending()
+    service.close()
+
+    with SessionLocal() as session:
+        assert service.fetch_by_transaction(session, transaction_id) == []
+    assert service.queue_stats()["queue_depth"] == 0
+
+
+def test_postgres_index_backfill_builds_concurrently():
+    index = next(iter(models.Transaction.__table__.indexes))
+    ddl = models._create_index_concurrently(index, postgresql.dialect())
+    assert ddl.startswith(f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {index.name} ON transactions")
@@ -0,0 +1,132 @@
+"""
+Unit tests for the compiled rule engine.
+"""
+
+import json
+import random
+
+import numpy as np
+import pytest
+
+from app.schemas import PaymentRequest
+from app.services import Condition, Rule, RuleEngine, RuleError, RuleSet
+from app.services.features import get_feature_table
+
+CURRENCIES = ["GBP", "EUR", "USD"]
+
+
+def _rule_set() -> RuleSet:
+    rules = [
+        Rule(
+            f"merchant-{idx}",
+            (Condition("merchant", "eq", f"Merchant {idx}"), Condition("amount", "gt", 100 + idx)),
+            decline_rate=1.0,
+            reason=f"merchant {idx}",
+        )
+        for idx in range(20)
+    ]
+    rules += [
+        Rule(
+            "eur-or-usd-risky-ip",
+            (Condition("currency", "in", ["EUR", "USD"]), Condition("ip_risk_score", "gte", 0.7)),
+            decline_rate=1.0,
+            reason="risky ip",
+        ),
+        Rule("not-ecommerce", (Condition("channel", "ne", "ecommerce"),), decline_rate=0.0),
+        Rule("big-merchants", (Condition("merchant", "in", ["Merchant 1", "Merchant 30"]),), 1.0),
+        Rule("catch-all", (), decline_rate=0.5, reason="coin flip"),
+    ]
+    return RuleSet(rules)
+
+
+def _payloads(count: int) -> list[PaymentRequest]:
+    rng = random.Random(7)
+    return [
+        PaymentRequest.model_construct(
+            card_number=f"4000001234{rng.randint(0, 999_999):06d}",
+            amount=round(rng.uniform(1, 400), 2),
+            currency=rng.choice(CURRENCIES),
+            merchant=f"Merchant {rng.randint(0, 40)}",
+            channel=rng.choice(["ecommerce", "in-store", None]),
+            device_id=None,
+        )
+        for _ in range(count)
+    ]
+
+
+def test_compiled_dispatch_matches_batch_masks():
+    rule_set = _rule_set()
+    assert rule_set.dispatch_fields[0] == "merchant"
+    payloads = _payloads(2_000)
+    features = [get_feature_table().lookup(payload.card_number) for payload in payloads]
+    amounts = np.array([payload.amount for payload in payloads])
+    draws = np.random.default_rng(3).random(len(payloads))
+
+    statuses, reasons = rule_set.decide_many(payloads, features, amounts, draws)
+
+    for payload, feature_set, draw, status, reason in zip(
+        payloads, features, draws, statuses, reasons
+    ):
+        assert rule_set.decide(payload, feature_set, draw) == (status, reason)
+    assert {"Approved", "Declined"} <= set(statuses)
+
+
+def test_rule_set_parses_yaml_shorthand_and_rejects_bad_rules(tmp_path):
+    path = tmp_path / "rules.yaml"
+    path.write_text(
+        "version: 3\n"
+        "rules:\n"
+        "  - name: blocked\n"
+        "    when: {merchant: Bad Shop, amount: {gte: 10, lt: 50}}\n"
+        "    decision: decline\n"
+        "    reason: blocked\n"
+    )
+    rule_set = RuleSet.load(path)
+    assert rule_set.version == "3"
+    assert [c.op for c in rule_set.rules[0].conditions] == ["eq", "gte", "lt"]
+
+    with pytest.raises(RuleError):
+        RuleSet.from_dict({"rules": [{"when": {"card_number": {"eq": "4000"}}}]})
+    with pytest.raises(RuleError):
+        RuleSet.from_dict({"rules": [{"when": {"merchant": {"gt": "A"}}}]})
+    with pytest.raises(RuleError):
+        RuleSet.from_dict({"rules": [{"decline_rate": 2}]})
+    for rules in ([1], [{"when": ["merchant"]}], [{"when": {"amount": {"in": 5}}}]):
+        with pytest.raises(RuleError):
+            RuleSet.from_dict({"rules": rules})
+
+
+def test_engine_hot_reloads_and_keeps_last_good_rules(tmp_path):
+    path = tmp_path / "rules.json"
+    path.write_text(json.dumps({"version": "1", "rules": [{"decision": "approve"}]}))
+    now = [0.0]
+    engine = RuleEngine(
+        RuleSet([]), path, reload_interval_seconds=1.0, clock=lambda: now[0]
+    )
+    assert engine.current().version == "1"
+
+    path.write_text(json.dumps({"version": "2", "rules": [{"decision": "decline"}] * 2}))
+    assert engine.current().version == "1"  # not checked again until the interval passes
+    now[0] = 1.5
+    assert engine.current().version == "2"
+    assert engine.reloads == 1
+
+    path.write_text("{not json")
+    now[0] = 3.0
+    assert engine.current().version == "2"
+    assert engine.last_error
+
+
+def test_engine_keeps_last_good_rules_on_broken_yaml(tmp_path):
+    path = tmp_path / "rules.yaml"
+    path.write_text("version: 1\nrules:\n  - decision: approve\n")
+    engine = RuleEngine(RuleSet([]), path)
+
+    path.write_text("version: 2\nrules: [\n  - decision: : decline\n")
+    assert not engine.reload(force=True)
+    assert engine.current().version == "1"
+    assert engine.last_error.startswith(str(path))
+
+    path.write_text("version: 3\nrules:\n  - when: [merchant]\n")
+    assert not engine.reload(force=True)
+    assert "when must map fields" in engine.last_error
@@ -0,0 +1,40 @@
+"""
+Unit tests for the scoring service heuristics.
+"""
+
+from app.core import config
+from app.schemas import PaymentRequest
+from app.services import ScoringService
+
+
+def _payload(card_suffix: int, amount: float) -> PaymentRequest:
+    return PaymentRequest(
+        card_number=f"400000123456{card_suffix:04d}",
+        amount=amount,
+        merchant="Unit Test",
+    )
+
+
+def test_evaluate_many_scores_match_scalar_path():
+    service = ScoringService(settings=config.Settings())
+    payloads = [_payload(idx, amount=25.0 + idx * 37.5) for idx in range(40)]
+
+    decisions = service.evaluate_many(payloads)
+
+    assert len(decisions) == len(payloads)
+    for payload, decision in zip(payloads, decisions):
+        features = service.generate_feature_snapshot(payload)
+        expected = round(service._calculate_score(payload.amount, features), 4)
+        assert decision.score == expected
+        assert decision.features == features
+
+
+def test_evaluate_many_respects_decline_rates():
+    settings = config.Settings(high_amount_decline_rate=1.0, random_decline_rate=0.0)
+    service = ScoringService(settings=settings)
+
+    low, high = service.evaluate_many([_payload(1, 10.0), _payload(2, 10_000.0)])
+
+    assert (low.status, low.reason) == ("Approved", None)
+    assert high.status == "Declined"
+    assert high.reason == "High amount flagged by risk heuristic."
@@ -0,0 +1,90 @@
+"""
+Unit tests for card-hash sharding across several SQLite files.
+"""
+
+from sqlalchemy import func, select
+
+from app import models, utils
+from app.database import ShardRouter
+from app.services import AuditService, reset_all
+from tests.services.helpers import make_audit, shard_router, write_transaction
+
+
+def test_cards_spread_over_shards_and_ids_name_their_shard():
+    router = ShardRouter(["sqlite://"] * 4)
+    shards = {router.shard_for_card(f"40000012345{n:05d}") for n in range(200)}
+    assert shards == {0, 1, 2, 3}
+    assert router.shard_for_card("4000001234567890") == router.shard_for_card("4000001234567890")
+    for shard in range(4):
+        assert router.shard_for_id(models.new_id(shard)) == shard
+    assert ShardRouter(["sqlite://"]).shard_for_id(models.new_id(3)) == 0
+    # Ids minted before sharding live in the first database whatever their bits say.
+    assert router.shards_for_id(models.new_id(2)) == [2, 0]
+    assert router.shards_for_id(models.new_id(0)) == [0]
+
+
+
+def test_pools_cover_every_shard_engine_built_so_far():
+    router = ShardRouter(["sqlite://"] * 3)
+    assert router.pools() == {}
+    router.engine(2)
+    router.engine(0)
+    assert sorted(router.pools()) == [0, 2]
+    assert router.pools()[2] is router.engine(2).pool
+
+def test_rows_land_on_their_card_shard_and_stats_are_gathered():
+    router = shard_router()
+    ids = [
+        write_transaction(router, f"40000012345{n:05d}", amount, status)
+        for n, (amount, status) in enumerate(
+            [(10.0, "Approved"), (20.0, "Declined"), (30.0, "Approved")] * 10
+        )
+    ]
+
+    counts = router.scatter(
+        lambda session: session.scalar(select(func.count(models.Transaction.id)))
+    )
+    assert sum(counts) == 30
+    assert all(counts)
+    for transaction_id in ids:
+        with router.session(router.shard_for_id(transaction_id)) as session:
+            assert session.get(models.Transaction, transaction_id) is not None
+
+    stats = utils.calculate_stats(None, router=router)
+    assert stats["total"] == 30
+    assert stats["approved"] == 20
+    assert stats["avg_amount"] == 20.0
+    assert abs(stats["p95_latency"] - 3.0) <= 3.0 * 0.01
+
+
+def test_listing_merges_pages_from_every_shard():
+    router = shard_router()
+    ids = {write_transaction(router, f"40000012345{n:05d}", 5.0, "Approved") for n in range(25)}
+
+    seen: list[models.Transaction] = []
+    cursor = None
+    while True:
+        rows, cursor = utils.list_transactions(None, limit=7, cursor=cursor, router=router)
+        seen.extend(rows)
+        if cursor is None:
+            break
+
+    assert {row.id for row in seen} == ids
+    keys = [(row.created_at, row.id) for row in seen]
+    assert keys == sorted(keys, reverse=True)
+
+
+def test_reset_all_empties_every_shard():
+    router = shard_router(2)
+    service = AuditService()
+    for n in range(6):
+        transaction_id = write_transaction(router, f"40000012345{n:05d}", 5.0, "Approved")
+        with router.session(router.shard_for_id(transaction_id)) as session:
+            service.record(session, make_audit(transaction_id))
+
+    reset_all(router.engines(), service, lock_timeout_ms=1_000)
+
+    assert router.scatter(
+        lambda session: session.scalar(select(func.count(models.DecisionAudit.id)))
+    ) == [0, 0]
+    assert utils.calculate_stats(None, router=router)["total"] == 0
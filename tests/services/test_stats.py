@@ -0,0 +1,129 @@
+"""
+Unit tests for the incremental stats counters and latency sketch.
+"""
+
+import math
+import random
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+from app import models
+from app.database import Base, SessionLocal, engine
+from app.services import LatencySketch, StatsService
+
+
+def _nearest_rank(values: list[float], percentile: float) -> float:
+    data = sorted(values)
+    return data[max(0, math.ceil(percentile * len(data)) - 1)]
+
+
+def test_sketch_quantile_within_relative_accuracy():
+    rng = random.Random(7)
+    values = [rng.lognormvariate(2.0, 0.8) for _ in range(5_000)]
+    sketch = LatencySketch(relative_accuracy=0.01)
+    for value in values:
+        sketch.add(value)
+
+    for percentile in (0.5, 0.95, 0.99):
+        exact = _nearest_rank(values, percentile)
+        assert abs(sketch.quantile(percentile) - exact) <= exact * 0.01
+
+
+def test_sketches_merge_by_adding_buckets():
+    left, right, combined = LatencySketch(), LatencySketch(), LatencySketch()
+    for value in (1.0, 2.0, 3.0):
+        left.add(value)
+        combined.add(value)
+    for value in (10.0, 20.0):
+        right.add(value)
+        combined.add(value)
+
+    left.merge(right.buckets)
+
+    assert left.buckets == combined.buckets
+    assert LatencySketch().quantile(0.95) is None
+
+
+def test_rebuild_matches_incremental_counters():
+    Base.metadata.create_all(bind=engine)
+    service = StatsService()
+    with SessionLocal() as session:
+        session.query(models.DecisionAudit).delete()
+        session.query(models.Transaction).delete()
+        service.reset(session)
+        for status, amount, latency_ms in [
+            ("Approved", 10.0, 1.2),
+            ("Declined", 30.0, 4.8),
+            ("Approved", 20.0, 0.0),
+        ]:
+            transaction_id = models.new_id()
+            session.add(
+                models.Transaction(
+                    id=transaction_id,
+                    card_number="4000001234567890",
+                    amount=amount,
+                    merchant="Stats",
+                    status=status,
+                )
+            )
+            session.add(
+                models.DecisionAudit(
+                    transaction_id=transaction_id,
+                    request_payload={},
+                    decision_payload={},
+                    latency_ms=latency_ms,
+                )
+            )
+            service.record(session, status=status, amount=amount, latency_ms=latency_ms)
+        session.commit()
+
+        incremental = service.snapshot(session)
+        rebuilt = service.rebuild(session)
+
+    assert incremental == rebuilt
+    assert incremental["total"] == 3
+    assert incremental["approved"] == 2
+    assert incremental["avg_amount"] == 20.0
+    assert abs(incremental["p95_latency"] - 4.8) <= 4.8 * 0.01
+
+
+def test_striped_counters_add_up_across_rows():
+    Base.metadata.create_all(bind=engine)
+    service = StatsService(counter_stripes=8)
+    with SessionLocal() as session:
+        service.reset(session)
+        for n in range(40):
+            status = "Approved" if n % 4 else "Declined"
+            service.record(session, status=status, amount=10.0, latency_ms=1.0)
+        session.commit()
+
+        stripes = session.query(models.StatsCounter).count()
+        bucket_stripes = session.query(models.LatencyBucket).count()
+        stats = service.snapshot(session)
+
+    assert 1 < stripes <= 8
+    # Every latency lands in one bucket, spread over the same stripes.
+    assert bucket_stripes == stripes
+    assert math.isclose(stats["p95_latency"], 1.0, rel_tol=0.02)
+    assert (stats["total"], stats["approved"], stats["declined"]) == (40, 30, 10)
+    assert stats["avg_amount"] == 10.0
+
+
+def test_unstriped_latency_buckets_are_migrated_with_their_counts(tmp_path):
+    legacy = create_engine(f"sqlite:///{tmp_path / 'legacy.db'}")
+    with legacy.begin() as connection:
+        connection.exec_driver_sql(
+            "CREATE TABLE latency_buckets (bucket INTEGER PRIMARY KEY, count INTEGER NOT NULL)"
+        )
+        connection.exec_driver_sql("INSERT INTO latency_buckets VALUES (0, 3), (115, 1)")
+
+    assert models.migrate_unstriped_buckets(legacy)
+    assert not models.migrate_unstriped_buckets(legacy)
+    Base.metadata.create_all(bind=legacy)
+    service = StatsService(counter_stripes=4)
+    with Session(legacy) as session:
+        totals = {"total": 1, "approved": 1, "declined": 0, "amount_sum": 5.0}
+        service.apply(session, totals, {0: 2})
+        _, buckets = service.read(session)
+    assert buckets == {0: 5, 115: 1}
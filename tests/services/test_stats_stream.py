@@ -0,0 +1,46 @@
+"""
+Unit tests for the shared `/stats/stream` producer.
+"""
+
+import asyncio
+
+from app.services import StatsBroadcaster
+
+
+def test_one_computation_per_tick_for_all_subscribers():
+    state = {"total": 0, "approved": 0}
+    calls = []
+
+    def compute() -> dict:
+        calls.append(1)
+        return dict(state)
+
+    async def scenario() -> tuple[list, list]:
+        broadcaster = StatsBroadcaster(compute, interval_seconds=0.01)
+        streams = [broadcaster.subscribe(heartbeat_seconds=1.0) for _ in range(5)]
+        snapshots = [await anext(stream) for stream in streams]
+        assert broadcaster.subscribers == 5
+        state.update(total=3, approved=2)
+        deltas = [await anext(stream) for stream in streams]
+        for stream in streams:
+            await stream.aclose()
+        assert broadcaster.subscribers == 0
+        return snapshots, deltas
+
+    snapshots, deltas = asyncio.run(scenario())
+
+    assert snapshots == [("snapshot", {"total": 0, "approved": 0})] * 5
+    assert deltas == [("delta", {"total": 3, "approved": 2})] * 5
+    # One snapshot for the first viewer, then a handful of ticks shared by all five.
+    assert len(calls) < 5 + 5
+
+
+def test_heartbeat_when_nothing_changes():
+    async def scenario() -> list:
+        broadcaster = StatsBroadcaster(lambda: {"total": 1}, interval_seconds=0.01)
+        stream = broadcaster.subscribe(heartbeat_seconds=0.05)
+        events = [await anext(stream), await anext(stream)]
+        await stream.aclose()
+        return events
+
+    assert asyncio.run(scenario()) == [("snapshot", {"total": 1}), None]
@@ -0,0 +1,87 @@
+"""
+Unit tests for the sliding-window velocity counters.
+"""
+
+from app.core import config
+from app.schemas import PaymentRequest
+from app.services import Condition, InMemoryVelocity, Rule, RuleEngine, RuleSet, ScoringService
+
+CARD = "4000001234567890"
+
+
+class _Clock:
+    def __init__(self, now: float = 1_000_000.0) -> None:
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_windows_count_and_expire_per_card_and_device():
+    clock = _Clock()
+    velocity = InMemoryVelocity(buckets=12, clock=clock)
+
+    velocity.record(CARD, "device-1", 10.0)
+    clock.now += 30
+    values = velocity.record(CARD, "device-1", 15.5)
+    assert values["card_count_1m"] == 2.0
+    assert values["card_amount_1m"] == 25.5
+    assert values["device_count_1m"] == 2.0
+
+    clock.now += 120
+    values = velocity.record(CARD, None, 4.5)
+    assert values["card_count_1m"] == 1.0
+    assert values["card_amount_1m"] == 4.5
+    assert values["card_count_1h"] == 3.0
+    assert values["card_amount_24h"] == 30.0
+    assert values["device_count_24h"] == 0.0
+
+    clock.now += 2 * 3_600
+    values = velocity.record("4000009999999999", "device-1", 1.0)
+    assert values["card_count_24h"] == 1.0
+    assert values["device_count_1h"] == 1.0
+    assert values["device_count_24h"] == 3.0
+
+
+def test_least_recently_seen_keys_are_evicted():
+    velocity = InMemoryVelocity(max_keys=2, clock=_Clock())
+
+    velocity.record("4000000000000001", None, 1.0)
+    velocity.record("4000000000000002", None, 1.0)
+    velocity.record("4000000000000001", None, 1.0)
+    velocity.record("4000000000000003", None, 1.0)
+
+    assert len(velocity) == 2
+    assert velocity.evictions == 1
+    assert velocity.record("4000000000000001", None, 1.0)["card_count_1h"] == 3.0
+    assert velocity.record("4000000000000002", None, 1.0)["card_count_1h"] == 1.0
+
+
+def test_scoring_uses_velocity_in_features_and_rules():
+    settings = config.Settings(velocity_spend_reference=100.0)
+    rules = RuleSet(
+        [
+            Rule(
+                "card-burst",
+                (Condition("card_count_1m", "gt", 2),),
+                decline_rate=1.0,
+                reason="burst",
+            )
+        ]
+    )
+    service = ScoringService(
+        settings=settings,
+        rules=RuleEngine(rules),
+        velocity=InMemoryVelocity(clock=_Clock()),
+    )
+    payload = PaymentRequest(card_number=CARD, amount=40.0, merchant="Velocity Shop")
+
+    first, second = service.evaluate(payload), service.evaluate(payload)
+    assert first.features.velocity.card_count_1m == 1.0
+    assert second.features.spending_velocity == 0.8
+    assert (first.status, second.status) == ("Approved", "Approved")
+
+    batch = service.evaluate_many([payload, payload])
+    assert [decision.features.velocity.card_count_1m for decision in batch] == [3.0, 4.0]
+    assert [decision.reason for decision in batch] == ["burst", "burst"]
+    assert batch[1].features.spending_velocity == 1.0
@@ -0,0 +1,319 @@
+"""
+High-volume synthetic seeding for capacity tests.
+
+Producer processes generate and score fixed-size chunks of payments; the parent
+writes each chunk in its own transaction (``COPY`` on Postgres, ``executemany``
+elsewhere) together with the matching `/stats` increments. At most
+``2 * processes`` chunks are in flight, so memory stays constant however many
+rows are requested.
+"""
+
+from __future__ import annotations
+
+import random
+import sys
+import time
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Callable, Iterator, Optional
+
+import orjson
+from sqlalchemy import Connection, insert
+
+from app import models, schemas
+from app.core import config
+from app.core.constants import APPROVED, DECLINED
+from app.database import SessionLocal, get_shard_router, use_shard
+from app.dependencies import get_audit_service
+from app.services import LatencySketch, ScoringService, StatsService
+
+TRANSACTION_COLUMNS = (
+    "id",
+    "card_number",
+    "amount",
+    "currency",
+    "merchant",
+    "channel",
+    "device_id",
+    "status",
+    "risk_flag",
+    "created_at",
+)
+AUDIT_COLUMNS = (
+    "id",
+    "transaction_id",
+    "request_payload",
+    "decision_payload",
+    "latency_ms",
+    "created_at",
+)
+
+
+@dataclass(slots=True)
+class SeedChunk:
+    """
+    One producer's output: rows ready to write plus their pre-aggregated stats.
+    """
+
+    transactions: list[tuple]
+    audits: list[tuple]
+    totals: dict[str, float]
+    buckets: dict[int, int]
+
+    def split(
+        self, shard_of: Callable[[str], int], relative_accuracy: float
+    ) -> dict[int, SeedChunk]:
+        """
+        Regroup the rows by the shard of their transaction id, with each
+        group's own stats deltas.
+        """
+
+        groups: dict[int, SeedChunk] = {}
+        sketches: dict[int, LatencySketch] = {}
+        for transaction, audit in zip(self.transactions, self.audits):
+            shard = shard_of(transaction[0])
+            group = groups.get(shard)
+            if group is None:
+                group = groups[shard] = SeedChunk(
+                    [], [], {"total": 0, "approved": 0, "declined": 0, "amount_sum": 0.0}, {}
+                )
+                sketches[shard] = LatencySketch(relative_accuracy)
+            group.transactions.append(transaction)
+            group.audits.append(audit)
+            group.totals["total"] += 1
+            group.totals["approved"] += transaction[7] == APPROVED
+            group.totals["declined"] += transaction[7] == DECLINED
+            group.totals["amount_sum"] += transaction[2]
+            sketches[shard].add(audit[4])
+        for shard, group in groups.items():
+            group.buckets = dict(sketches[shard].buckets)
+        return groups
+
+
+@dataclass(slots=True)
+class BulkSeedResult:
+    rows: int
+    seconds: float
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.rows / self.seconds if self.seconds else 0.0
+
+
+def generate_chunk(chunk_index: int, size: int, seed: Optional[int] = None) -> SeedChunk:
+    """
+    Build and score ``size`` synthetic payments. Runs inside producer processes.
+    """
+
+    settings = config.get_settings()
+    router = get_shard_router()
+    rng = random.Random(None if seed is None else seed + chunk_index)
+    payloads = [
+        schemas.PaymentRequest.model_construct(
+            card_number=f"4{rng.randint(10**14, 10**15 - 1)}",
+            amount=round(rng.uniform(10, 950), 2),
+            currency="GBP",
+            merchant=f"Bulk Merchant {rng.randint(1, 1_000)}",
+            channel="bulk-seed",
+            device_id=f"bulk-device-{rng.randint(1, 100_000)}",
+        )
+        for _ in range(size)
+    ]
+    decisions = ScoringService(settings=settings).evaluate_many(payloads)
+
+    created_at = datetime.utcnow().isoformat(sep=" ")
+    sketch = LatencySketch(settings.stats_sketch_relative_accuracy)
+    totals = {"total": 0, "approved": 0, "declined": 0, "amount_sum": 0.0}
+    transactions: list[tuple] = []
+    audits: list[tuple] = []
+    for payload, decision in zip(payloads, decisions):
+        transaction_id = models.new_id(router.shard_for_card(payload.card_number))
+        transactions.append(
+            (
+                transaction_id,
+                payload.card_number,
+                payload.amount,
+                payload.currency,
+                payload.merchant,
+                payload.channel,
+                payload.device_id,
+                decision.status,
+                decision.reason,
+                created_at,
+            )
+        )
+        audits.append(
+            (
+                models.new_id(),
+                transaction_id,
+                orjson.dumps(payload.model_dump()).decode(),
+                orjson.dumps(decision.model_dump()).decode(),
+                decision.latency_ms,
+                created_at,
+            )
+        )
+        totals["total"] += 1
+        totals["approved"] += decision.status == APPROVED
+        totals["declined"] += decision.status == DECLINED
+        totals["amount_sum"] += payload.amount
+        sketch.add(decision.latency_ms)
+    return SeedChunk(transactions, audits, totals, dict(sketch.buckets))
+
+
+def write_rows(
+    connection: Connection,
+    table: Any,
+    columns: tuple[str, ...],
+    rows: list[tuple],
+) -> None:
+    """
+    Write ``rows`` with the fastest bulk path the dialect offers.
+    """
+
+    dialect = connection.dialect.name
+    if dialect == "postgresql":
+        cursor = connection.connection.dbapi_connection.cursor()
+        statement = f"COPY {table.name} ({', '.join(columns)}) FROM STDIN"
+        with cursor.copy(statement) as copy:
+            for row in rows:
+                copy.write_row(row)
+        return
+    if dialect == "sqlite":
+        placeholders = ", ".join("?" for _ in columns)
+        connection.exec_driver_sql(
+            f"INSERT INTO {table.name} ({', '.join(columns)}) VALUES ({placeholders})",
+            _encode_ids(connection, table, columns, rows),
+        )
+        return
+    connection.execute(insert(table), [dict(zip(columns, row)) for row in rows])
+
+
+def _encode_ids(
+    connection: Connection,
+    table: Any,
+    columns: tuple[str, ...],
+    rows: list[tuple],
+) -> list[tuple]:
+    # Raw driver SQL skips column types, so apply the compact id encoding here.
+    processors = [
+        (position, table.c[name].type.bind_processor(connection.dialect))
+        for position, name in enumerate(columns)
+        if isinstance(table.c[name].type, models.CompactUUID)
+    ]
+    if not processors:
+        return rows
+    encoded = []
+    for row in rows:
+        values = list(row)
+        for position, process in processors:
+            values[position] = process(values[position])
+        encoded.append(tuple(values))
+    return encoded
+
+
+def audit_rows(audits: list[tuple]) -> list[dict[str, Any]]:
+    """
+    Decode audit tuples (JSON-encoded payloads) for non-database audit backends.
+    """
+
+    return [
+        {
+            **dict(zip(AUDIT_COLUMNS, audit)),
+            "request_payload": orjson.loads(audit[2]),
+            "decision_payload": orjson.loads(audit[3]),
+            "created_at": datetime.fromisoformat(audit[5]),
+        }
+        for audit in audits
+    ]
+
+
+def _chunk_sizes(total_rows: int, chunk_size: int) -> Iterator[tuple[int, int]]:
+    for index, start in enumerate(range(0, total_rows, chunk_size)):
+        yield index, min(chunk_size, total_rows - start)
+
+
+def _produce(
+    total_rows: int,
+    chunk_size: int,
+    processes: int,
+    seed: Optional[int],
+) -> Iterator[SeedChunk]:
+    chunks = _chunk_sizes(total_rows, chunk_size)
+    if processes <= 1:
+        for index, size in chunks:
+            yield generate_chunk(index, size, seed)
+        return
+
+    window = processes * 2
+    with ProcessPoolExecutor(max_workers=processes) as executor:
+        pending: deque[Future] = deque()
+        for index, size in chunks:
+            pending.append(executor.submit(generate_chunk, index, size, seed))
+            if len(pending) >= window:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+def bulk_seed(
+    total_rows: int,
+    *,
+    chunk_size: int = 10_000,
+    processes: int = 1,
+    seed: Optional[int] = None,
+    progress: Optional[Callable[[int, float], None]] = None,
+) -> BulkSeedResult:
+    """
+    Insert ``total_rows`` scored transactions (and their audits) in chunks.
+
+    Every chunk commits independently with its stats increments (one commit
+    per shard it touches), so an interrupted run leaves consistent, queryable
+    data behind.
+    """
+
+    settings = config.get_settings()
+    stats_service = StatsService(
+        settings.stats_sketch_relative_accuracy, settings.stats_counter_stripes
+    )
+    audit_backend = get_audit_service().backend
+    transactions = models.Transaction.__table__
+    audits = models.DecisionAudit.__table__
+    router = get_shard_router()
+    written = 0
+    started = time.perf_counter()
+    for chunk in _produce(total_rows, chunk_size, processes, seed):
+        parts = {0: chunk}
+        if len(router) > 1:
+            parts = chunk.split(router.shard_for_id, settings.stats_sketch_relative_accuracy)
+        for shard, part in parts.items():
+            with SessionLocal() as session:
+                use_shard(session, shard)
+                connection = session.connection()
+                write_rows(connection, transactions, TRANSACTION_COLUMNS, part.transactions)
+                if audit_backend.stores_in_database:
+                    write_rows(connection, audits, AUDIT_COLUMNS, part.audits)
+                stats_service.apply(session, part.totals, part.buckets)
+                session.commit()
+        if not audit_backend.stores_in_database:
+            audit_backend.write_many(None, audit_rows(chunk.audits))
+        written += len(chunk.transactions)
+        if progress:
+            progress(written, time.perf_counter() - started)
+    return BulkSeedResult(rows=written, seconds=time.perf_counter() - started)
+
+
+def print_progress(total_rows: int) -> Callable[[int, float], None]:
+    def report(written: int, elapsed: float) -> None:
+        rate = written / elapsed if elapsed else 0.0
+        end = "\n" if written >= total_rows else ""
+        print(
+            f"\r{written:,}/{total_rows:,} rows ({written / total_rows:.0%}) "
+            f"{rate:,.0f} rows/s",
+            end=end,
+            file=sys.stderr,
+            flush=True,
+        )
+
+    return report
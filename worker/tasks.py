@@ -5,16 +5,38 @@ Reusable worker tasks for seeding data and refreshing feature caches.
 from __future__ import annotations
 
 import random
-from typing import Sequence
+from functools import lru_cache
+from itertools import islice
+from typing import Any, Callable, Iterable, Iterator, Optional, Sequence
+
+from rq import Queue
+from rq.job import Job
+from sqlalchemy import select
 
 from app import models, schemas
 from app.core import config
-from app.database import SessionLocal
-from app.services import FeatureCache, ScoringService
+from app.database import SessionLocal, get_shard_router, use_shard
+from app.dependencies import (
+    get_audit_service,
+    get_feature_cache,
+    get_stats_service,
+    velocity_tracker,
+)
+from app.services import ScoringService
 
 settings = config.get_settings()
-cache = FeatureCache(settings.redis_url, settings.feature_cache_ttl_seconds)
-scoring_service = ScoringService(settings=settings, cache=cache)
+
+
+@lru_cache
+def get_scoring_service() -> ScoringService:
+    """
+    Built on the first task rather than at import, so forks and CLI imports
+    skip the Redis clients until a job needs them.
+    """
+
+    return ScoringService(
+        settings=settings, cache=get_feature_cache(), velocity=velocity_tracker(settings)
+    )
 
 
 def seed_synthetic_transactions(batch_size: int = 5) -> Sequence[str]:
@@ -22,35 +44,51 @@ def seed_synthetic_transactions(batch_size: int = 5) -> Sequence[str]:
     Create demo transactions so dashboards/frontends have data to display.
     """
 
+    router = get_shard_router()
+    by_shard: dict[int, list[tuple[schemas.PaymentRequest, schemas.RiskDecision]]] = {}
+    for idx in range(batch_size):
+        payload = schemas.PaymentRequest(
+            card_number=f"4{random.randint(10**11, 10**12 - 1)}{idx:02d}",
+            amount=round(random.uniform(10, 950), 2),
+            merchant=f"Demo Merchant {idx + 1}",
+            currency="GBP",
+            channel="worker-seed",
+            device_id=f"seed-device-{idx:02d}",
+        )
+        decision = get_scoring_service().evaluate(payload)
+        shard = router.shard_for_card(payload.card_number)
+        by_shard.setdefault(shard, []).append((payload, decision))
+
     created_ids: list[str] = []
-    with SessionLocal() as session:
-        for idx in range(batch_size):
-            payload = schemas.PaymentRequest(
-                card_number=f"4{random.randint(10**11, 10**12 - 1)}{idx:02d}",
-                amount=round(random.uniform(10, 950), 2),
-                merchant=f"Demo Merchant {idx + 1}",
-                currency="GBP",
-                channel="worker-seed",
-                device_id=f"seed-device-{idx:02d}",
-            )
-            decision = scoring_service.evaluate(payload)
-            transaction = models.Transaction.from_payment(
-                payload=payload,
-                status=decision.status,
-                risk_flag=decision.reason,
-            )
-            session.add(transaction)
-            session.flush()
-            session.add(
-                models.DecisionAudit(
-                    transaction_id=transaction.id,
-                    request_payload=payload.model_dump(),
-                    decision_payload=decision.model_dump(),
+    for shard, entries in by_shard.items():
+        audits: list[schemas.DecisionAuditCreate] = []
+        with SessionLocal() as session:
+            use_shard(session, shard)
+            for payload, decision in entries:
+                transaction = models.Transaction.from_payment(
+                    payload=payload,
+                    status=decision.status,
+                    risk_flag=decision.reason,
+                    shard=shard,
+                )
+                # Ids are generated client-side, so no flush is needed to read them.
+                session.add(transaction)
+                audits.append(
+                    schemas.DecisionAuditCreate.model_construct(
+                        transaction_id=transaction.id,
+                        request_payload=payload.model_dump(),
+                        decision_payload=decision,
+                    )
+                )
+                get_stats_service().record(
+                    session,
+                    status=decision.status,
+                    amount=payload.amount,
                     latency_ms=decision.latency_ms,
                 )
-            )
-            created_ids.append(transaction.id)
-        session.commit()
+                created_ids.append(transaction.id)
+            # Commits the shard's transactions and stats together with the audits.
+            get_audit_service().record_many(session, audits)
     return created_ids
 
 
@@ -64,6 +102,107 @@ def refresh_feature_cache(card_number: str) -> dict:
         amount=1.0,
         merchant="Cache Refresh",
     )
-    features = scoring_service.generate_feature_snapshot(payload)
-    cache.set_features(card_number, features.model_dump())
+    features = get_scoring_service().generate_feature_snapshot(payload)
+    get_feature_cache().set_features(card_number, features.model_dump())
     return features.model_dump()
+
+
+def chunked(items: Iterable[Any], size: int) -> Iterator[list[Any]]:
+    """
+    Yield successive lists of at most ``size`` items.
+    """
+
+    iterator = iter(items)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+
+def refresh_feature_cache_many(
+    card_numbers: Sequence[str], chunk_size: Optional[int] = None
+) -> int:
+    """
+    Recompute and cache features for many cards, one pipelined Redis write per chunk.
+    """
+
+    scoring_service = get_scoring_service()
+    refreshed = 0
+    for chunk in chunked(card_numbers, chunk_size or settings.worker_chunk_size):
+        snapshots = {
+            card_number: scoring_service.generate_feature_snapshot(
+                schemas.PaymentRequest.model_construct(
+                    card_number=card_number,
+                    amount=1.0,
+                    merchant="Cache Refresh",
+                )
+            ).model_dump()
+            for card_number in chunk
+        }
+        get_feature_cache().set_features_many(snapshots)
+        refreshed += len(snapshots)
+    return refreshed
+
+
+def refresh_features_for_transactions(
+    transaction_ids: Sequence[str], chunk_size: Optional[int] = None
+) -> int:
+    """
+    Refresh cached features for the cards behind ``transaction_ids``.
+
+    Card numbers are loaded with one ``IN`` query per chunk and shard; returns
+    the number of transactions found.
+    """
+
+    router = get_shard_router()
+    found = 0
+    with SessionLocal() as session:
+        for chunk in chunked(transaction_ids, chunk_size or settings.worker_chunk_size):
+            card_numbers: list[str] = []
+            by_shard: dict[int, list[str]] = {}
+            for transaction_id in chunk:
+                by_shard.setdefault(router.shard_for_id(transaction_id), []).append(
+                    transaction_id
+                )
+            for shard, shard_ids in by_shard.items():
+                use_shard(session, shard)
+                card_numbers += session.scalars(
+                    select(models.Transaction.card_number).where(
+                        models.Transaction.id.in_(shard_ids)
+                    )
+                ).all()
+            found += len(card_numbers)
+            refresh_feature_cache_many(sorted(set(card_numbers)), chunk_size=len(chunk))
+    return found
+
+
+def bulk_seed_transactions(total_rows: int, chunk_size: Optional[int] = None) -> int:
+    """
+    Queue-friendly wrapper around the chunked bulk seeder (one process per job).
+    """
+
+    from worker.bulk_seed import bulk_seed
+
+    return bulk_seed(total_rows, chunk_size=chunk_size or 10_000, processes=1).rows
+
+
+def enqueue_batches(
+    queue: Queue,
+    func: Callable[..., Any],
+    items: Iterable[Any],
+    *,
+    job_size: Optional[int] = None,
+    **kwargs: Any,
+) -> list[Job]:
+    """
+    Split ``items`` into jobs of ``job_size`` and enqueue them in one round trip
+    per batch of jobs, e.g. ``enqueue_batches(q, refresh_feature_cache_many, cards)``.
+    """
+
+    jobs: list[Job] = []
+    batches = chunked(items, job_size or settings.worker_job_size)
+    for group in chunked(batches, 100):
+        jobs.extend(
+            queue.enqueue_many(
+                [Queue.prepare_data(func, args=(batch,), kwargs=kwargs) for batch in group]
+            )
+        )
+    return jobs